@@ -5,6 +5,14 @@ import sys
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR / "Tools" / "MCP"))
+
+from Client import MCPClient, MCPError, parse_command
+
+@st.cache_resource
+def mcp_client():
+    """One MCP server session shared across reruns instead of a server per click."""
+    return MCPClient()
 
 st.set_page_config(page_title="HeadySystems Throne", layout="wide")
 st.sidebar.title("HeadySystems")
@@ -30,9 +38,11 @@ elif mode == "Bridge Control":
     st.subheader("MCP Client Test")
     tool = st.selectbox("Tool", ["list", "scan_gaps:.", "verify_auth:User:ADMIN"])
     if st.button("Send JSON-RPC"):
-        mcp_client = BASE_DIR / "Tools" / "MCP" / "Client.py"
-        res = subprocess.run([sys.executable, str(mcp_client), tool], capture_output=True, text=True)
-        st.json(res.stdout)
+        method, params = parse_command(tool)
+        try:
+            st.json(mcp_client().request(method, params))
+        except (MCPError, ConnectionError, TimeoutError) as e:
+            st.error(str(e))
 
 elif mode == "Content Forge":
     st.title("🖋️ Muse Content Engine")
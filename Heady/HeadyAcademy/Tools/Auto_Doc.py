@@ -2,13 +2,25 @@
 Auto_Doc.py - ATLAS Tool
 Generates documentation for files or directories.
 """
-import sys
 import os
+import json
 from pathlib import Path
 from datetime import datetime
 
 OUTPUT_DIR = Path(__file__).parent.parent / "Content_Forge" / "Docs"
 
+MCP_TOOL = {
+    "name": "auto_doc",
+    "description": "Generate documentation",
+    "arguments": {
+        "path": {"type": "string", "description": "Path to document", "default": "."},
+        "report": {"type": "boolean", "description": "Also write the markdown document"},
+    },
+    "argv": ["--json", {"if": "report", "argv": ["--report"]}, "{path}"],
+    "coalesce": True,
+    "structured": True,
+}
+
 def extract_docstrings(file_path):
     """Extract docstrings and function signatures from Python files."""
     docs = []
@@ -42,39 +54,68 @@ def extract_docstrings(file_path):
     
     return docs
 
-def generate_doc(target):
-    """Generate documentation for a target file or directory."""
-    target_path = Path(target)
+def collect_docs(target_path):
+    """Documentation data for a file or directory as a JSON-ready dict."""
+    result = {"target": str(target_path), "kind": "missing", "docs": [], "files": []}
+    if target_path.is_file():
+        result["kind"] = "file"
+        if target_path.suffix == '.py':
+            result["docs"] = extract_docstrings(target_path)
+        else:
+            result["suffix"] = target_path.suffix
+            result["size"] = target_path.stat().st_size
+    elif target_path.is_dir():
+        result["kind"] = "directory"
+        for item in sorted(target_path.rglob('*')):
+            if item.is_file() and not any(p.startswith('.') for p in item.parts):
+                result["files"].append(str(item.relative_to(target_path)))
+    return result
+
+def write_doc(target_path, docs):
+    """Render collected documentation as markdown; returns its path."""
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     output_file = OUTPUT_DIR / f"doc_{target_path.stem}_{timestamp}.md"
     
     content = [f"# Documentation: {target_path.name}", f"Generated: {datetime.now().isoformat()}", ""]
     
-    if target_path.is_file():
+    if docs["kind"] == "file":
         content.append(f"## {target_path.name}")
         if target_path.suffix == '.py':
-            docs = extract_docstrings(target_path)
-            content.extend(docs)
+            content.extend(docs["docs"])
         else:
-            content.append(f"File type: {target_path.suffix}")
-            content.append(f"Size: {target_path.stat().st_size} bytes")
-    elif target_path.is_dir():
+            content.append(f"File type: {docs['suffix']}")
+            content.append(f"Size: {docs['size']} bytes")
+    elif docs["kind"] == "directory":
         content.append("## Directory Contents")
-        for item in sorted(target_path.rglob('*')):
-            if item.is_file() and not any(p.startswith('.') for p in item.parts):
-                rel = item.relative_to(target_path)
-                content.append(f"- `{rel}`")
+        for rel in docs["files"]:
+            content.append(f"- `{rel}`")
     else:
-        content.append(f"Target not found: {target}")
+        content.append(f"Target not found: {target_path}")
     
     with open(output_file, 'w', encoding='utf-8') as f:
         f.write('\n'.join(content))
+    return output_file
+
+def generate_doc(target, as_json=False, report=True):
+    """Generate documentation for a target file or directory; as_json prints the result."""
+    target_path = Path(target)
+    docs = collect_docs(target_path)
+    docs["counts"] = {"docs": len(docs["docs"]), "files": len(docs["files"])}
+    docs["report"] = str(write_doc(target_path, docs)) if report else None
     
-    print(f"Documentation generated: {output_file}")
-    return str(output_file)
+    if as_json:
+        print(json.dumps(docs))
+    else:
+        print(f"Documentation generated: {docs['report']}")
+    return docs
 
 if __name__ == "__main__":
-    target = sys.argv[1] if len(sys.argv) > 1 else "."
-    generate_doc(target)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generates documentation for files or directories")
+    parser.add_argument("path", nargs="?", default=".", help="File or directory to document")
+    parser.add_argument("--json", action="store_true", help="Print the result as one JSON object")
+    parser.add_argument("--report", action="store_true", help="With --json, also write the report file")
+    args = parser.parse_args()
+    generate_doc(args.path, args.json, report=not args.json or args.report)
@@ -2,7 +2,6 @@
 Brainstorm.py - SASHA Tool
 Creative idea generation and brainstorming assistant.
 """
-import sys
 import os
 import random
 from pathlib import Path
@@ -10,6 +9,13 @@ from datetime import datetime
 
 OUTPUT_DIR = Path(__file__).parent.parent / "Content_Forge" / "Ideas"
 
+MCP_TOOL = {
+    "name": "brainstorm",
+    "description": "Generate brainstorming ideas",
+    "arguments": {"topic": {"type": "string", "description": "Topic to brainstorm", "default": "innovation"}},
+    "argv": ["{topic}"],
+}
+
 IDEA_TEMPLATES = [
     "What if we combined {topic} with blockchain technology?",
     "Consider a mobile-first approach to {topic}",
@@ -109,5 +115,8 @@ def brainstorm(topic):
     return str(output_file)
 
 if __name__ == "__main__":
-    topic = sys.argv[1] if len(sys.argv) > 1 else "innovation"
-    brainstorm(topic)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Creative idea generation and brainstorming assistant")
+    parser.add_argument("topic", nargs="?", default="innovation")
+    brainstorm(parser.parse_args().topic)
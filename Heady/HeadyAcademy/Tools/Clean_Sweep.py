@@ -2,7 +2,6 @@
 Clean_Sweep.py - JANITOR Tool
 Cleans temporary files, caches, and maintains directory hygiene.
 """
-import sys
 import os
 import shutil
 from pathlib import Path
@@ -24,6 +23,16 @@ CLEANUP_PATTERNS = [
 
 PROTECTED_DIRS = {".git", ".env", "venv", "node_modules", "Vault"}
 
+MCP_TOOL = {
+    "name": "clean_sweep",
+    "description": "Clean temporary files",
+    "arguments": {
+        "path": {"type": "string", "description": "Path to clean", "default": "."},
+        "dry_run": {"type": "boolean", "description": "Dry run mode"},
+    },
+    "argv": ["{path}", {"if": "dry_run", "argv": ["--dry"]}],
+}
+
 def get_cleanup_targets(target_path):
     """Find files and directories matching cleanup patterns."""
     targets = []
@@ -78,6 +87,10 @@ def clean_sweep(target, dry_run=False):
     return cleaned
 
 if __name__ == "__main__":
-    target = sys.argv[1] if len(sys.argv) > 1 else "."
-    dry_run = "--dry" in sys.argv
-    clean_sweep(target, dry_run)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Cleans temporary files, caches, and maintains directory hygiene")
+    parser.add_argument("path", nargs="?", default=".", help="Path to clean")
+    parser.add_argument("--dry", action="store_true", help="List what would be removed without removing it")
+    args = parser.parse_args()
+    clean_sweep(args.path, args.dry)
@@ -2,13 +2,22 @@
 Content_Generator.py - MUSE Tool
 Generates marketing content, whitepapers, and mock data.
 """
-import sys
 import os
 from pathlib import Path
 from datetime import datetime
 
 OUTPUT_DIR = Path(__file__).parent.parent / "Content_Forge"
 
+MCP_TOOL = {
+    "name": "generate_content",
+    "description": "Generate marketing/whitepaper content",
+    "arguments": {
+        "mode": {"type": "string", "enum": ["whitepaper", "marketing", "data"], "description": "Content type", "default": "marketing"},
+        "subject": {"type": "string", "description": "Content subject", "default": "HeadySystems"},
+    },
+    "argv": ["{mode}", "{subject}"],
+}
+
 TEMPLATES = {
     "whitepaper": """# {subject}
 ## Executive Summary
@@ -119,6 +128,10 @@ def generate_content(mode, subject):
     return str(output_file)
 
 if __name__ == "__main__":
-    mode = sys.argv[1] if len(sys.argv) > 1 else "marketing"
-    subject = sys.argv[2] if len(sys.argv) > 2 else "HeadySystems"
-    generate_content(mode, subject)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generates marketing content, whitepapers, and mock data")
+    parser.add_argument("mode", nargs="?", default="marketing")
+    parser.add_argument("subject", nargs="?", default="HeadySystems")
+    args = parser.parse_args()
+    generate_content(args.mode, args.subject)
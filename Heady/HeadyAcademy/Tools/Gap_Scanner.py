@@ -2,13 +2,25 @@
 Gap_Scanner.py - NOVA Tool
 Scans repositories for missing documentation, tests, and best practices.
 """
-import sys
 import os
+import json
 from pathlib import Path
 from datetime import datetime
 
 OUTPUT_DIR = Path(__file__).parent.parent / "Logs" / "Gap_Reports"
 
+MCP_TOOL = {
+    "name": "scan_gaps",
+    "description": "Scan repo for missing docs/tests",
+    "arguments": {
+        "path": {"type": "string", "description": "Directory to scan", "default": "."},
+        "report": {"type": "boolean", "description": "Also write a markdown report"},
+    },
+    "argv": ["--json", {"if": "report", "argv": ["--report"]}, "{path}"],
+    "coalesce": True,
+    "structured": True,
+}
+
 def scan_for_gaps(target_path):
     """Scan a directory for common gaps."""
     gaps = {
@@ -116,21 +128,49 @@ def generate_report(target, gaps):
     
     return output_file, total_gaps
 
-def scan(target):
-    """Main scan entry point."""
+def gap_result(target, gaps):
+    """JSON-ready scan result: gap paths by kind plus counts."""
+    result = {"target": str(target), "counts": {}, "gaps": {}, "report": None}
+    for kind, value in gaps.items():
+        if kind == "large_files":
+            result["gaps"][kind] = [{"path": str(f), "size": size} for f, size in value]
+        elif isinstance(value, list):
+            result["gaps"][kind] = [str(f) for f in value]
+        else:
+            result["gaps"][kind] = value
+        result["counts"][kind] = len(value) if isinstance(value, list) else int(bool(value))
+    result["total_gaps"] = sum(result["counts"].values())
+    return result
+
+def scan(target, as_json=False, report=True):
+    """Main scan entry point; as_json prints the result instead of a summary."""
     target_path = Path(target).resolve()
     
     if not target_path.exists():
         print(f"[NOVA] Target not found: {target}")
-        return
+        return None
     
-    print(f"[NOVA] Scanning {target_path}...")
+    if not as_json:
+        print(f"[NOVA] Scanning {target_path}...")
     gaps = scan_for_gaps(target_path)
-    output_file, total = generate_report(target_path, gaps)
-    
-    print(f"[NOVA] Scan complete: {total} gaps found")
-    print(f"  Report: {output_file}")
+    result = gap_result(target_path, gaps)
+    if report:
+        output_file, _ = generate_report(target_path, gaps)
+        result["report"] = str(output_file)
+    
+    if as_json:
+        print(json.dumps(result))
+    else:
+        print(f"[NOVA] Scan complete: {result['total_gaps']} gaps found")
+        print(f"  Report: {result['report']}")
+    return result
 
 if __name__ == "__main__":
-    target = sys.argv[1] if len(sys.argv) > 1 else "."
-    scan(target)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Scans repositories for missing documentation, tests, and best practices")
+    parser.add_argument("path", nargs="?", default=".", help="Directory to scan")
+    parser.add_argument("--json", action="store_true", help="Print the result as one JSON object")
+    parser.add_argument("--report", action="store_true", help="With --json, also write the report file")
+    args = parser.parse_args()
+    scan(args.path, args.json, report=not args.json or args.report)
@@ -1,6 +1,7 @@
 import os
 import sys
 import json
+import argparse
 import hashlib
 import datetime
 from pathlib import Path
@@ -9,6 +10,16 @@ ACADEMY_ROOT = Path(__file__).resolve().parent.parent
 LEDGER_DIR = ACADEMY_ROOT / "Logs" / "Ledger"
 CHAIN_FILE = LEDGER_DIR / "chain_head.json"
 
+MCP_TOOL = {
+    "name": "verify_auth",
+    "description": "Verify User Role via Blockchain",
+    "arguments": {
+        "user": {"type": "string", "description": "Username", "default": "USER"},
+        "role": {"type": "string", "description": "User role", "default": "ADMIN"},
+    },
+    "argv": ["verify", "{role}", "{user}"],
+}
+
 
 class Block:
     def __init__(self, index, timestamp, data, prev_hash):
@@ -84,25 +95,18 @@ def run_build_repair():
 
 
 def main(argv):
-    if len(argv) < 2:
-        print("Usage: python Heady_Chain.py <grant|verify> <role> <user>")
-        return 2
-
-    cmd = argv[1].lower()
+    parser = argparse.ArgumentParser(prog="Heady_Chain.py", description="Role grant ledger")
+    parser.add_argument("command", type=str.lower, choices=("build", "grant", "verify"))
+    parser.add_argument("role", nargs="?")
+    parser.add_argument("user", nargs="?")
+    args = parser.parse_args(argv[1:])
 
-    if cmd == "build":
+    if args.command == "build":
         return run_build_repair()
+    if args.user is None:
+        parser.error(f"{args.command} needs <role> <user>")
 
-    if cmd not in ("grant", "verify"):
-        print("Usage: python Heady_Chain.py <build|grant|verify> [args]")
-        return 2
-
-    if len(argv) < 4:
-        print(f"Usage: python Heady_Chain.py {cmd} <role> <user>")
-        return 2
-
-    role = argv[2]
-    user = argv[3]
+    cmd, role, user = args.command, args.role, args.user
     hc = HeadyChain()
 
     if cmd == "grant":
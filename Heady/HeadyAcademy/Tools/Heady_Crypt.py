@@ -2,7 +2,6 @@
 Heady_Crypt.py - CIPHER Tool
 Obfuscates and encrypts sensitive content.
 """
-import sys
 import os
 import base64
 import hashlib
@@ -11,6 +10,14 @@ from datetime import datetime
 
 OUTPUT_DIR = Path(__file__).parent.parent / "Content_Forge" / "Encrypted"
 
+MCP_TOOL = {
+    "name": "obfuscate",
+    "description": "Obfuscate file contents",
+    "arguments": {"file": {"type": "string", "description": "File to obfuscate"}},
+    "required": ["file"],
+    "argv": ["{file}"],
+}
+
 def simple_obfuscate(content):
     """Simple reversible obfuscation using base64 and character shifting."""
     encoded = base64.b64encode(content.encode('utf-8')).decode('utf-8')
@@ -64,8 +71,8 @@ def obfuscate_file(target):
         return None
 
 if __name__ == "__main__":
-    target = sys.argv[1] if len(sys.argv) > 1 else None
-    if target:
-        obfuscate_file(target)
-    else:
-        print("Usage: Heady_Crypt.py <target_file>")
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Obfuscates and encrypts sensitive content")
+    parser.add_argument("target", help="File to obfuscate")
+    obfuscate_file(parser.parse_args().target)
@@ -0,0 +1,206 @@
+"""
+Admission.py - BRIDGE Admission Control
+Per-tool concurrency limits, a bounded wait queue and cancellable tool calls
+for the MCP Server.
+
+A call that cannot start immediately waits in a shared queue; once the queue
+is full new calls are rejected with Overloaded so clients can back off and
+retry. Transports reserve a place for each call before handing it to a worker
+thread, so calls waiting for a thread count against the same queue. Every
+in-flight call has a CallContext, so notifications/cancelled (or a client
+disconnect) kills the underlying subprocess instead of letting it run to its
+timeout.
+"""
+import os
+import signal
+import logging
+import threading
+
+
+class Overloaded(Exception):
+    """Raised when the admission queue is full; the call may be retried."""
+
+    def __init__(self, tool_name, queued, retry_after_ms=1000):
+        super().__init__(f"Server busy: {queued} calls queued, '{tool_name}' rejected")
+        self.tool_name = tool_name
+        self.retry_after_ms = retry_after_ms
+
+
+def kill_process(process):
+    """Kill a tool subprocess and, on POSIX, its whole process group."""
+    try:
+        if os.name != "nt":
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError, OSError):
+        pass
+
+
+class CallContext:
+    """Cancellation handle for one tool execution."""
+
+    def __init__(self):
+        self.cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._process = None
+        self._callbacks = []
+
+    def attach(self, process):
+        """Track the subprocess doing the work; killed at once if already cancelled."""
+        with self._lock:
+            if not self.cancelled.is_set():
+                self._process = process
+                return
+        kill_process(process)
+
+    def detach(self):
+        with self._lock:
+            self._process = None
+
+    def on_cancel(self, callback):
+        """Run callback when the call is cancelled (immediately if it already was)."""
+        with self._lock:
+            if not self.cancelled.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def cancel(self):
+        with self._lock:
+            if self.cancelled.is_set():
+                return False
+            self.cancelled.set()
+            process, self._process = self._process, None
+            callbacks, self._callbacks = self._callbacks, []
+        if process is not None:
+            kill_process(process)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logging.error(f"Cancel callback failed: {e}")
+        return True
+
+
+class CallRegistry:
+    """Maps (scope, request id) to the CallContext of in-flight requests.
+
+    The scope separates request ids from different connections; stdio uses
+    the default scope of None.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def register(self, request_id, scope=None):
+        ctx = CallContext()
+        if request_id is not None:
+            with self._lock:
+                self._calls[(scope, request_id)] = ctx
+        return ctx
+
+    def unregister(self, request_id, scope=None):
+        with self._lock:
+            self._calls.pop((scope, request_id), None)
+
+    def cancel(self, request_id, scope=None):
+        with self._lock:
+            ctx = self._calls.get((scope, request_id))
+        return ctx.cancel() if ctx else False
+
+    def cancel_scope(self, scope=None):
+        """Cancel every call from one connection; returns how many were cancelled."""
+        with self._lock:
+            contexts = [ctx for (s, _), ctx in self._calls.items() if s == scope]
+        return sum(1 for ctx in contexts if ctx.cancel())
+
+    def __len__(self):
+        with self._lock:
+            return len(self._calls)
+
+
+class AdmissionController:
+    """Per-tool concurrency caps with a bounded, shared wait queue."""
+
+    def __init__(self, default_limit=4, max_queue=32):
+        if default_limit <= 0 or max_queue < 0:
+            raise ValueError("default_limit must be positive and max_queue non-negative")
+        self.default_limit = default_limit
+        self.max_queue = max_queue
+        self.limits = {}
+        self._active = {}
+        self._queued = 0
+        # Accepted calls still waiting for a worker thread
+        self._reserved = 0
+        self._cond = threading.Condition()
+
+    def set_limit(self, tool_name, limit):
+        if limit <= 0:
+            raise ValueError("limit must be positive")
+        with self._cond:
+            self.limits[tool_name] = limit
+            self._cond.notify_all()
+
+    def acquire(self, tool_name, ctx=None):
+        """Take a slot for tool_name; False if ctx was cancelled while waiting.
+
+        Raises Overloaded when the call would have to queue and the queue is full.
+        """
+        with self._cond:
+            limit = self.limits.get(tool_name, self.default_limit)
+            if self._active.get(tool_name, 0) < limit:
+                self._active[tool_name] = self._active.get(tool_name, 0) + 1
+                return True
+            if self._queued >= self.max_queue:
+                raise Overloaded(tool_name, self._queued)
+            self._queued += 1
+
+        if ctx is not None:
+            ctx.on_cancel(self.wake)
+        with self._cond:
+            try:
+                while True:
+                    if ctx is not None and ctx.cancelled.is_set():
+                        return False
+                    limit = self.limits.get(tool_name, self.default_limit)
+                    if self._active.get(tool_name, 0) < limit:
+                        self._active[tool_name] = self._active.get(tool_name, 0) + 1
+                        return True
+                    self._cond.wait()
+            finally:
+                self._queued -= 1
+
+    def reserve(self, tool_name):
+        """Hold a queue place for a call until a worker thread picks it up.
+
+        Raises Overloaded when calls are already waiting for threads and the
+        queue is full; otherwise acquire() decides once the call starts.
+        """
+        with self._cond:
+            waiting = self._queued + self._reserved
+            if self._reserved and waiting >= self.max_queue:
+                raise Overloaded(tool_name, waiting)
+            self._reserved += 1
+
+    def unreserve(self):
+        with self._cond:
+            self._reserved -= 1
+
+    def release(self, tool_name):
+        with self._cond:
+            self._active[tool_name] -= 1
+            self._cond.notify_all()
+
+    def wake(self):
+        with self._cond:
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "active": {name: n for name, n in self._active.items() if n},
+                "queued": self._queued + self._reserved,
+                "max_queue": self.max_queue,
+            }
@@ -0,0 +1,299 @@
+"""
+Benchmark.py - BRIDGE Load Generator
+Throughput and tail-latency benchmark for the MCP Server, driven through
+MCPClient.
+
+The server under test is the real Server.py request path (framing, dispatch,
+admission control, metrics) with extra stub tools registered, each sleeping
+for a configurable time either in the worker thread ("sleep") or in a
+spawned Python process like a real tool ("process"). A fixed number of client
+threads keep that many requests in flight over one multiplexed connection,
+drawing methods from a weighted mix. Results are written as JSON under
+Logs/Benchmarks so runs can be compared across versions.
+
+Usage:
+    python Benchmark.py [--concurrency 16] [--duration 10]
+                        [--mix initialize=1,tools/list=4,tools/call=5]
+                        [--stub-ms 0,10,100] [--stub-mode sleep]
+                        [--compare previous.json]
+"""
+import os
+import sys
+import json
+import time
+import random
+import platform
+import threading
+import subprocess
+from datetime import datetime
+from pathlib import Path
+
+from Client import OVERLOADED, PROTOCOL_VERSION, MCPClient, MCPError
+
+OUTPUT_DIR = Path(__file__).parent.parent.parent / "Logs" / "Benchmarks"
+STUB_PREFIX = "bench_stub_"
+DEFAULT_MIX = "initialize=1,tools/list=4,tools/call=5"
+
+
+def parse_mix(spec):
+    """Parse a "method=weight,..." spec into (method, weight) pairs."""
+    mix = []
+    for part in spec.split(","):
+        method, _, weight = part.strip().partition("=")
+        weight = float(weight or 1)
+        if weight < 0:
+            raise ValueError(f"Negative weight for {method}")
+        mix.append((method, weight))
+    if not mix or sum(w for _, w in mix) <= 0:
+        raise ValueError("Mix needs at least one positive weight")
+    return mix
+
+
+def percentile(ordered, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, max(0, int(q * len(ordered) + 0.5) - 1))]
+
+
+def serve_stub(stub_ms, mode):
+    """Run Server.py's stdio loop with bench_stub_<ms> tools added."""
+    import Server
+
+    durations = {}
+    for ms in stub_ms:
+        name = f"{STUB_PREFIX}{ms:g}"
+        durations[name] = ms / 1000.0
+        Server.TOOL_REGISTRY[name] = {"script": "", "description": f"Benchmark stub ({ms:g} ms)"}
+
+    real_execute = Server.execute_tool
+
+    def execute_tool(tool_name, arguments, ctx=None):
+        seconds = durations.get(tool_name)
+        if seconds is None:
+            return real_execute(tool_name, arguments, ctx)
+        if mode == "process":
+            process = subprocess.Popen([sys.executable, "-c", f"import time; time.sleep({seconds})"],
+                                       start_new_session=(os.name != "nt"))
+            if ctx is not None:
+                ctx.attach(process)
+            process.wait()
+            if ctx is not None:
+                ctx.detach()
+        elif ctx is not None:
+            ctx.cancelled.wait(seconds)
+        else:
+            time.sleep(seconds)
+        return f"slept {seconds * 1000:g} ms", None
+
+    # run_admitted looks execute_tool up at call time, so stubs go through admission
+    Server.execute_tool = execute_tool
+    Server.serve_stdio()
+
+
+class LoadRun:
+    """Closed-loop load at a fixed concurrency for a duration or request count."""
+
+    def __init__(self, client, mix, stub_tools, concurrency=16, duration=10.0, requests=None,
+                 warmup=1.0, seed=1):
+        self.client = client
+        self.methods = [m for m, _ in mix]
+        self.weights = [w for _, w in mix]
+        self.stub_tools = stub_tools
+        self.concurrency = concurrency
+        self.duration = duration
+        self.requests = requests
+        self.warmup = warmup
+        self.seed = seed
+        self._lock = threading.Lock()
+        self._issued = 0
+        self.samples = {}
+        self.errors = {}
+        self.rejected = {}
+
+    def _params(self, method, rng):
+        if method == "initialize":
+            return {"protocolVersion": PROTOCOL_VERSION, "capabilities": {},
+                    "clientInfo": {"name": "Benchmark", "version": "1.0"}}
+        if method == "tools/call":
+            return {"name": rng.choice(self.stub_tools), "arguments": {}}
+        return None
+
+    def _take(self, deadline):
+        with self._lock:
+            if self.requests is not None:
+                if self._issued >= self.requests:
+                    return False
+                self._issued += 1
+                return True
+        return time.perf_counter() < deadline
+
+    def _worker(self, index, start, deadline):
+        rng = random.Random(self.seed + index)
+        samples, errors, rejected = {}, {}, {}
+        while self._take(deadline):
+            method = rng.choices(self.methods, self.weights)[0]
+            params = self._params(method, rng)
+            t0 = time.perf_counter()
+            try:
+                self.client.request(method, params)
+                ok, overloaded = True, False
+            except MCPError as e:
+                ok, overloaded = False, e.code == OVERLOADED
+            except (ConnectionError, TimeoutError):
+                ok, overloaded = False, False
+            t1 = time.perf_counter()
+            if t0 - start < self.warmup and self.requests is None:
+                continue
+            if ok:
+                samples.setdefault(method, []).append(t1 - t0)
+            elif overloaded:
+                rejected[method] = rejected.get(method, 0) + 1
+            else:
+                errors[method] = errors.get(method, 0) + 1
+        with self._lock:
+            for method, values in samples.items():
+                self.samples.setdefault(method, []).extend(values)
+            for target, source in ((self.errors, errors), (self.rejected, rejected)):
+                for method, n in source.items():
+                    target[method] = target.get(method, 0) + n
+
+    def run(self):
+        start = time.perf_counter()
+        deadline = start + self.warmup + self.duration
+        threads = [threading.Thread(target=self._worker, args=(i, start, deadline), daemon=True)
+                   for i in range(self.concurrency)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        measured = time.perf_counter() - start - (0 if self.requests is not None else self.warmup)
+        return self.summary(measured)
+
+    def summary(self, elapsed):
+        def stats(values, errors, rejected):
+            ordered = sorted(values)
+            ms = lambda v: round(v * 1000, 3) if v is not None else None
+            return {
+                "requests": len(ordered),
+                "errors": errors,
+                "rejected": rejected,
+                "throughput_rps": round(len(ordered) / elapsed, 1) if elapsed > 0 else None,
+                "mean_ms": ms(sum(ordered) / len(ordered)) if ordered else None,
+                "p50_ms": ms(percentile(ordered, 0.50)),
+                "p99_ms": ms(percentile(ordered, 0.99)),
+                "p999_ms": ms(percentile(ordered, 0.999)),
+                "max_ms": ms(ordered[-1]) if ordered else None,
+            }
+
+        methods = {m: stats(self.samples.get(m, []), self.errors.get(m, 0), self.rejected.get(m, 0))
+                   for m in self.methods}
+        everything = [v for values in self.samples.values() for v in values]
+        total = stats(everything, sum(self.errors.values()), sum(self.rejected.values()))
+        return {"elapsed_s": round(elapsed, 3), "total": total, "methods": methods}
+
+
+def git_revision():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).parent,
+                                capture_output=True, text=True)
+        return result.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_benchmark(concurrency=16, duration=10.0, requests=None, mix=DEFAULT_MIX, stub_ms=(0, 10, 100),
+                  stub_mode="sleep", warmup=1.0, server_env=None):
+    """Start a stub server, drive load through MCPClient and return the result document."""
+    mix = parse_mix(mix)
+    env = dict(os.environ)
+    # Keep the benchmark from writing the server's Prometheus file into Logs
+    env.setdefault("HEADY_MCP_METRICS_INTERVAL", "0")
+    env.update(server_env or {})
+    command = [sys.executable, str(Path(__file__).resolve()), "--serve-stub",
+               ",".join(f"{ms:g}" for ms in stub_ms), "--stub-mode", stub_mode]
+    stub_tools = [f"{STUB_PREFIX}{ms:g}" for ms in stub_ms]
+
+    client = MCPClient(command=command, env=env, overload_retries=0)
+    try:
+        client.connect()
+        result = LoadRun(client, mix, stub_tools, concurrency, duration, requests, warmup).run()
+        server_health = client.health()
+    finally:
+        client.close()
+
+    return {
+        "benchmark": "mcp_load",
+        "timestamp": datetime.now().isoformat(),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "config": {
+            "concurrency": concurrency, "duration_s": duration, "requests": requests, "warmup_s": warmup,
+            "mix": dict(mix), "stub_ms": list(stub_ms), "stub_mode": stub_mode,
+            "server_env": {k: v for k, v in env.items() if k.startswith("HEADY_MCP_")},
+        },
+        "results": result,
+        "server": {"admission": server_health.get("admission"), "coalescing": server_health.get("coalescing")},
+    }
+
+
+def save_results(doc, path=None):
+    if path is None:
+        OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = OUTPUT_DIR / f"mcp_load_{doc['revision'] or 'local'}_{stamp}.json"
+    path = Path(path)
+    path.write_text(json.dumps(doc, indent=2), encoding="utf-8")
+    return path
+
+
+def print_results(doc, baseline=None):
+    cfg = doc["config"]
+    print(f"[BRIDGE] MCP load: concurrency {cfg['concurrency']}, {doc['results']['elapsed_s']:.1f}s, "
+          f"stubs {cfg['stub_ms']} ms ({cfg['stub_mode']})")
+    header = f"  {'method':<12} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'p999 ms':>9} {'errors':>7} {'rejected':>9}"
+    print(header)
+    rows = list(doc["results"]["methods"].items()) + [("total", doc["results"]["total"])]
+    for method, s in rows:
+        fmt = lambda v: f"{v:9.2f}" if v is not None else f"{'-':>9}"
+        line = (f"  {method:<12} {fmt(s['throughput_rps'])} {fmt(s['p50_ms'])} {fmt(s['p99_ms'])} "
+                f"{fmt(s['p999_ms'])} {s['errors']:>7} {s['rejected']:>9}")
+        if baseline:
+            old = baseline["results"]["methods"].get(method) if method != "total" else baseline["results"]["total"]
+            if old and old.get("throughput_rps") and s["throughput_rps"] is not None:
+                change = (s["throughput_rps"] / old["throughput_rps"] - 1) * 100
+                line += f"   {change:+.1f}% req/s vs {baseline.get('revision') or 'baseline'}"
+        print(line)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="MCP server load benchmark")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests kept in flight")
+    parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds (after warmup)")
+    parser.add_argument("--requests", type=int, help="Stop after this many requests instead of a duration")
+    parser.add_argument("--warmup", type=float, default=1.0, help="Seconds of unrecorded load first")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Weighted methods, e.g. tools/call=9,tools/list=1")
+    parser.add_argument("--stub-ms", default="0,10,100", help="Stub tool durations in ms")
+    parser.add_argument("--stub-mode", choices=("sleep", "process"), default="sleep",
+                        help="Sleep in the worker thread, or in a spawned process like a real tool")
+    parser.add_argument("--server-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="Environment for the server, e.g. HEADY_MCP_WORKERS=32")
+    parser.add_argument("--output", help="Result JSON path (default: Logs/Benchmarks/...)")
+    parser.add_argument("--compare", help="Previous result JSON to compare throughput against")
+    parser.add_argument("--serve-stub", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    stub_ms = [float(ms) for ms in (args.serve_stub or args.stub_ms).split(",") if ms.strip()]
+    if args.serve_stub is not None:
+        serve_stub(stub_ms, args.stub_mode)
+        sys.exit(0)
+
+    doc = run_benchmark(args.concurrency, args.duration, args.requests, args.mix, stub_ms, args.stub_mode,
+                        args.warmup, dict(kv.split("=", 1) for kv in args.server_env))
+    baseline = json.loads(Path(args.compare).read_text(encoding="utf-8")) if args.compare else None
+    print_results(doc, baseline)
+    print(f"  Results: {save_results(doc, args.output)}")
@@ -0,0 +1,278 @@
+"""
+Chunker.py - BRIDGE Streaming Chunker
+Lazily splits bytes, memoryviews or mmapped files into size-bounded chunks.
+
+Every chunk is a memoryview into the original buffer, including its overlap
+window, so chunking a multi-hundred-MB file copies nothing until a caller
+decodes a chunk. chunk_file is a context manager whose views are released
+when the block exits. Boundary strategies:
+
+- lines:    whole "\n"-terminated lines; a line longer than max_bytes is
+            emitted on its own
+- markdown: sections starting at headings, split by lines when too large
+- python:   top-level AST statements (defs/classes), split by lines when too large
+- cdc:      content-defined boundaries from a rolling bit fingerprint, so an
+            edit only shifts the chunks around it (stable ids for dedup/caching);
+            cuts are moved back to UTF-8 character starts so text chunks decode
+
+Run directly to benchmark: python Chunker.py [--mb 256] [--strategy all]
+"""
+import re
+import ast
+import mmap
+import random
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from pathlib import Path
+
+STRATEGIES = ("lines", "markdown", "python", "cdc")
+
+# A chunk covers data[start - overlap:end]; start..end is the part not shared
+# with the previous chunk.
+Chunk = namedtuple("Chunk", "start end overlap data")
+
+_NEWLINE = re.compile(rb"\n")
+_MD_HEADING = re.compile(rb"^#{1,6}[ \t]", re.MULTILINE)
+
+# Content-defined chunking: every byte maps to one pseudo-random bit and a
+# boundary falls after each occurrence of a fixed bit pattern, so boundaries
+# depend only on the last few bytes of content. translate() and find() do the
+# per-byte work in C.
+CDC_BLOCK = 1 << 20
+_CDC_RNG = random.Random(0x4845414459)
+_CDC_TABLE = bytes(_CDC_RNG.choice(b"01") for _ in range(256))
+_CDC_PATTERN = bytes(_CDC_RNG.choice(b"01") for _ in range(24))
+
+
+def _line_boundaries(buf, start, end):
+    for m in _NEWLINE.finditer(buf, start, end):
+        yield m.end()
+    yield end
+
+
+def _markdown_boundaries(buf, start, end):
+    for m in _MD_HEADING.finditer(buf, start, end):
+        if m.start() > start:
+            yield m.start()
+    yield end
+
+
+def _python_boundaries(buf, start, end):
+    source = bytes(buf[start:end])
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        # Not parseable - treat as plain lines
+        yield from _line_boundaries(buf, start, end)
+        return
+
+    line_starts = [0]
+    line_starts.extend(m.end() for m in _NEWLINE.finditer(source))
+    for node in tree.body:
+        lineno = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+        offset = line_starts[lineno - 1]
+        if offset > 0:
+            yield start + offset
+    yield end
+
+
+def _pack(buf, boundaries, start, max_bytes, split_oversized):
+    """Greedily merge boundary-delimited segments into chunks of at most max_bytes.
+
+    Yields (start, end) spans. A single segment larger than max_bytes is passed
+    to split_oversized, or emitted whole when that is None.
+    """
+    chunk_start = last = start
+    for b in boundaries:
+        if b <= last:
+            continue
+        if b - chunk_start <= max_bytes:
+            last = b
+            continue
+        if last > chunk_start:
+            yield chunk_start, last
+            chunk_start = last
+        if b - chunk_start > max_bytes:
+            if split_oversized is None:
+                yield chunk_start, b
+            else:
+                yield from split_oversized(buf, chunk_start, b, max_bytes)
+            chunk_start = b
+        last = b
+    if last > chunk_start:
+        yield chunk_start, last
+
+
+def _split_lines(buf, start, end, max_bytes):
+    return _pack(buf, _line_boundaries(buf, start, end), start, max_bytes, None)
+
+
+def _cdc_spans(buf, start, end, max_bytes, avg_bytes=None, min_bytes=None):
+    """Content-defined spans between min_bytes and max_bytes long."""
+    avg_bytes = avg_bytes or max(64, max_bytes // 2)
+    min_bytes = min_bytes or max(1, avg_bytes // 4)
+    # A k-bit pattern matches about once every 2**k bytes
+    pattern = _CDC_PATTERN[:max(4, min(len(_CDC_PATTERN), (avg_bytes - min_bytes).bit_length()))]
+    width = len(pattern)
+
+    chunk_start = pos = start
+    while pos < end:
+        block_end = min(pos + CDC_BLOCK, end)
+        lead = max(start, pos - width)
+        bits = bytes(buf[lead:block_end]).translate(_CDC_TABLE)
+
+        while True:
+            # Boundary i = lead + j + width for a pattern match at bits[j]
+            lo = chunk_start + min_bytes
+            cut_max = chunk_start + max_bytes
+            hi = min(cut_max, block_end)
+            found = None
+            if lo <= hi:
+                j = bits.find(pattern, max(0, lo - width - lead), hi - lead)
+                if j != -1:
+                    found = lead + j + width
+            if found is None and cut_max <= block_end:
+                found = cut_max
+            if found is None:
+                break
+            found = _utf8_end(buf, found, chunk_start)
+            yield chunk_start, found
+            chunk_start = found
+        pos = block_end
+    if chunk_start < end:
+        yield chunk_start, end
+
+
+def _utf8_start(buf, pos, limit):
+    # Skip forward past UTF-8 continuation bytes (10xxxxxx)
+    while pos < limit and (buf[pos] & 0xC0) == 0x80:
+        pos += 1
+    return pos
+
+
+def _utf8_end(buf, pos, floor):
+    # Move a cut back so it does not split a character; binary data with no
+    # character start in range keeps the original cut
+    if pos >= len(buf):
+        return pos
+    cut = pos
+    while cut > floor and (buf[cut] & 0xC0) == 0x80:
+        cut -= 1
+    return cut if cut > floor else pos
+
+
+def iter_spans(data, max_bytes=4096, strategy="lines"):
+    """Yield (start, end) byte spans of data for the given boundary strategy."""
+    if max_bytes <= 0:
+        raise ValueError("max_bytes must be positive")
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy: {strategy} (expected one of {', '.join(STRATEGIES)})")
+    buf = data if isinstance(data, memoryview) else memoryview(data)
+    if buf.ndim != 1 or buf.itemsize != 1:
+        buf = buf.cast("B")
+    size = len(buf)
+    if size == 0:
+        return
+
+    if strategy == "lines":
+        yield from _split_lines(buf, 0, size, max_bytes)
+    elif strategy == "markdown":
+        yield from _pack(buf, _markdown_boundaries(buf, 0, size), 0, max_bytes, _split_lines)
+    elif strategy == "python":
+        yield from _pack(buf, _python_boundaries(buf, 0, size), 0, max_bytes, _split_lines)
+    else:
+        yield from _cdc_spans(buf, 0, size, max_bytes)
+
+
+def iter_chunks(data, max_bytes=4096, strategy="lines", overlap=0):
+    """Lazily yield Chunk(start, end, overlap, data) views over data.
+
+    Each chunk's data starts up to `overlap` bytes before its span (snapped
+    forward to a UTF-8 character start) so consecutive chunks share context.
+    No bytes are copied; decode with bytes(chunk.data).decode("utf-8").
+    """
+    if overlap < 0:
+        raise ValueError("overlap must be non-negative")
+    buf = data if isinstance(data, memoryview) else memoryview(data)
+    if buf.ndim != 1 or buf.itemsize != 1:
+        buf = buf.cast("B")
+    for start, end in iter_spans(buf, max_bytes, strategy):
+        view_start = _utf8_start(buf, max(0, start - overlap), start) if overlap else start
+        yield Chunk(start, end, start - view_start, buf[view_start:end])
+
+
+@contextmanager
+def chunk_file(path, max_bytes=4096, strategy=None, overlap=0):
+    """Chunk a file through mmap; the strategy defaults from the file suffix.
+
+    Use as a context manager: with chunk_file(path) as chunks: for chunk in
+    chunks: ... Chunk views stay valid until the block exits; then every view
+    handed out is released and the mapping is closed, so keep bytes(chunk.data)
+    for anything needed afterwards.
+    """
+    path = Path(path)
+    if strategy is None:
+        strategy = {".md": "markdown", ".py": "python"}.get(path.suffix.lower(), "lines")
+    with open(path, "rb") as f:
+        if f.seek(0, 2) == 0:
+            yield iter(())
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            buf = memoryview(mm)
+            views = []
+
+            def chunks():
+                for chunk in iter_chunks(buf, max_bytes, strategy, overlap):
+                    views.append(chunk.data)
+                    yield chunk
+
+            gen = chunks()
+            try:
+                yield gen
+            finally:
+                # Drop the generator's own views first, then every one handed out;
+                # the mmap cannot close while any view of it is alive
+                gen.close()
+                for view in views:
+                    view.release()
+                buf.release()
+
+
+def _sample_corpus(megabytes):
+    rng = random.Random(7)
+    words = [bytes(rng.choice(b"abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 10))) for _ in range(2000)]
+    section = bytearray()
+    for s in range(200):
+        section += b"## Section %d\n\n" % s
+        for _ in range(20):
+            section += b" ".join(rng.choice(words) for _ in range(rng.randint(4, 16))) + b"\n"
+        section += b"\n"
+    reps = max(1, (megabytes * 1024 * 1024) // len(section))
+    return bytes(section) * reps
+
+
+def benchmark(megabytes=256, strategies=("lines", "markdown", "cdc"), max_bytes=4096, overlap=200):
+    """Chunking throughput on a synthetic markdown corpus."""
+    data = _sample_corpus(megabytes)
+    size_mb = len(data) / (1024 * 1024)
+    print(f"[BRIDGE] Chunker benchmark: {size_mb:.0f} MB, max {max_bytes} B, overlap {overlap} B")
+    for strategy in strategies:
+        start = time.perf_counter()
+        count = 0
+        for _ in iter_chunks(data, max_bytes, strategy, overlap):
+            count += 1
+        elapsed = time.perf_counter() - start
+        print(f"  {strategy:<9} {size_mb / elapsed:8.1f} MB/s  {count:,} chunks")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Streaming chunker benchmark")
+    parser.add_argument("--mb", type=int, default=256, help="Corpus size in MB")
+    parser.add_argument("--strategy", default="all", help="lines, markdown, cdc or all")
+    parser.add_argument("--max-bytes", type=int, default=4096)
+    args = parser.parse_args()
+    chosen = ("lines", "markdown", "cdc") if args.strategy == "all" else (args.strategy,)
+    benchmark(args.mb, chosen, args.max_bytes)
@@ -1,57 +1,407 @@
+"""
+Client.py - BRIDGE MCP Client
+Persistent client for the local MCP Server.
+
+MCPClient keeps one server process and session open and multiplexes
+concurrent requests over it by JSON-RPC id: a reader thread routes each
+response to the waiting caller, so many threads (or asyncio tasks) can share
+a single connection. If the server exits, pending calls fail with
+ConnectionError and the next request respawns and re-initializes it;
+idempotent methods are retried on the new connection automatically, and
+Overloaded responses are retried after the server's retryAfterMs. The sync
+and async APIs share one retry policy.
+
+    with MCPClient() as client:
+        tools = client.list_tools()
+        result = client.call_tool("scan_gaps", {"path": "."})
+
+    result = await client.acall_tool("scan_gaps", {"path": "."})
+
+Usage: python Client.py [list | tool:arg[:arg]] [--benchmark N]
+"""
 import sys
 import json
+import time
+import asyncio
+import itertools
+import logging
+import threading
 import subprocess
+from concurrent.futures import Future, TimeoutError as FutureTimeout
 from pathlib import Path
 
-# Simple Client to test local MCP Server connection
+from Framing import FrameReader, FrameWriter, loads
 
 SERVER_SCRIPT = Path(__file__).parent / "Server.py"
+PROTOCOL_VERSION = "2024-11-05"
+DEFAULT_TIMEOUT = 120.0
 
-def run_client(command):
-    # Launch Server
-    process = subprocess.Popen(
-        [sys.executable, str(SERVER_SCRIPT)],
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        text=True
-    )
-    
-    # Send Initialize
-    init_req = {"jsonrpc": "2.0", "method": "initialize", "id": 1}
-    process.stdin.write(json.dumps(init_req) + "\n")
-    process.stdin.flush()
-    print(f"Server Init: {process.stdout.readline().strip()}")
-    
-    # Send Command
+# Safe to resend after a reconnect; tools/call may have side effects
+IDEMPOTENT_METHODS = {"initialize", "tools/list", "resources/list", "resources/read", "heady/health"}
+OVERLOADED = -32001
+
+
+class MCPError(Exception):
+    """A JSON-RPC error response from the server."""
+
+    def __init__(self, code, message, data=None):
+        super().__init__(f"[{code}] {message}")
+        self.code = code
+        self.message = message
+        self.data = data or {}
+
+
+class MCPClient:
+    """Multiplexed, auto-reconnecting JSON-RPC client over one server process."""
+
+    def __init__(self, command=None, cwd=None, env=None, timeout=DEFAULT_TIMEOUT,
+                 reconnect=True, overload_retries=3):
+        self.command = command or [sys.executable, str(SERVER_SCRIPT)]
+        self.cwd = cwd
+        self.env = env
+        self.timeout = timeout
+        self.reconnect = reconnect
+        self.overload_retries = overload_retries
+        self.server_info = None
+        self.connects = 0
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._connect_lock = threading.Lock()
+        self._process = None
+        self._live = None
+        self._writer = None
+        self._closed = False
+
+    # Connection management
+
+    @property
+    def connected(self):
+        # The reader clears _live at EOF, which can precede the exit being reapable
+        process = self._live
+        return process is not None and process.poll() is None
+
+    def connect(self):
+        """Start the server and complete the initialize handshake if not already connected."""
+        if self.connected:
+            return
+        with self._connect_lock:
+            if self._closed:
+                raise ConnectionError("Client is closed")
+            if self.connected:
+                return
+            if self._process is not None:
+                if not self.reconnect:
+                    raise ConnectionError("MCP server exited and reconnect is disabled")
+                old = self._process
+                self._fail_pending(old, ConnectionError("MCP server connection lost"))
+                if old.poll() is None:
+                    old.kill()
+                    old.wait()
+            process = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                       cwd=self.cwd, env=self.env)
+            self._process = self._live = process
+            self._writer = FrameWriter(process.stdin)
+            threading.Thread(target=self._read_loop, args=(process,), name="mcp-client-reader",
+                             daemon=True).start()
+            self.connects += 1
+            try:
+                future = self._send("initialize", {
+                    "protocolVersion": PROTOCOL_VERSION,
+                    "capabilities": {},
+                    "clientInfo": {"name": "HeadyAcademy-Client", "version": "2.0"},
+                })
+                self.server_info = self._result(future, self.timeout)
+                self.notify("notifications/initialized")
+            except BaseException as e:
+                # Never leave a server running that missed the handshake
+                self._fail_pending(process, ConnectionError(f"MCP server initialize failed: {e}"))
+                self._process = self._live = self._writer = None
+                if process.poll() is None:
+                    process.kill()
+                process.wait()
+                raise
+
+    def _read_loop(self, process):
+        reader = FrameReader(process.stdout)
+        try:
+            while True:
+                frame = reader.read_frame()
+                if frame is None:
+                    break
+                try:
+                    msg = loads(frame)
+                except ValueError:
+                    logging.error("MCP client received malformed JSON")
+                    continue
+                if not isinstance(msg, dict) or msg.get("id") is None:
+                    continue
+                with self._lock:
+                    future = self._pending.pop(msg["id"], None)
+                if future is not None and not future.done():
+                    future.set_result(msg)
+        except Exception as e:
+            logging.error(f"MCP client reader error: {e}")
+        finally:
+            self._fail_pending(process, ConnectionError("MCP server connection lost"))
+
+    def _fail_pending(self, process, error):
+        with self._lock:
+            if process is not self._process:
+                return
+            self._live = None
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+    def close(self):
+        """Terminate the server; pending calls fail with ConnectionError."""
+        with self._connect_lock:
+            self._closed = True
+            process = self._process
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+            process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            process.kill()
+            process.wait()
+        self._fail_pending(process, ConnectionError("Client closed"))
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Requests
+
+    def _send(self, method, params=None):
+        request_id = next(self._ids)
+        future = Future()
+        future.request_id = request_id
+        req = {"jsonrpc": "2.0", "id": request_id, "method": method}
+        if params is not None:
+            req["params"] = params
+        with self._lock:
+            self._pending[request_id] = future
+        try:
+            self._writer.write(req)
+        except (OSError, ValueError) as e:
+            with self._lock:
+                self._pending.pop(request_id, None)
+            raise ConnectionError(f"MCP server write failed: {e}")
+        return future
+
+    def _result(self, future, timeout):
+        try:
+            msg = future.result(timeout)
+        except FutureTimeout:
+            self.cancel(future.request_id, "timeout")
+            raise TimeoutError(f"MCP request {future.request_id} timed out after {timeout:g}s")
+        return _unwrap(msg)
+
+    def _retry_delay(self, method, error, retries):
+        """Seconds to wait before resending after error, or None to raise it.
+
+        Shared by request and arequest; retries counts earlier retries by
+        kind and is updated in place. Safe methods get one retry on a fresh
+        connection, and Overloaded responses are retried after the server's
+        retryAfterMs up to overload_retries times.
+        """
+        if isinstance(error, ConnectionError):
+            if retries["connection"] or not self.reconnect or method not in IDEMPOTENT_METHODS:
+                return None
+            retries["connection"] += 1
+            return 0
+        if isinstance(error, MCPError) and error.code == OVERLOADED and retries["overload"] < self.overload_retries:
+            retries["overload"] += 1
+            return error.data.get("retryAfterMs", 1000) / 1000
+        return None
+
+    def submit(self, method, params=None):
+        """Send a request without waiting; returns a Future of the raw response message."""
+        self.connect()
+        return self._send(method, params)
+
+    def request(self, method, params=None, timeout=None):
+        """Send a request and wait for its result; raises MCPError on an error response."""
+        timeout = self.timeout if timeout is None else timeout
+        retries = {"connection": 0, "overload": 0}
+        while True:
+            try:
+                return self._result(self.submit(method, params), timeout)
+            except (ConnectionError, MCPError) as e:
+                delay = self._retry_delay(method, e, retries)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+
+    def notify(self, method, params=None):
+        """Send a notification (no response expected)."""
+        msg = {"jsonrpc": "2.0", "method": method}
+        if params is not None:
+            msg["params"] = params
+        if self._writer is None:
+            self.connect()
+        try:
+            self._writer.write(msg)
+        except (OSError, ValueError) as e:
+            raise ConnectionError(f"MCP server write failed: {e}")
+
+    def cancel(self, request_id, reason="cancelled"):
+        """Ask the server to cancel an in-flight request and stop waiting for it."""
+        with self._lock:
+            future = self._pending.pop(request_id, None)
+        if future is not None and not future.done():
+            future.cancel()
+        try:
+            self.notify("notifications/cancelled", {"requestId": request_id, "reason": reason})
+        except ConnectionError:
+            pass
+
+    def list_tools(self):
+        return self.request("tools/list")["tools"]
+
+    def call_tool(self, name, arguments=None, timeout=None):
+        return self.request("tools/call", {"name": name, "arguments": arguments or {}}, timeout)
+
+    def health(self):
+        return self.request("heady/health")
+
+    # asyncio API - same connection, awaited instead of blocking a thread
+
+    async def arequest(self, method, params=None, timeout=None):
+        """request() for asyncio, with the same reconnect and Overloaded retries."""
+        timeout = self.timeout if timeout is None else timeout
+        retries = {"connection": 0, "overload": 0}
+        while True:
+            try:
+                return await self._aattempt(method, params, timeout)
+            except (ConnectionError, MCPError) as e:
+                delay = self._retry_delay(method, e, retries)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+
+    async def _aattempt(self, method, params, timeout):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.connect)
+        future = self._send(method, params)
+        try:
+            msg = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            self.cancel(future.request_id, "timeout")
+            raise TimeoutError(f"MCP request {future.request_id} timed out after {timeout:g}s")
+        except asyncio.CancelledError:
+            self.cancel(future.request_id)
+            raise
+        return _unwrap(msg)
+
+    async def alist_tools(self):
+        return (await self.arequest("tools/list"))["tools"]
+
+    async def acall_tool(self, name, arguments=None, timeout=None):
+        return await self.arequest("tools/call", {"name": name, "arguments": arguments or {}}, timeout)
+
+    async def ahealth(self):
+        return await self.arequest("heady/health")
+
+
+def _unwrap(msg):
+    """Result of a response message; raises MCPError for an error response."""
+    if "error" in msg:
+        error = msg["error"]
+        if not isinstance(error, dict):
+            error = {"code": -32000, "message": str(error)}
+        raise MCPError(error.get("code"), error.get("message"), error.get("data"))
+    return msg.get("result")
+
+
+def parse_command(command):
+    """CLI command (list, or tool:arg[:arg]) as a (method, params) pair."""
     if command == "list":
-        req = {"jsonrpc": "2.0", "method": "tools/list", "id": 2}
-    else:
-        # Assume command is tool call: scan_gaps:./ or verify_auth:User:ADMIN
-        parts = command.split(":") if ":" in command else [command]
-        tool = parts[0]
-        arguments = {}
-        if tool == "verify_auth":
-            arguments = {
-                "user": parts[1] if len(parts) > 1 else "",
-                "role": parts[2] if len(parts) > 2 else ""
-            }
-        else:
-            arguments = {"path": parts[1] if len(parts) > 1 else "."}
-
-        req = {
-            "jsonrpc": "2.0",
-            "method": "tools/call",
-            "id": 2,
-            "params": {"name": tool, "arguments": arguments}
+        return "tools/list", None
+    # Assume command is tool call: scan_gaps:./ or verify_auth:User:ADMIN
+    parts = command.split(":") if ":" in command else [command]
+    tool = parts[0]
+    if tool == "verify_auth":
+        arguments = {
+            "user": parts[1] if len(parts) > 1 else "",
+            "role": parts[2] if len(parts) > 2 else ""
         }
+    else:
+        arguments = {"path": parts[1] if len(parts) > 1 else "."}
+    return "tools/call", {"name": tool, "arguments": arguments}
+
 
+def one_shot_request(method, params=None):
+    """Previous client path: spawn a server, initialize, send one request, terminate."""
+    process = subprocess.Popen([sys.executable, str(SERVER_SCRIPT)], stdin=subprocess.PIPE,
+                               stdout=subprocess.PIPE, text=True)
+    process.stdin.write(json.dumps({"jsonrpc": "2.0", "method": "initialize", "id": 1}) + "\n")
+    process.stdin.flush()
+    process.stdout.readline()
+    req = {"jsonrpc": "2.0", "method": method, "id": 2}
+    if params is not None:
+        req["params"] = params
     process.stdin.write(json.dumps(req) + "\n")
     process.stdin.flush()
-    
-    # Read Result
-    print(f"Response: {process.stdout.readline().strip()}")
+    response = process.stdout.readline()
     process.terminate()
+    process.wait()
+    return json.loads(response)
+
+
+def run_client(command):
+    with MCPClient() as client:
+        print(f"Server Init: {json.dumps(client.server_info)}")
+        method, params = parse_command(command)
+        try:
+            result = client.request(method, params)
+            print(f"Response: {json.dumps(result)}")
+        except MCPError as e:
+            print(f"Error: {e}")
+
+
+def benchmark(requests=20, command="list"):
+    """Per-request latency of the one-shot path versus a persistent client."""
+    method, params = parse_command(command)
+
+    def percentile(samples, q):
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+    one_shot = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        one_shot_request(method, params)
+        one_shot.append(time.perf_counter() - start)
+
+    persistent = []
+    start = time.perf_counter()
+    with MCPClient() as client:
+        connect_s = time.perf_counter() - start
+        for _ in range(requests):
+            start = time.perf_counter()
+            client.request(method, params)
+            persistent.append(time.perf_counter() - start)
+
+    print(f"[BRIDGE] {command}: {requests} requests")
+    print(f"  one-shot    p50 {percentile(one_shot, 0.5):8.2f} ms   p99 {percentile(one_shot, 0.99):8.2f} ms")
+    print(f"  persistent  p50 {percentile(persistent, 0.5):8.2f} ms   p99 {percentile(persistent, 0.99):8.2f} ms"
+          f"   (connect {connect_s * 1000:.0f} ms, once)")
+
 
 if __name__ == "__main__":
-    cmd = sys.argv[1] if len(sys.argv) > 1 else "list"
-    run_client(cmd)
+    args = sys.argv[1:]
+    if "--benchmark" in args:
+        idx = args.index("--benchmark")
+        count = int(args[idx + 1]) if len(args) > idx + 1 else 20
+        rest = args[:idx] + args[idx + 2:]
+        benchmark(count, rest[0] if rest else "list")
+    else:
+        run_client(args[0] if args else "list")
@@ -0,0 +1,247 @@
+"""
+Framing.py - BRIDGE Transport Layer
+Newline-delimited JSON-RPC framing over binary streams for the MCP Server.
+
+Reads are done in bulk into a reusable buffer and split on newlines through a
+memoryview, so a burst of small requests costs one read() and huge payloads
+never go through text-mode line assembly. Messages larger than the configured
+limit are discarded up to the next newline and reported as oversized.
+
+Run directly to benchmark: python Framing.py [--small N] [--large-mb N]
+"""
+import json
+import time
+import threading
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+DEFAULT_MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+READ_SIZE = 256 * 1024
+_WHITESPACE = b" \t\r"
+
+# JSON codec - orjson when installed, stdlib json otherwise
+if orjson is not None:
+    CODEC = "orjson"
+
+    def loads(data):
+        """Decode a JSON message from bytes/memoryview."""
+        return orjson.loads(data)
+
+    def dumps(obj):
+        """Encode a JSON message to bytes (no trailing newline)."""
+        return orjson.dumps(obj, default=str)
+else:
+    CODEC = "json"
+    _encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=str)
+
+    def loads(data):
+        """Decode a JSON message from bytes/memoryview."""
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+
+    def dumps(obj):
+        """Encode a JSON message to bytes (no trailing newline)."""
+        return _encoder.encode(obj).encode("utf-8")
+
+
+class MessageTooLarge(Exception):
+    """Raised for a frame that exceeded the maximum message size."""
+
+    def __init__(self, size, limit):
+        super().__init__(f"Message of {size} bytes exceeds limit of {limit} bytes")
+        self.size = size
+        self.limit = limit
+
+
+class FrameReader:
+    """Split a binary stream into newline-terminated frames."""
+
+    def __init__(self, stream, max_message_bytes=DEFAULT_MAX_MESSAGE_BYTES, read_size=READ_SIZE):
+        if max_message_bytes <= 0:
+            raise ValueError("max_message_bytes must be positive")
+        self.stream = stream
+        self.max_message_bytes = max_message_bytes
+        self.read_size = read_size
+        self._buf = bytearray()
+        self._pos = 0
+        # No newline lies between _pos and this offset
+        self._scan = 0
+        self._eof = False
+        self._view = None
+        self._read1 = getattr(stream, "read1", None) or stream.read
+
+    def pending(self):
+        """True if a complete frame is already buffered (no read needed)."""
+        return self._find_newline() != -1
+
+    def _find_newline(self):
+        # Only search bytes that arrived since the last unsuccessful scan
+        nl = self._buf.find(b"\n", max(self._pos, self._scan))
+        if nl == -1:
+            self._scan = len(self._buf)
+        return nl
+
+    def _fill(self):
+        # Compact consumed bytes before growing the buffer
+        if self._pos:
+            del self._buf[:self._pos]
+            self._scan = max(0, self._scan - self._pos)
+            self._pos = 0
+        chunk = self._read1(self.read_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf += chunk
+        return True
+
+    def _discard_oversized(self, size):
+        # Drop everything up to and including the next newline
+        while True:
+            nl = self._buf.find(b"\n", self._pos)
+            if nl != -1:
+                size += nl - self._pos
+                self._pos = nl + 1
+                raise MessageTooLarge(size, self.max_message_bytes)
+            size += len(self._buf) - self._pos
+            self._pos = len(self._buf)
+            if not self._fill():
+                raise MessageTooLarge(size, self.max_message_bytes)
+
+    def read_frame(self):
+        """Return the next frame as a memoryview, or None at end of stream.
+
+        The view is only valid until the next call, which releases it so the
+        buffer can be compacted. Blank lines are skipped. Raises
+        MessageTooLarge after discarding an oversized frame.
+        """
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        while True:
+            nl = self._find_newline()
+            if nl == -1:
+                if len(self._buf) - self._pos > self.max_message_bytes:
+                    self._discard_oversized(0)
+                if self._eof or not self._fill():
+                    # Trailing frame without newline
+                    start, end = self._pos, len(self._buf)
+                    self._pos = end
+                    while start < end and self._buf[start] in _WHITESPACE:
+                        start += 1
+                    if start == end:
+                        return None
+                    self._view = memoryview(self._buf)[start:end]
+                    return self._view
+                continue
+
+            start, end = self._pos, nl
+            self._pos = nl + 1
+            if end > start and self._buf[end - 1] == 0x0D:
+                end -= 1
+            if end - start > self.max_message_bytes:
+                raise MessageTooLarge(end - start, self.max_message_bytes)
+            while start < end and self._buf[start] in _WHITESPACE:
+                start += 1
+            if start == end:
+                continue
+            self._view = memoryview(self._buf)[start:end]
+            return self._view
+
+    def __iter__(self):
+        while True:
+            frame = self.read_frame()
+            if frame is None:
+                return
+            yield frame
+
+
+class FrameWriter:
+    """Write newline-terminated JSON frames, flushing only when asked.
+
+    Safe to share between threads; each frame is written atomically.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def write(self, obj, flush=True):
+        """Encode and write one message."""
+        data = dumps(obj) + b"\n"
+        with self._lock:
+            self.stream.write(data)
+            if flush:
+                self.stream.flush()
+
+    def flush(self):
+        with self._lock:
+            self.stream.flush()
+
+
+def _bench_small(count):
+    import io
+    request = dumps({"jsonrpc": "2.0", "method": "tools/list", "id": 1}) + b"\n"
+    data = request * count
+
+    start = time.perf_counter()
+    out = io.BytesIO()
+    writer = FrameWriter(out)
+    reader = FrameReader(io.BytesIO(data))
+    for frame in reader:
+        msg = loads(frame)
+        writer.write({"jsonrpc": "2.0", "id": msg["id"], "result": {}}, flush=not reader.pending())
+    new_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    out = io.StringIO()
+    for line in io.StringIO(data.decode("utf-8")):
+        msg = json.loads(line)
+        out.write(json.dumps({"jsonrpc": "2.0", "id": msg["id"], "result": {}}) + "\n")
+        out.flush()
+    old_elapsed = time.perf_counter() - start
+
+    return count / new_elapsed, count / old_elapsed
+
+
+def _bench_large(megabytes):
+    import io
+    blob = "x" * (1024 * 1024)
+    message = dumps({"jsonrpc": "2.0", "method": "tools/call", "id": 1,
+                     "params": {"name": "auto_doc", "arguments": {"payload": blob}}}) + b"\n"
+    data = message * megabytes
+
+    start = time.perf_counter()
+    for frame in FrameReader(io.BytesIO(data)):
+        loads(frame)
+    new_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for line in io.StringIO(data.decode("utf-8")):
+        json.loads(line)
+    old_elapsed = time.perf_counter() - start
+
+    size_mb = len(data) / (1024 * 1024)
+    return size_mb / new_elapsed, size_mb / old_elapsed
+
+
+def benchmark(small=200000, large_mb=64):
+    """Compare framed binary I/O against the text readline loop."""
+    print(f"[BRIDGE] Framing benchmark (codec: {CODEC})")
+    new_rate, old_rate = _bench_small(small)
+    print(f"  Small requests: {new_rate:,.0f} msg/s framed vs {old_rate:,.0f} msg/s readline ({new_rate / old_rate:.1f}x)")
+    new_rate, old_rate = _bench_large(large_mb)
+    print(f"  Large payloads: {new_rate:,.1f} MB/s framed vs {old_rate:,.1f} MB/s readline ({new_rate / old_rate:.1f}x)")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="MCP framing benchmark")
+    parser.add_argument("--small", type=int, default=200000, help="Number of small requests")
+    parser.add_argument("--large-mb", type=int, default=64, help="Megabytes of 1 MB payload messages")
+    args = parser.parse_args()
+    benchmark(args.small, args.large_mb)
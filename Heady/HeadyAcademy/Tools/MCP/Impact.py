@@ -0,0 +1,378 @@
+"""
+Impact.py - BRIDGE Test Impact Selection
+Change-driven test runner for the MCP auto-run scheduler.
+
+The tree is polled for Python file changes. An import-dependency map (built
+with ast, re-parsed only for files whose mtime changed) links every module to
+the tests that import it directly or transitively, so a change runs only the
+affected test files, split across parallel pytest workers. The full suite
+still runs on a configurable cadence to catch anything the static map misses
+(dynamic imports, data files).
+
+Usage: python Impact.py [root] [--interval 2] [--full-every 3600] [--workers N]
+       python Impact.py [root] --select <changed files...>
+"""
+import os
+import ast
+import sys
+import time
+import shlex
+import logging
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+WATCH_INTERVAL = float(os.environ.get("HEADY_MCP_WATCH_INTERVAL", 2))
+FULL_SUITE_INTERVAL = float(os.environ.get("HEADY_MCP_FULL_SUITE_INTERVAL", 3600))
+TEST_WORKERS = int(os.environ.get("HEADY_MCP_TEST_WORKERS", os.cpu_count() or 1))
+
+SKIP_DIRS = {
+    ".git", ".hg", ".svn", "node_modules", "__pycache__", ".venv", "venv", ".tox", ".nox",
+    ".mypy_cache", ".pytest_cache", ".ruff_cache", "dist", "build",
+}
+# Changes to these reconfigure the whole run, so they trigger the full suite
+CONFIG_FILES = {"pytest.ini", "pyproject.toml", "setup.cfg", "tox.ini", "requirements.txt"}
+
+# pytest exit code when nothing was collected
+NO_TESTS_COLLECTED = 5
+
+
+def is_test_file(path):
+    name = path.name
+    return name.endswith(".py") and (name.startswith("test_") or name.endswith("_test.py"))
+
+
+def scan_tree(root):
+    """Map of watched file -> mtime_ns for Python sources and test config files."""
+    found = {}
+    stack = [str(root)]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in SKIP_DIRS:
+                        stack.append(entry.path)
+                elif entry.name.endswith(".py") or entry.name in CONFIG_FILES:
+                    found[Path(entry.path)] = entry.stat(follow_symlinks=False).st_mtime_ns
+            except OSError:
+                continue
+    return found
+
+
+def imported_names(source, package_parts):
+    """Dotted module names a source file imports (relative imports resolved)."""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return set()
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                base = package_parts[:len(package_parts) - node.level + 1]
+                prefix = ".".join(base + ([node.module] if node.module else []))
+            else:
+                prefix = node.module or ""
+            if prefix:
+                names.add(prefix)
+            # "from pkg import mod" may import a submodule
+            names.update(f"{prefix}.{alias.name}" if prefix else alias.name
+                         for alias in node.names if alias.name != "*")
+    # Importing a.b.c also runs a/__init__.py and a/b/__init__.py
+    for name in list(names):
+        parts = name.split(".")
+        names.update(".".join(parts[:i]) for i in range(1, len(parts)))
+    return names
+
+
+class ImpactMap:
+    """Import-dependency map from source files to the tests that depend on them.
+
+    Updates are incremental: only changed files are re-parsed, and only the
+    edges of changed files (plus importers of a module name that appeared or
+    vanished) are re-resolved.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root).resolve()
+        self.files = {}
+        self._imports = {}
+        self._parsed_mtime = {}
+        self._package_roots = {}
+        self._by_stem = {}
+        # importer -> files its imports resolve to, and the reverse
+        self._targets = {}
+        self._dependents = {}
+        # last component of an imported name -> importers using it
+        self._importers_by_name = {}
+        # Reverse edges of files removed in the last update, for affected_tests
+        self._removed_dependents = {}
+
+    @staticmethod
+    def _stem(path):
+        return path.parent.name if path.name == "__init__.py" else path.stem
+
+    def _package_parts(self, path):
+        # Dotted package of a file, found by walking up through __init__.py
+        parts = []
+        directory = path.parent
+        while directory != self.root and (directory / "__init__.py").exists():
+            parts.insert(0, directory.name)
+            directory = directory.parent
+        return parts
+
+    def _resolve(self, name, importer):
+        """Files a dotted import name may refer to (over-approximated)."""
+        parts = name.split(".")
+        candidates = []
+        # Package-relative to the repo root, the importer's directory, and its package root
+        for base in {self.root, importer.parent, self._package_roots.get(importer, self.root)}:
+            target = base.joinpath(*parts)
+            for path in (target.with_suffix(".py"), target / "__init__.py"):
+                if path in self.files:
+                    candidates.append(path)
+        if not candidates:
+            # Script-style sibling imports: any module with that file name
+            candidates.extend(self._by_stem.get(parts[-1], ()))
+        return candidates
+
+    def _set_imports(self, path, names):
+        for name in self._imports.get(path, ()):
+            importers = self._importers_by_name.get(name.rpartition(".")[2])
+            if importers is not None:
+                importers.discard(path)
+        if names is None:
+            self._imports.pop(path, None)
+            return
+        self._imports[path] = names
+        for name in names:
+            self._importers_by_name.setdefault(name.rpartition(".")[2], set()).add(path)
+
+    def _link(self, importer):
+        """Re-resolve one importer's edges and patch the reverse map."""
+        old = self._targets.pop(importer, set())
+        new = set()
+        if importer in self._imports:
+            for name in self._imports[importer]:
+                new.update(t for t in self._resolve(name, importer) if t != importer)
+            self._targets[importer] = new
+        for target in old - new:
+            dependents = self._dependents.get(target)
+            if dependents is not None:
+                dependents.discard(importer)
+                if not dependents:
+                    del self._dependents[target]
+        for target in new - old:
+            self._dependents.setdefault(target, set()).add(importer)
+
+    def _parse(self, path):
+        try:
+            source = path.read_bytes()
+        except OSError:
+            return False
+        package = self._package_parts(path)
+        self._set_imports(path, imported_names(source, package))
+        self._package_roots[path] = path.parents[len(package)]
+        self._parsed_mtime[path] = self.files[path]
+        return True
+
+    def update(self, files):
+        """Refresh the map for a new {path: mtime_ns} scan; returns changed paths."""
+        removed = self.files.keys() - files.keys()
+        added = files.keys() - self.files.keys()
+        changed = {p for p, m in files.items() if self.files.get(p) != m} | removed
+        self.files = dict(files)
+        self._removed_dependents = {}
+        if not changed:
+            return changed
+
+        for path in added:
+            if path.suffix == ".py":
+                self._by_stem.setdefault(self._stem(path), []).append(path)
+        for path in removed:
+            if path.suffix == ".py":
+                siblings = self._by_stem.get(self._stem(path), [])
+                if path in siblings:
+                    siblings.remove(path)
+
+        # A package appearing or vanishing changes how every file below it resolves
+        packages = [p.parent for p in added | removed if p.name == "__init__.py"]
+        reparse = {p for p in changed - removed if self._parsed_mtime.get(p) != self.files[p]}
+        if packages:
+            reparse.update(p for p in self.files if any(d in p.parents for d in packages))
+        relink = {p for p in reparse if p.suffix == ".py" and self._parse(p)}
+        if packages:
+            relink.update(self._imports)
+
+        for path in removed:
+            # Kept for this round's affected_tests, which still needs to follow them
+            self._removed_dependents[path] = self._dependents.pop(path, set())
+            self._set_imports(path, None)
+            self._parsed_mtime.pop(path, None)
+            self._package_roots.pop(path, None)
+            self._link(path)
+
+        # Importers whose names may now resolve to a different set of files
+        for path in added | removed:
+            if path.suffix == ".py":
+                relink.update(self._importers_by_name.get(self._stem(path), ()))
+        for importer in relink:
+            if importer in self.files:
+                self._link(importer)
+        return changed
+
+    def tests(self):
+        return sorted(p for p in self.files if is_test_file(p))
+
+    def affected_tests(self, changed):
+        """Test files that import a changed file (transitively) or sit under a changed conftest.
+
+        Returns None when a change (test configuration) needs the full suite.
+        """
+        selected = set()
+        seen = set()
+        stack = []
+        for path in changed:
+            if path.name in CONFIG_FILES:
+                return None
+            if path.name == "conftest.py":
+                selected.update(t for t in self.tests() if path.parent in t.parents)
+            stack.append(path)
+        while stack:
+            path = stack.pop()
+            if path in seen:
+                continue
+            seen.add(path)
+            if is_test_file(path) and path in self.files:
+                selected.add(path)
+            stack.extend(self._dependents.get(path, ()))
+            stack.extend(self._removed_dependents.get(path, ()))
+        return sorted(selected)
+
+
+class ImpactRunner:
+    """Poll for changes and run the affected tests in parallel pytest workers."""
+
+    def __init__(self, root=".", command="pytest -q", interval=WATCH_INTERVAL,
+                 full_every=FULL_SUITE_INTERVAL, workers=TEST_WORKERS, on_result=None):
+        if interval <= 0 or workers <= 0:
+            raise ValueError("interval and workers must be positive")
+        self.root = Path(root).resolve()
+        self.command = shlex.split(command)
+        self.interval = interval
+        self.full_every = full_every
+        self.workers = workers
+        self.on_result = on_result
+        self.map = ImpactMap(self.root)
+        self.last_full = 0.0
+        self.runs = 0
+
+    def _run_pytest(self, test_files):
+        cmd = self.command + [str(p) for p in test_files]
+        try:
+            result = subprocess.run(cmd, cwd=self.root, stdout=subprocess.PIPE,
+                                    stderr=subprocess.STDOUT, text=True)
+        except OSError as e:
+            return False, str(e)
+        return result.returncode in (0, NO_TESTS_COLLECTED), result.stdout
+
+    def run_tests(self, test_files=None):
+        """Run the given test files split across workers, or the full suite when None."""
+        start = time.monotonic()
+        if test_files is None:
+            passed, output = self._run_pytest([])
+            outputs = [output]
+            self.last_full = time.monotonic()
+        elif not test_files:
+            passed, outputs = True, []
+        else:
+            # Round-robin shards so large and small test files spread evenly
+            shards = [test_files[i::self.workers] for i in range(min(self.workers, len(test_files)))]
+            with ThreadPoolExecutor(max_workers=len(shards)) as pool:
+                results = list(pool.map(self._run_pytest, shards))
+            passed = all(ok for ok, _ in results)
+            outputs = [out for _, out in results]
+        self.runs += 1
+        return {
+            "full": test_files is None,
+            "tests": None if test_files is None else [str(p.relative_to(self.root)) for p in test_files],
+            "passed": passed,
+            "duration_s": round(time.monotonic() - start, 3),
+            "output": "\n".join(o for o in outputs if o),
+        }
+
+    def poll(self):
+        """One scan: run affected tests (or the full suite when due); None if nothing ran."""
+        changed = self.map.update(scan_tree(self.root))
+        first_scan = self.last_full == 0.0
+        full_due = self.full_every > 0 and time.monotonic() - self.last_full >= self.full_every
+        if first_scan or full_due:
+            result = self.run_tests(None)
+        elif changed:
+            selected = self.map.affected_tests(changed)
+            result = self.run_tests(selected)
+        else:
+            return None
+        result["changed"] = [str(p.relative_to(self.root)) for p in sorted(changed)] if not first_scan else []
+        if self.on_result is not None:
+            try:
+                self.on_result(result)
+            except Exception as e:
+                logging.error(f"Impact result callback failed: {e}")
+        return result
+
+    def run_forever(self):
+        while True:
+            try:
+                self.poll()
+            except Exception as e:
+                logging.error(f"Impact runner error: {e}")
+            time.sleep(self.interval)
+
+
+def _print_result(result):
+    scope = "full suite" if result["full"] else f"{len(result['tests'])} affected test files"
+    status = "passed" if result["passed"] else "FAILED"
+    print(f"[BRIDGE] {scope} {status} in {result['duration_s']:.2f}s ({len(result['changed'])} files changed)")
+    if not result["passed"]:
+        print(result["output"][-4000:])
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Change-driven test runner")
+    parser.add_argument("root", nargs="?", default=".")
+    parser.add_argument("--command", default="pytest -q", help="Base test command; test files are appended")
+    parser.add_argument("--interval", type=float, default=WATCH_INTERVAL, help="Seconds between change scans")
+    parser.add_argument("--full-every", type=float, default=FULL_SUITE_INTERVAL,
+                        help="Seconds between full-suite runs (0 disables)")
+    parser.add_argument("--workers", type=int, default=TEST_WORKERS, help="Parallel pytest processes")
+    parser.add_argument("--select", nargs="+", metavar="PATH",
+                        help="Print the tests selected for these changed files and exit")
+    args = parser.parse_args()
+
+    if args.select:
+        impact = ImpactMap(args.root)
+        impact.update(scan_tree(impact.root))
+        selected = impact.affected_tests({Path(p).resolve() for p in args.select})
+        if selected is None:
+            print("[BRIDGE] full suite required")
+        else:
+            for path in selected:
+                print(path.relative_to(impact.root))
+        sys.exit(0)
+
+    runner = ImpactRunner(args.root, args.command, args.interval, args.full_every, args.workers,
+                          on_result=_print_result)
+    try:
+        runner.run_forever()
+    except KeyboardInterrupt:
+        pass
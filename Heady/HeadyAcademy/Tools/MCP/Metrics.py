@@ -0,0 +1,242 @@
+"""
+Metrics.py - BRIDGE Telemetry
+Live request metrics for the MCP Server, served through the heady/health
+method and exported as a Prometheus text file.
+
+Counters and latency histograms are kept per (method, tool). Gauges such as
+queue depth, worker utilization and cache hit rates are read from callbacks
+at snapshot time, so recording a request stays a few dict updates.
+"""
+import os
+import time
+import logging
+import threading
+from bisect import bisect_left
+from pathlib import Path
+
+# Latency buckets in seconds - sub-ms protocol calls up to multi-minute scans
+LATENCY_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def rss_bytes():
+    """Current resident set size of this process in bytes."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        import resource
+        # Peak rather than current RSS; kilobytes on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+    except ImportError:
+        return 0
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram."""
+
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Upper bucket bound containing quantile q (None if empty)."""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= target:
+                return bound
+        return float("inf")
+
+
+class MetricsRegistry:
+    """Thread-safe request metrics with pluggable gauges and cache stats."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.requests = {}
+        self.errors = {}
+        self.latency = {}
+        self._gauges = {}
+        self._caches = {}
+        self._stop = threading.Event()
+
+    def observe(self, method, tool, seconds, error=False):
+        """Record one handled request."""
+        key = (method, tool or "")
+        with self._lock:
+            self.requests[key] = self.requests.get(key, 0) + 1
+            if error:
+                self.errors[key] = self.errors.get(key, 0) + 1
+            hist = self.latency.get(key)
+            if hist is None:
+                hist = self.latency[key] = Histogram()
+            hist.observe(seconds)
+
+    def register_gauge(self, name, fn, help_text="", label="key"):
+        """Register a callback returning a number (or {label value: number})."""
+        self._gauges[name] = (fn, help_text, label)
+
+    def register_cache(self, name, fn):
+        """Register a callback returning (hits, misses) for a cache."""
+        self._caches[name] = fn
+
+    def _read_gauges(self):
+        values = {}
+        for name, (fn, _, _) in self._gauges.items():
+            try:
+                values[name] = fn()
+            except Exception as e:
+                logging.error(f"Gauge {name} failed: {e}")
+        return values
+
+    def _read_caches(self):
+        values = {}
+        for name, fn in self._caches.items():
+            try:
+                hits, misses = fn()
+            except Exception as e:
+                logging.error(f"Cache stats {name} failed: {e}")
+                continue
+            lookups = hits + misses
+            values[name] = {"hits": hits, "misses": misses,
+                            "hit_rate": round(hits / lookups, 4) if lookups else None}
+        return values
+
+    def snapshot(self):
+        """JSON-friendly view of every metric."""
+        with self._lock:
+            methods = []
+            for (method, tool), count in sorted(self.requests.items()):
+                hist = self.latency[(method, tool)]
+                methods.append({
+                    "method": method,
+                    "tool": tool or None,
+                    "requests": count,
+                    "errors": self.errors.get((method, tool), 0),
+                    "latency_mean_s": round(hist.total / hist.count, 6),
+                    "latency_p50_s": hist.quantile(0.5),
+                    "latency_p99_s": hist.quantile(0.99),
+                })
+        return {
+            "uptime_s": round(time.time() - self.started, 1),
+            "rss_bytes": rss_bytes(),
+            "requests": methods,
+            "gauges": self._read_gauges(),
+            "caches": self._read_caches(),
+        }
+
+    def render_prometheus(self, prefix="heady_mcp"):
+        """Prometheus text exposition format."""
+        lines = []
+
+        def labels(**kv):
+            inner = ",".join(f'{k}="{str(v).replace(chr(34), chr(39))}"' for k, v in kv.items() if v != "")
+            return "{" + inner + "}" if inner else ""
+
+        with self._lock:
+            requests = dict(self.requests)
+            errors = dict(self.errors)
+            latency = {k: (list(h.counts), h.total, h.count) for k, h in self.latency.items()}
+
+        lines.append(f"# HELP {prefix}_requests_total Requests handled by method and tool")
+        lines.append(f"# TYPE {prefix}_requests_total counter")
+        for (method, tool), n in sorted(requests.items()):
+            lines.append(f"{prefix}_requests_total{labels(method=method, tool=tool)} {n}")
+
+        lines.append(f"# HELP {prefix}_request_errors_total Requests answered with an error")
+        lines.append(f"# TYPE {prefix}_request_errors_total counter")
+        for (method, tool), n in sorted(errors.items()):
+            lines.append(f"{prefix}_request_errors_total{labels(method=method, tool=tool)} {n}")
+
+        lines.append(f"# HELP {prefix}_request_duration_seconds Request latency")
+        lines.append(f"# TYPE {prefix}_request_duration_seconds histogram")
+        for (method, tool), (counts, total, count) in sorted(latency.items()):
+            cumulative = 0
+            for bound, n in zip(LATENCY_BUCKETS, counts):
+                cumulative += n
+                lines.append(f"{prefix}_request_duration_seconds_bucket{labels(method=method, tool=tool, le=bound)} {cumulative}")
+            lines.append(f"{prefix}_request_duration_seconds_bucket{labels(method=method, tool=tool, le='+Inf')} {count}")
+            lines.append(f"{prefix}_request_duration_seconds_sum{labels(method=method, tool=tool)} {total:.6f}")
+            lines.append(f"{prefix}_request_duration_seconds_count{labels(method=method, tool=tool)} {count}")
+
+        for name, value in self._read_gauges().items():
+            _, help_text, label_name = self._gauges[name]
+            lines.append(f"# HELP {prefix}_{name} {help_text}".rstrip())
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            if isinstance(value, dict):
+                for label, v in sorted(value.items()):
+                    lines.append(f"{prefix}_{name}{labels(**{label_name: label})} {v}")
+            else:
+                lines.append(f"{prefix}_{name} {value}")
+
+        caches = self._read_caches()
+        if caches:
+            lines.append(f"# TYPE {prefix}_cache_hits_total counter")
+            lines.append(f"# TYPE {prefix}_cache_misses_total counter")
+            for name, stats in sorted(caches.items()):
+                lines.append(f"{prefix}_cache_hits_total{labels(cache=name)} {stats['hits']}")
+                lines.append(f"{prefix}_cache_misses_total{labels(cache=name)} {stats['misses']}")
+
+        lines.append(f"# TYPE {prefix}_resident_memory_bytes gauge")
+        lines.append(f"{prefix}_resident_memory_bytes {rss_bytes()}")
+        lines.append(f"# TYPE {prefix}_uptime_seconds gauge")
+        lines.append(f"{prefix}_uptime_seconds {time.time() - self.started:.1f}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Atomically write the Prometheus text file (for node_exporter's textfile collector)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp, path)
+
+    def start_exporter(self, path, interval=15.0):
+        """Rewrite the Prometheus file every interval seconds in a daemon thread."""
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.is_set():
+                try:
+                    self.write_prometheus(path)
+                except OSError as e:
+                    logging.error(f"Metrics export failed: {e}")
+                self._stop.wait(interval)
+
+        thread = threading.Thread(target=loop, name="mcp-metrics", daemon=True)
+        thread.start()
+        return thread
+
+    def stop_exporter(self, thread, path):
+        """Stop an exporter thread and remove its file, so a stopped process leaves no stale series."""
+        self._stop.set()
+        thread.join(timeout=5)
+        try:
+            Path(path).unlink()
+        except OSError:
+            pass
+
+
+METRICS = MetricsRegistry()
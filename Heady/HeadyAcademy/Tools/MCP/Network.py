@@ -0,0 +1,362 @@
+"""
+Network.py - BRIDGE Network Transport
+Serves the MCP Server's handle_request core over WebSocket and streamable HTTP.
+
+One process serves every client, so tool workers, caches and the thread pool
+are shared across connections instead of being paid for per client process.
+Connections are authenticated through MCPAuthManager:
+
+- WebSocket: the first message is the auth payload handled by
+  MCPAuthManager.authenticate_websocket; JSON-RPC frames follow.
+- HTTP: POST /mcp with a JSON-RPC message (or batch) and either an
+  Mcp-Session-Id header, an Authorization: Bearer token, or the
+  X-API-Key / X-Timestamp / X-Client-Id signature headers.
+- GET /health and GET /metrics take the same credentials; only loopback
+  peers may read them without.
+
+An HTTP client that disconnects while its request is running has that
+request's tool calls cancelled, as a closed WebSocket does.
+
+Usage: python Network.py --server heady_bridge [--host 127.0.0.1] [--ws-port 8080] [--http-port 9080]
+"""
+import sys
+import asyncio
+import ipaddress
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from Framing import MessageTooLarge, dumps, loads
+from Metrics import METRICS
+from Server import (MAX_MESSAGE_BYTES, _calls, abandon_admitted, admit_call, handle_admitted,
+                    handle_request, health_check, set_worker_capacity, start_metrics_exporter,
+                    start_worker_pool, stop_metrics_exporter, stop_worker_pool)
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+SECURITY_DIR = Path(__file__).parent.parent / "Security"
+DEFAULT_WORKERS = int(os.environ.get("HEADY_MCP_WORKERS", min(32, (os.cpu_count() or 1) + 4)))
+# Separate threads for credential checks, so they never wait behind tool calls
+AUTH_WORKERS = int(os.environ.get("HEADY_MCP_AUTH_WORKERS", 4))
+MAX_HEADER_BYTES = 16 * 1024
+# How often a running HTTP request checks whether its client has gone away
+DISCONNECT_POLL = 0.1
+
+HTTP_REASONS = {
+    200: "OK", 202: "Accepted", 400: "Bad Request", 401: "Unauthorized",
+    404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+}
+
+
+def load_auth_manager():
+    """Import and construct the shared MCPAuthManager (Security/MCP_Auth.py)."""
+    if str(SECURITY_DIR) not in sys.path:
+        sys.path.append(str(SECURITY_DIR))
+    from MCP_Auth import MCPAuthManager
+    return MCPAuthManager()
+
+
+class NetworkServer:
+    """Asyncio WebSocket + HTTP front end for a single MCP server process."""
+
+    def __init__(self, server_name, auth=None, host="127.0.0.1", ws_port=None, http_port=None,
+                 max_workers=DEFAULT_WORKERS, max_message_bytes=MAX_MESSAGE_BYTES):
+        self.auth = auth if auth is not None else load_auth_manager()
+        if server_name not in self.auth.config.get("servers", {}):
+            raise ValueError(f"Unknown server: {server_name}")
+        server_config = self.auth.config["servers"][server_name]
+
+        self.server_name = server_name
+        self.host = host
+        self.ws_port = ws_port if ws_port is not None else server_config.get("port", 8080)
+        self.http_port = http_port if http_port is not None else self.ws_port + 1000
+        self.max_message_bytes = max_message_bytes
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mcp-worker")
+        self.auth_executor = ThreadPoolExecutor(max_workers=AUTH_WORKERS, thread_name_prefix="mcp-auth")
+        self.connections = 0
+        self._servers = []
+
+    async def _dispatch(self, req, scope):
+        # Tool calls block on subprocesses - keep them off the event loop
+        if isinstance(req, dict):
+            method = req.get("method")
+            if method == "tools/call":
+                # Accepted here, so it is cancellable and counted while it waits for a thread
+                ctx, rejected = admit_call(req, scope)
+                if rejected:
+                    return rejected
+                future = self.executor.submit(handle_admitted, req, ctx, scope)
+                future.add_done_callback(lambda f: f.cancelled() and abandon_admitted(req, scope))
+                return await asyncio.wrap_future(future)
+            if method == "notifications/cancelled":
+                # Never queued behind the calls it is meant to stop
+                return handle_request(req, scope)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, handle_request, req, scope)
+
+    async def _dispatch_payload(self, payload, scope):
+        """Handle a single message or a JSON-RPC batch; None if nothing to send."""
+        if isinstance(payload, list):
+            responses = await asyncio.gather(*(self._dispatch(r, scope) for r in payload))
+            responses = [r for r, req in zip(responses, payload)
+                         if r and isinstance(req, dict) and "id" in req]
+            return responses or None
+        if not isinstance(payload, dict):
+            return {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "Invalid Request"}}
+        res = await self._dispatch(payload, scope)
+        return res if "id" in payload else None
+
+    async def _run_auth(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.auth_executor, func, *args)
+
+    # WebSocket transport
+
+    async def _ws_handler(self, websocket, path=None):
+        session_id = await self.auth.authenticate_websocket(websocket, self.server_name)
+        if not session_id:
+            await websocket.close(code=4401, reason="Unauthorized")
+            return
+
+        self.connections += 1
+        send_lock = asyncio.Lock()
+        pending = set()
+
+        async def respond(payload):
+            res = await self._dispatch_payload(payload, session_id)
+            if res is not None:
+                async with send_lock:
+                    await websocket.send(dumps(res).decode("utf-8"))
+
+        try:
+            async for message in websocket:
+                try:
+                    payload = loads(message.encode("utf-8") if isinstance(message, str) else message)
+                except ValueError:
+                    async with send_lock:
+                        await websocket.send(dumps({"jsonrpc": "2.0", "id": None,
+                                                    "error": {"code": -32700, "message": "Parse error"}}).decode("utf-8"))
+                    continue
+                # Requests on one connection run concurrently; replies carry their ids
+                task = asyncio.ensure_future(respond(payload))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+        except Exception as e:
+            logging.error(f"WebSocket connection error: {e}")
+        finally:
+            for task in pending:
+                task.cancel()
+            # Abandoned calls are killed rather than left to run to their timeout
+            _calls.cancel_scope(session_id)
+            self.connections -= 1
+            try:
+                await self._run_auth(self.auth.revoke_session, session_id)
+            except Exception as e:
+                logging.error(f"Failed to revoke session {session_id}: {e}")
+
+    # HTTP transport
+
+    async def _authenticate_http(self, headers, source=None):
+        session_id = headers.get("mcp-session-id")
+        if session_id:
+            session = await self._run_auth(self.auth.validate_client_session, session_id)
+            return bool(session) and session.get("server") == self.server_name
+
+        auth_header = headers.get("authorization", "")
+        if auth_header.startswith("Bearer "):
+            auth_data = {"token": auth_header[7:]}
+        elif "x-api-key" in headers:
+            auth_data = {
+                "signature": headers.get("x-api-key"),
+                "timestamp": headers.get("x-timestamp"),
+                "client_id": headers.get("x-client-id"),
+            }
+        else:
+            return False
+        # Per-source throttling and lockouts, as for WebSocket handshakes
+        return await self._run_auth(self.auth.validate_server_connection, self.server_name, auth_data, source)
+
+    @staticmethod
+    def _is_loopback(peer):
+        try:
+            return ipaddress.ip_address(peer[0]).is_loopback
+        except (TypeError, IndexError, ValueError):
+            return False
+
+    async def _write_http(self, writer, status, body=None, keep_alive=True):
+        data = dumps(body) if body is not None else b""
+        head = [
+            f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}",
+            f"Content-Length: {len(data)}",
+            "Connection: keep-alive" if keep_alive else "Connection: close",
+        ]
+        if body is not None:
+            head.append("Content-Type: application/json")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + data)
+        await writer.drain()
+
+    async def _read_http_request(self, reader):
+        try:
+            raw = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.LimitOverrunError:
+            raise MessageTooLarge(MAX_HEADER_BYTES, MAX_HEADER_BYTES)
+        lines = raw.decode("latin-1").split("\r\n")
+        method, target, version = lines[0].split(" ", 2)
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", 0))
+        if length > self.max_message_bytes:
+            raise MessageTooLarge(length, self.max_message_bytes)
+        body = await reader.readexactly(length) if length else b""
+        return method, target, version, headers, body
+
+    async def _dispatch_watched(self, payload, scope, reader):
+        """Dispatch an HTTP request; if the client disconnects first, cancel its calls.
+
+        Returns (response, disconnected).
+        """
+        dispatch = asyncio.ensure_future(self._dispatch_payload(payload, scope))
+        while not dispatch.done():
+            if reader.at_eof():
+                requests = payload if isinstance(payload, list) else [payload]
+                for req in requests:
+                    if isinstance(req, dict) and req.get("method") == "tools/call":
+                        _calls.cancel(req.get("id"), scope)
+                return None, True
+            await asyncio.wait({dispatch}, timeout=DISCONNECT_POLL)
+        return dispatch.result(), False
+
+    async def _http_handler(self, reader, writer):
+        self.connections += 1
+        connection_scope = ("http", id(writer))
+        peer = writer.get_extra_info("peername")
+        source = peer[0] if isinstance(peer, (tuple, list)) and peer else None
+        local = self._is_loopback(peer)
+        try:
+            while True:
+                try:
+                    method, target, version, headers, body = await self._read_http_request(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except MessageTooLarge as e:
+                    await self._write_http(writer, 413, {"error": str(e)}, keep_alive=False)
+                    break
+                except ValueError:
+                    await self._write_http(writer, 400, {"error": "Malformed request"}, keep_alive=False)
+                    break
+
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                path = target.split("?", 1)[0]
+
+                if path in ("/health", "/metrics") and method == "GET" and not (
+                        local or await self._authenticate_http(headers, source)):
+                    await self._write_http(writer, 401, {"error": "Invalid authentication"}, keep_alive)
+                elif path == "/health" and method == "GET":
+                    await self._write_http(writer, 200, health_check(), keep_alive)
+                elif path == "/metrics" and method == "GET":
+                    data = METRICS.render_prometheus().encode("utf-8")
+                    writer.write((f"HTTP/1.1 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                                  f"Content-Length: {len(data)}\r\n\r\n").encode("latin-1") + data)
+                    await writer.drain()
+                elif path != "/mcp":
+                    await self._write_http(writer, 404, {"error": "Not found"}, keep_alive)
+                elif method != "POST":
+                    await self._write_http(writer, 405, {"error": "Use POST"}, keep_alive)
+                elif not await self._authenticate_http(headers, source):
+                    await self._write_http(writer, 401, {"error": "Invalid authentication"}, keep_alive)
+                else:
+                    try:
+                        payload = loads(body)
+                    except ValueError:
+                        await self._write_http(writer, 400, {"jsonrpc": "2.0", "id": None,
+                                                             "error": {"code": -32700, "message": "Parse error"}}, keep_alive)
+                    else:
+                        scope = headers.get("mcp-session-id") or connection_scope
+                        res, disconnected = await self._dispatch_watched(payload, scope, reader)
+                        if disconnected:
+                            break
+                        if res is None:
+                            await self._write_http(writer, 202, None, keep_alive)
+                        else:
+                            await self._write_http(writer, 200, res, keep_alive)
+
+                if not keep_alive:
+                    break
+        except Exception as e:
+            logging.error(f"HTTP connection error: {e}")
+        finally:
+            _calls.cancel_scope(connection_scope)
+            self.connections -= 1
+            writer.close()
+
+    # Lifecycle
+
+    async def start(self):
+        """Bind the HTTP and (if available) WebSocket listeners."""
+        set_worker_capacity(self.executor._max_workers)
+        start_metrics_exporter()
+        start_worker_pool()
+        http_server = await asyncio.start_server(self._http_handler, self.host, self.http_port,
+                                                 limit=MAX_HEADER_BYTES)
+        self.http_port = http_server.sockets[0].getsockname()[1]
+        self._servers.append(http_server)
+
+        if websockets is None:
+            logging.warning("websockets not installed - WebSocket transport disabled")
+        else:
+            ws_server = await websockets.serve(self._ws_handler, self.host, self.ws_port,
+                                               max_size=self.max_message_bytes)
+            self.ws_port = next(iter(ws_server.sockets)).getsockname()[1]
+            self._servers.append(ws_server)
+
+    async def close(self):
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        self._servers = []
+        self.executor.shutdown(wait=False)
+        self.auth_executor.shutdown(wait=False)
+        stop_worker_pool()
+        stop_metrics_exporter()
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"[BRIDGE] MCP network transport for {self.server_name}")
+        print(f"  HTTP:      http://{self.host}:{self.http_port}/mcp")
+        if websockets is not None:
+            print(f"  WebSocket: ws://{self.host}:{self.ws_port}")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await self.close()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="HeadyAcademy MCP network transport")
+    parser.add_argument("--server", default="heady_bridge", help="Server name from the MCP auth config")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--ws-port", type=int, help="WebSocket port (default: configured server port)")
+    parser.add_argument("--http-port", type=int, help="HTTP port (default: WebSocket port + 1000)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Shared tool worker threads")
+    args = parser.parse_args()
+
+    server = NetworkServer(args.server, host=args.host, ws_port=args.ws_port,
+                           http_port=args.http_port, max_workers=args.workers)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
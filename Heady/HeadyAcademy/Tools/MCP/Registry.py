@@ -0,0 +1,220 @@
+"""
+Registry.py - BRIDGE Tool Registry
+Discovers MCP tools from declarations in the tool scripts themselves.
+
+A tool script declares everything the server needs in one module-level
+literal, next to the code it describes:
+
+    MCP_TOOL = {
+        "name": "scan_gaps",
+        "description": "Scan repo for missing docs/tests",
+        "arguments": {"path": {"type": "string", "description": "Directory to scan", "default": "."}},
+        "argv": ["{path}"],
+    }
+
+"arguments" become the tool's JSON input schema (add "required": [...] for
+mandatory ones). "argv" is the script's command line: "{name}" is replaced
+by the argument value (or its default), and {"if": "name", "argv": [...]}
+adds a group only when that argument is set. Literal "-x" items and "if"
+groups are options; every other item is positional and is passed after a
+"--" separator, which the scripts' argparse parsers read as the end of
+options. Optional keys: "coalesce", "timeout", "max_concurrency", and
+"structured" for tools whose last output line is a JSON result object (sent
+to clients as structuredContent). A script may declare a list of tools.
+
+Declarations are read with ast.literal_eval, never by importing the script,
+and collected into a manifest cached under Logs/MCP_Manifest. Loading checks
+only file mtimes and sizes, so tools/list is served without importing or
+re-parsing any tool; a tool module is first imported when the tool is called.
+
+Usage: python Registry.py [--rebuild]
+"""
+import os
+import ast
+import json
+import logging
+from pathlib import Path
+
+TOOLS_DIR = Path(__file__).parent.parent
+MANIFEST_FILE = Path(os.environ.get(
+    "HEADY_MCP_MANIFEST", TOOLS_DIR.parent / "Logs" / "MCP_Manifest" / "tools.json"))
+# Bump when make_entry output changes so cached manifests are rebuilt
+MANIFEST_VERSION = 2
+DECLARATION = "MCP_TOOL"
+OPTIONAL_KEYS = ("coalesce", "timeout", "max_concurrency", "structured")
+
+
+class ToolArgumentError(ValueError):
+    """Tool arguments that cannot be turned into a command line."""
+
+
+def _script_stats(tools_dir):
+    # Top-level scripts only; tool scripts are run as Tools/<script>
+    stats = {}
+    for entry in os.scandir(tools_dir):
+        if entry.name.endswith(".py") and entry.is_file():
+            st = entry.stat()
+            stats[entry.name] = [st.st_mtime_ns, st.st_size]
+    return stats
+
+
+def read_declarations(path):
+    """MCP_TOOL entries declared in a script, without importing it."""
+    source = Path(path).read_bytes()
+    if DECLARATION.encode() not in source:
+        return []
+    try:
+        tree = ast.parse(source, str(path))
+    except (SyntaxError, ValueError) as e:
+        logging.error(f"Cannot parse {path} for tool declarations: {e}")
+        return []
+    for node in tree.body:
+        if (isinstance(node, ast.Assign) and len(node.targets) == 1
+                and isinstance(node.targets[0], ast.Name) and node.targets[0].id == DECLARATION):
+            try:
+                value = ast.literal_eval(node.value)
+            except ValueError:
+                logging.error(f"{path}: {DECLARATION} must be a literal")
+                return []
+            return value if isinstance(value, list) else [value]
+    return []
+
+
+def make_entry(declaration, script):
+    """Registry entry for one declaration; raises ValueError if it is malformed."""
+    if not isinstance(declaration, dict) or not declaration.get("name") or not declaration.get("description"):
+        raise ValueError("a tool needs a name and a description")
+    arguments = declaration.get("arguments", {})
+    required = declaration.get("required", [])
+    unknown = set(required) - set(arguments)
+    if unknown:
+        raise ValueError(f"required arguments not declared: {sorted(unknown)}")
+    entry = {
+        "script": script,
+        "description": declaration["description"],
+        "inputSchema": {"type": "object", "properties": arguments},
+        "argv": declaration.get("argv", []),
+    }
+    if required:
+        entry["inputSchema"]["required"] = list(required)
+    for key in OPTIONAL_KEYS:
+        if key in declaration:
+            entry[key] = declaration[key]
+    return entry
+
+
+def build_manifest(tools_dir=TOOLS_DIR, previous=None):
+    """Manifest of every declared tool; scripts unchanged since previous are not re-read."""
+    tools_dir = Path(tools_dir)
+    stats = _script_stats(tools_dir)
+    previous = previous or {}
+    old_files = previous.get("files", {})
+    old_tools = previous.get("tools", {})
+    tools = {}
+    for script in sorted(stats):
+        if old_files.get(script) == stats[script]:
+            tools.update((n, e) for n, e in old_tools.items() if e["script"] == script)
+            continue
+        try:
+            declarations = read_declarations(tools_dir / script)
+        except OSError as e:
+            logging.error(f"Cannot read {script}: {e}")
+            continue
+        for declaration in declarations:
+            try:
+                entry = make_entry(declaration, script)
+            except ValueError as e:
+                logging.error(f"Ignoring tool declared in {script}: {e}")
+                continue
+            name = declaration["name"]
+            if name in tools:
+                logging.error(f"Tool '{name}' declared by both {tools[name]['script']} and {script}")
+                continue
+            tools[name] = entry
+    return {"version": MANIFEST_VERSION, "files": stats, "tools": tools}
+
+
+def load_manifest(tools_dir=TOOLS_DIR, manifest_file=MANIFEST_FILE, rebuild=False):
+    """Cached manifest, refreshed for scripts added, removed or changed since it was written."""
+    cached = None
+    if not rebuild:
+        try:
+            cached = json.loads(Path(manifest_file).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            cached = None
+        if cached and cached.get("version") == MANIFEST_VERSION:
+            if cached.get("files") == _script_stats(tools_dir):
+                return cached
+        else:
+            cached = None
+
+    manifest = build_manifest(tools_dir, cached)
+    try:
+        path = Path(manifest_file)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(manifest, indent=1, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError as e:
+        # Read-only checkout: still serve the freshly built manifest
+        logging.error(f"Cannot write tool manifest {manifest_file}: {e}")
+    return manifest
+
+
+def load_registry(tools_dir=TOOLS_DIR, manifest_file=MANIFEST_FILE):
+    """TOOL_REGISTRY mapping of tool name -> entry, in name order."""
+    tools = load_manifest(tools_dir, manifest_file)["tools"]
+    return {name: dict(tools[name]) for name in sorted(tools)}
+
+
+def _expand(template, values):
+    if template.startswith("{") and template.endswith("}"):
+        value = values.get(template[1:-1])
+        return None if value is None else str(value)
+    return template
+
+
+def build_argv(tool_name, tool_info, arguments):
+    """Command-line arguments for a call; raises ToolArgumentError for bad arguments."""
+    schema = tool_info.get("inputSchema", {})
+    properties = schema.get("properties", {})
+    values = {}
+    for name, prop in properties.items():
+        value = arguments.get(name)
+        if value is None:
+            value = prop.get("default")
+        if value is not None and prop.get("type") == "integer":
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                raise ToolArgumentError(f"Argument '{name}' must be an integer")
+        values[name] = value
+    for name in schema.get("required", ()):
+        if values.get(name) in (None, ""):
+            raise ToolArgumentError(f"Argument '{name}' is required for {tool_name}")
+
+    # Options first, then "--" so a value such as "--report" stays positional
+    options, positional = [], []
+    for item in tool_info.get("argv", ()):
+        if isinstance(item, dict):
+            if values.get(item.get("if")):
+                options.extend(a for a in (_expand(t, values) for t in item.get("argv", ())) if a is not None)
+            continue
+        if item == "--":
+            continue
+        if item.startswith("-"):
+            options.append(item)
+            continue
+        expanded = _expand(item, values)
+        if expanded is not None:
+            positional.append(expanded)
+    return options + ["--"] + positional if positional else options
+
+
+if __name__ == "__main__":
+    import sys
+
+    manifest = load_manifest(rebuild="--rebuild" in sys.argv[1:])
+    print(f"[BRIDGE] {len(manifest['tools'])} tools in {MANIFEST_FILE}")
+    for name, entry in sorted(manifest["tools"].items()):
+        print(f"  {name:<18} {entry['script']:<22} {entry['description']}")
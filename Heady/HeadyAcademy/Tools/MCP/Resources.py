@@ -0,0 +1,197 @@
+"""
+Resources.py - BRIDGE Report Resources
+Backs the MCP resources/list and resources/read methods with an index of the
+reports the tools generate (Logs/*_Reports, Content_Forge, Research).
+
+Only the report directories in REPORT_DIRS are exposed, each without its
+subdirectories; dotfiles and symlinks are skipped. Content_Forge/Encrypted
+(obfuscated copies of arbitrary files) is deliberately not one of them.
+
+Reads are served from an mmap of the file in byte ranges, so a client can page
+through a very large audit report with cursors while the server only touches
+the pages it sends.
+"""
+import base64
+import mmap
+import mimetypes
+import threading
+from pathlib import Path
+
+ACADEMY_DIR = Path(__file__).resolve().parent.parent.parent
+URI_SCHEME = "heady://"
+DEFAULT_PAGE_SIZE = 100
+DEFAULT_READ_BYTES = 1024 * 1024
+MAX_READ_BYTES = 8 * 1024 * 1024
+
+TEXT_SUFFIXES = {".md", ".txt", ".json", ".jsonl", ".log", ".yaml", ".yml", ".csv", ".html", ".py"}
+# Tool output directories exposed as resources, besides Logs/*_Reports
+REPORT_DIRS = ("Content_Forge", "Content_Forge/Docs", "Content_Forge/Ideas",
+               "Content_Forge/Visualizations", "Research")
+
+
+def report_roots(base=ACADEMY_DIR):
+    """Directories whose files (not subdirectories) are exposed as resources."""
+    roots = sorted((base / "Logs").glob("*_Reports"))
+    roots += [base / d for d in REPORT_DIRS]
+    return [r for r in roots if r.is_dir()]
+
+
+class ResourceNotFound(Exception):
+    """Raised for a URI that is not in the index."""
+
+
+class ResourceIndex:
+    """Index of generated artifacts, refreshed when a watched directory changes."""
+
+    def __init__(self, base=ACADEMY_DIR):
+        self.base = Path(base)
+        self._lock = threading.Lock()
+        self._entries = []
+        self._by_uri = {}
+        self._dir_mtimes = {}
+        # Lookups served by the current index vs. ones that rebuilt it
+        self.hits = 0
+        self.misses = 0
+
+    def _stale(self):
+        if not self._dir_mtimes:
+            return True
+        roots = set(report_roots(self.base))
+        if not roots.issubset(self._dir_mtimes):
+            return True
+        for directory, mtime in self._dir_mtimes.items():
+            try:
+                if directory.stat().st_mtime_ns != mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def refresh(self, force=False):
+        """Rebuild the index if any watched directory was modified."""
+        with self._lock:
+            if not force and not self._stale():
+                self.hits += 1
+                return
+            self.misses += 1
+            entries = []
+            dir_mtimes = {}
+            for root in report_roots(self.base):
+                try:
+                    dir_mtimes[root] = root.stat().st_mtime_ns
+                    paths = list(root.iterdir())
+                except OSError:
+                    continue
+                for path in paths:
+                    # A link could point anywhere on disk
+                    if path.name.startswith(".") or path.is_symlink():
+                        continue
+                    try:
+                        st = path.stat()
+                    except OSError:
+                        continue
+                    if not path.is_file():
+                        continue
+                    rel = path.relative_to(self.base).as_posix()
+                    entries.append({
+                        "uri": URI_SCHEME + rel,
+                        "name": path.name,
+                        "mimeType": mime_type(path),
+                        "size": st.st_size,
+                        "_path": path,
+                        "_mtime": st.st_mtime,
+                    })
+            # Newest reports first
+            entries.sort(key=lambda e: e["_mtime"], reverse=True)
+            self._entries = entries
+            self._by_uri = {e["uri"]: e for e in entries}
+            self._dir_mtimes = dir_mtimes
+
+    def list(self, cursor=None, limit=DEFAULT_PAGE_SIZE):
+        """One page of resources plus the cursor for the next page."""
+        self.refresh()
+        start = parse_cursor(cursor) if cursor else 0
+        page = self._entries[start:start + limit]
+        result = {"resources": [{k: v for k, v in e.items() if not k.startswith("_")} for e in page]}
+        if start + limit < len(self._entries):
+            result["nextCursor"] = str(start + limit)
+        return result
+
+    def resolve(self, uri):
+        self.refresh()
+        entry = self._by_uri.get(uri)
+        if entry is None:
+            # The index may be older than a report written this instant
+            self.refresh(force=True)
+            entry = self._by_uri.get(uri)
+        if entry is None:
+            raise ResourceNotFound(f"Unknown resource: {uri}")
+        return entry
+
+    def read(self, uri, offset=0, length=None, cursor=None):
+        """Read a byte range of a resource via mmap.
+
+        cursor (from a previous read's nextCursor) overrides offset. Text
+        ranges are trimmed back to a UTF-8 character boundary so every page
+        decodes cleanly; the next page starts where this one stopped. Raises
+        ValueError for a malformed cursor, offset or length.
+        """
+        if cursor:
+            offset = parse_cursor(cursor)
+        for name, value in (("offset", offset), ("length", length)):
+            if value is not None and (isinstance(value, bool) or not isinstance(value, int)):
+                raise ValueError(f"{name} must be an integer")
+        offset = offset or 0
+        length = min(length or DEFAULT_READ_BYTES, MAX_READ_BYTES)
+        if offset < 0 or length <= 0:
+            raise ValueError("offset must be >= 0 and length > 0")
+        entry = self.resolve(uri)
+
+        is_text = entry["mimeType"].startswith("text/") or entry["mimeType"] == "application/json"
+        with open(entry["_path"], "rb") as f:
+            size = f.seek(0, 2)
+            if size == 0 or offset >= size:
+                data, end = b"", min(offset, size)
+            else:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    end = min(offset + length, size)
+                    if is_text:
+                        end = utf8_boundary(mm, offset, end, size)
+                    data = mm[offset:end]
+
+        content = {"uri": uri, "mimeType": entry["mimeType"]}
+        if is_text:
+            content["text"] = data.decode("utf-8", errors="replace")
+        else:
+            content["blob"] = base64.b64encode(data).decode("ascii")
+        result = {"contents": [content], "range": {"offset": offset, "length": end - offset, "total": size}}
+        if end < size:
+            result["nextCursor"] = str(end)
+        return result
+
+
+def parse_cursor(cursor):
+    """Position encoded in a nextCursor; ValueError unless it is a non-negative integer."""
+    if isinstance(cursor, str) and cursor.isascii() and cursor.isdigit():
+        return int(cursor)
+    raise ValueError(f"Invalid cursor: {cursor!r}")
+
+
+def utf8_boundary(buf, start, end, size):
+    """Move end back so it does not split a UTF-8 sequence."""
+    if end >= size:
+        return end
+    cut = end
+    # Continuation bytes look like 10xxxxxx; at most 3 precede a lead byte
+    while cut > start and end - cut < 4 and (buf[cut] & 0xC0) == 0x80:
+        cut -= 1
+    return cut if cut > start else end
+
+
+def mime_type(path):
+    if path.suffix.lower() == ".md":
+        return "text/markdown"
+    if path.suffix.lower() in TEXT_SUFFIXES:
+        guessed = mimetypes.guess_type(path.name)[0]
+        return guessed or "text/plain"
+    return mimetypes.guess_type(path.name)[0] or "application/octet-stream"
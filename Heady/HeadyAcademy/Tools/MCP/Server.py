@@ -1,32 +1,204 @@
 import sys
 import json
+import atexit
 import logging
 import subprocess
 import shlex
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from Chunker import iter_chunks
+from Impact import FULL_SUITE_INTERVAL, ImpactRunner
+from Admission import AdmissionController, CallContext, CallRegistry, Overloaded, kill_process
+from Framing import FrameReader, FrameWriter, MessageTooLarge, loads
+from Metrics import METRICS
+from Resources import ResourceIndex, ResourceNotFound
+from Workers import WorkerPool
+from Registry import ToolArgumentError, build_argv, load_registry
+
 # HeadySystems Local MCP Server
 # Implements JSON-RPC 2.0 over Stdio to expose Heady Tools to AI Clients
 
 logging.basicConfig(level=logging.ERROR)
 TOOLS_DIR = Path(__file__).parent.parent
+MAX_MESSAGE_BYTES = int(os.environ.get("HEADY_MCP_MAX_MESSAGE_BYTES", 64 * 1024 * 1024))
+DEFAULT_TOOL_TIMEOUT = float(os.environ.get("HEADY_MCP_TOOL_TIMEOUT", 60))
+DEFAULT_TOOL_CONCURRENCY = int(os.environ.get("HEADY_MCP_TOOL_CONCURRENCY", 4))
+MAX_QUEUED_CALLS = int(os.environ.get("HEADY_MCP_MAX_QUEUE", 32))
+STDIO_WORKERS = int(os.environ.get("HEADY_MCP_WORKERS", 8))
+# {pid} is filled in so every server process writes its own file
+METRICS_FILE = str(os.environ.get("HEADY_MCP_METRICS_FILE", TOOLS_DIR.parent / "Logs" / "MCP_Metrics" / "mcp_server_{pid}.prom"))
+METRICS_INTERVAL = float(os.environ.get("HEADY_MCP_METRICS_INTERVAL", 15))
+# Warm tool workers (see Workers.py); 0 runs every call in a fresh process
+WARM_WORKERS = int(os.environ.get("HEADY_MCP_WARM_WORKERS", 0))
+# Tools whose modules each warm worker imports at startup ("all" for every tool)
+PRELOAD_TOOLS = [t.strip() for t in os.environ.get("HEADY_MCP_PRELOAD_TOOLS", "").split(",") if t.strip()]
+
+# Tool Registry - maps MCP tool names to actual Python scripts. Tools declare
+# themselves (MCP_TOOL in each script); Registry.py collects the declarations
+# into a cached manifest without importing any tool module.
+TOOL_REGISTRY = load_registry(TOOLS_DIR)
+
+# Per-tool overrides: tool entries may set "timeout" (seconds) and
+# "max_concurrency"; HEADY_MCP_TOOL_LIMITS takes the same keys as JSON, e.g.
+# {"security_audit": {"timeout": 300, "max_concurrency": 1}}
+def apply_tool_limits(limits):
+    """Merge timeout/max_concurrency overrides into TOOL_REGISTRY."""
+    for name, overrides in limits.items():
+        if name not in TOOL_REGISTRY:
+            logging.error(f"Ignoring limits for unknown tool: {name}")
+            continue
+        for key in ("timeout", "max_concurrency"):
+            if key in overrides:
+                TOOL_REGISTRY[name][key] = overrides[key]
+        if "max_concurrency" in overrides:
+            _admission.set_limit(name, int(overrides["max_concurrency"]))
+
+_admission = AdmissionController(default_limit=DEFAULT_TOOL_CONCURRENCY, max_queue=MAX_QUEUED_CALLS)
+_calls = CallRegistry()
+
+for _name, _info in TOOL_REGISTRY.items():
+    if "max_concurrency" in _info:
+        _admission.set_limit(_name, _info["max_concurrency"])
+if os.environ.get("HEADY_MCP_TOOL_LIMITS"):
+    apply_tool_limits(json.loads(os.environ["HEADY_MCP_TOOL_LIMITS"]))
+
+# Arguments that name filesystem locations; normalized so "./src" and "src" coalesce
+PATH_ARGUMENTS = {"path", "file"}
+
+class _Flight:
+    """A single in-progress tool execution shared by identical callers."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.ctx = CallContext()
+        self.waiters = 0
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def listen(self, event):
+        """Set event when the execution finishes."""
+        with self._lock:
+            if not self.done.is_set():
+                self._listeners.append(event)
+                return
+        event.set()
+
+    def finish(self):
+        with self._lock:
+            self.done.set()
+            listeners, self._listeners = self._listeners, []
+        for event in listeners:
+            event.set()
+
+    def leave(self):
+        """Drop one interested caller; the execution is killed when none remain."""
+        with self._lock:
+            self.waiters -= 1
+            abandoned = self.waiters <= 0 and not self.done.is_set()
+        if abandoned:
+            self.ctx.cancel()
+
+class ToolCallCoalescer:
+    """Singleflight: identical concurrent tool calls share one execution."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key, fn, ctx=None):
+        """Run fn(flight_ctx) once per key at a time; concurrent callers get its result.
+
+        The shared execution is only cancelled once every caller waiting on it
+        has been cancelled through its own ctx.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.executions += 1
+            else:
+                self.coalesced += 1
+            with flight._lock:
+                flight.waiters += 1
+
+        if ctx is not None:
+            ctx.on_cancel(flight.leave)
+
+        if not leader:
+            wake = threading.Event()
+            flight.listen(wake)
+            if ctx is not None:
+                ctx.on_cancel(wake.set)
+            wake.wait()
+            if not flight.done.is_set():
+                return None, "Cancelled"
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn(flight.ctx)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.finish()
+        return flight.result
+
+    def stats(self):
+        with self._lock:
+            return {
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._flights),
+            }
 
-# Tool Registry - maps MCP tool names to actual Python scripts
-TOOL_REGISTRY = {
-    "scan_gaps": {"script": "Gap_Scanner.py", "description": "Scan repo for missing docs/tests"},
-    "verify_auth": {"script": "Heady_Chain.py", "description": "Verify User Role via Blockchain"},
-    "security_audit": {"script": "Security_Audit.py", "description": "Run security vulnerability scan"},
-    "brainstorm": {"script": "Brainstorm.py", "description": "Generate brainstorming ideas"},
-    "visualize": {"script": "Visualizer.py", "description": "Generate project visualization"},
-    "clean_sweep": {"script": "Clean_Sweep.py", "description": "Clean temporary files"},
-    "generate_content": {"script": "Content_Generator.py", "description": "Generate marketing/whitepaper content"},
-    "learn_tool": {"script": "Tool_Learner.py", "description": "Document a CLI tool"},
-    "optimize": {"script": "Optimizer.py", "description": "Analyze code for optimizations"},
-    "obfuscate": {"script": "Heady_Crypt.py", "description": "Obfuscate file contents"},
-    "auto_doc": {"script": "Auto_Doc.py", "description": "Generate documentation"},
-}
-
-def execute_tool(tool_name, arguments):
+_coalescer = ToolCallCoalescer()
+_resources = ResourceIndex()
+
+def normalize_arguments(arguments):
+    """Return a canonical copy of tool arguments for coalescing."""
+    normalized = {}
+    for key, value in (arguments or {}).items():
+        if key in PATH_ARGUMENTS and isinstance(value, str) and value:
+            value = str(Path(value).resolve())
+        normalized[key] = value
+    return normalized
+
+def call_tool(tool_name, arguments, ctx=None):
+    """Execute a tool, coalescing identical concurrent calls where allowed."""
+    tool_info = TOOL_REGISTRY.get(tool_name)
+    if not tool_info or not tool_info.get("coalesce"):
+        return run_admitted(tool_name, arguments, ctx)
+
+    # Coalesced tools all scan a path that defaults to the working directory
+    arguments = normalize_arguments({"path": ".", **(arguments or {})})
+    key = (tool_name, json.dumps(arguments, sort_keys=True, default=str))
+    return _coalescer.do(key, lambda flight_ctx: run_admitted(tool_name, arguments, flight_ctx), ctx)
+
+def run_admitted(tool_name, arguments, ctx=None):
+    """Execute a tool once a concurrency slot is free; raises Overloaded when the queue is full."""
+    if tool_name not in TOOL_REGISTRY:
+        return None, f"Tool '{tool_name}' not found"
+    if not _admission.acquire(tool_name, ctx):
+        return None, "Cancelled"
+    try:
+        return execute_tool(tool_name, arguments, ctx)
+    finally:
+        _admission.release(tool_name)
+
+def execute_tool(tool_name, arguments, ctx=None):
     """Execute a real Heady tool and return output."""
     if tool_name not in TOOL_REGISTRY:
         return None, f"Tool '{tool_name}' not found"
@@ -37,72 +209,127 @@ def execute_tool(tool_name, arguments):
     if not script_path.exists():
         return None, f"Script not found: {script_path}"
     
-    # Build command arguments based on tool
-    cmd_args = [sys.executable, str(script_path)]
-    
-    if tool_name == "scan_gaps":
-        cmd_args.append(arguments.get("path", "."))
-    elif tool_name == "verify_auth":
-        cmd_args.extend(["verify", arguments.get("role", "ADMIN"), arguments.get("user", "USER")])
-    elif tool_name == "security_audit":
-        cmd_args.append(arguments.get("path", "."))
-    elif tool_name == "brainstorm":
-        cmd_args.append(arguments.get("topic", "innovation"))
-    elif tool_name == "visualize":
-        cmd_args.append(arguments.get("path", "."))
-    elif tool_name == "clean_sweep":
-        cmd_args.append(arguments.get("path", "."))
-        if arguments.get("dry_run"):
-            cmd_args.append("--dry")
-    elif tool_name == "generate_content":
-        cmd_args.extend([arguments.get("mode", "marketing"), arguments.get("subject", "HeadySystems")])
-    elif tool_name == "learn_tool":
-        cmd_args.append(arguments.get("tool", "python"))
-    elif tool_name == "optimize":
-        cmd_args.append(arguments.get("path", "."))
-    elif tool_name == "obfuscate":
-        file_path = arguments.get("file")
-        if not file_path:
-            return None, "File path is required for obfuscation"
-        cmd_args.append(file_path)
-    elif tool_name == "auto_doc":
-        cmd_args.append(arguments.get("path", "."))
+    try:
+        cmd_args = [sys.executable, str(script_path), *build_argv(tool_name, tool_info, arguments or {})]
+    except ToolArgumentError as e:
+        return None, str(e)
     
+    timeout = tool_info.get("timeout", DEFAULT_TOOL_TIMEOUT)
+    ctx = ctx or CallContext()
+    if _worker_pool:
+        return _worker_pool[0].run(script_path, cmd_args[2:], timeout, ctx)
     try:
-        result = subprocess.run(cmd_args, capture_output=True, text=True, timeout=60)
-        output = result.stdout + result.stderr
-        return output.strip(), None
+        # Own process group so cancellation also kills anything the tool spawned
+        process = subprocess.Popen(cmd_args, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   text=True, start_new_session=(os.name != "nt"))
+    except Exception as e:
+        return None, str(e)
+
+    ctx.attach(process)
+    try:
+        stdout, stderr = process.communicate(timeout=timeout)
     except subprocess.TimeoutExpired:
-        return None, "Tool execution timed out"
+        kill_process(process)
+        process.communicate()
+        return None, f"Tool execution timed out after {timeout:g}s"
     except Exception as e:
+        kill_process(process)
         return None, str(e)
+    finally:
+        ctx.detach()
+
+    if ctx.cancelled.is_set():
+        return None, "Cancelled"
+    output = stdout + stderr
+    return output.strip(), None
+
+def tool_result(tool_name, output):
+    """tools/call result; a structured tool's JSON result is also sent as structuredContent."""
+    result = {"content": [{"type": "text", "text": output}]}
+    if output and TOOL_REGISTRY.get(tool_name, {}).get("structured"):
+        # The result is the last line; anything before it is stray tool output
+        try:
+            data = loads(output[output.rfind("\n") + 1:])
+        except ValueError:
+            return result
+        if isinstance(data, dict):
+            result["structuredContent"] = data
+    return result
+
+_tool_list = []
 
 def build_tool_list():
-    """Build MCP tool list with input schemas."""
-    tools = []
-    schemas = {
-        "scan_gaps": {"path": {"type": "string", "description": "Directory to scan"}},
-        "verify_auth": {"user": {"type": "string", "description": "Username"}, "role": {"type": "string", "description": "User role"}},
-        "security_audit": {"path": {"type": "string", "description": "Path to audit"}},
-        "brainstorm": {"topic": {"type": "string", "description": "Topic to brainstorm"}},
-        "visualize": {"path": {"type": "string", "description": "Directory to visualize"}},
-        "clean_sweep": {"path": {"type": "string", "description": "Path to clean"}, "dry_run": {"type": "boolean", "description": "Dry run mode"}},
-        "generate_content": {"mode": {"type": "string", "enum": ["whitepaper", "marketing", "data"], "description": "Content type"}, "subject": {"type": "string", "description": "Content subject"}},
-        "learn_tool": {"tool": {"type": "string", "description": "Tool name to document"}},
-        "optimize": {"path": {"type": "string", "description": "Path to analyze"}},
-        "obfuscate": {"file": {"type": "string", "description": "File to obfuscate"}},
-        "auto_doc": {"path": {"type": "string", "description": "Path to document"}},
-    }
-    
-    for name, info in TOOL_REGISTRY.items():
-        tools.append({
+    """Build MCP tool list with input schemas (built once, from the manifest)."""
+    if len(_tool_list) != len(TOOL_REGISTRY):
+        _tool_list[:] = [{
             "name": name,
             "description": info["description"],
-            "inputSchema": {"type": "object", "properties": schemas.get(name, {})}
-        })
-    return tools
+            "inputSchema": info.get("inputSchema", {"type": "object", "properties": {}})
+        } for name, info in TOOL_REGISTRY.items()]
+    return _tool_list
 
-def handle_request(req):
+def handle_request(req, scope=None, ctx=None):
+    """Handle one JSON-RPC message; None means nothing should be sent back.
+
+    scope identifies the client connection so request ids from different
+    clients do not collide for cancellation. ctx is the CallContext of a
+    tools/call already accepted by admit_call.
+    """
+    start = time.perf_counter()
+    res = _handle_request(req, scope, ctx)
+    if isinstance(req, dict):
+        method, tool = _metric_labels(req)
+        METRICS.observe(method, tool, time.perf_counter() - start, error=bool(res and "error" in res))
+    return res
+
+# Methods recorded under their own name; anything else is counted as "other"
+METRIC_METHODS = {"initialize", "notifications/initialized", "tools/list", "tools/call",
+                  "resources/list", "resources/read", "heady/health", "notifications/cancelled", "ping"}
+
+def _metric_labels(req):
+    """(method, tool) metric labels; names outside the registry are folded so clients cannot add series."""
+    method = req.get("method")
+    if method not in METRIC_METHODS:
+        return ("other" if isinstance(method, str) else ""), None
+    if method != "tools/call":
+        return method, None
+    params = req.get("params")
+    tool = params.get("name") if isinstance(params, dict) else None
+    return method, (tool if isinstance(tool, str) and tool in TOOL_REGISTRY else "unknown")
+
+def _overloaded(msg_id, e):
+    return {"jsonrpc": "2.0", "id": msg_id, "error": {
+        "code": -32001, "message": str(e),
+        "data": {"retryable": True, "retryAfterMs": e.retry_after_ms}}}
+
+def admit_call(req, scope=None):
+    """Accept a tools/call before it is handed to a worker thread.
+
+    Registers its CallContext (so notifications/cancelled reaches it while it
+    waits for a thread) and reserves its admission queue place. Returns
+    (ctx, None), or (None, response) when the queue is full. The worker must
+    pass ctx to handle_admitted.
+    """
+    msg_id = req.get("id")
+    tool_name = (req.get("params") or {}).get("name")
+    try:
+        _admission.reserve(tool_name)
+    except Overloaded as e:
+        METRICS.observe(*_metric_labels(req), 0.0, error=True)
+        return None, _overloaded(msg_id, e)
+    return _calls.register(msg_id, scope), None
+
+def handle_admitted(req, ctx, scope=None):
+    """Run a tools/call accepted by admit_call on a worker thread."""
+    _admission.unreserve()
+    return handle_request(req, scope, ctx)
+
+def abandon_admitted(req, scope=None):
+    """Undo admit_call for a call dropped before any worker thread picked it up."""
+    _admission.unreserve()
+    _calls.unregister(req.get("id"), scope)
+
+def _handle_request(req, scope=None, ctx=None):
     try:
         if "method" not in req:
             return {"error": "No method"}
@@ -117,7 +344,7 @@ def handle_request(req):
                 "id": msg_id,
                 "result": {
                     "protocolVersion": "2024-11-05",
-                    "capabilities": {"tools": {}},
+                    "capabilities": {"tools": {}, "resources": {}},
                     "serverInfo": {"name": "HeadyAcademy", "version": "2.0"}
                 }
             }
@@ -136,38 +363,119 @@ def handle_request(req):
             tool_name = params.get("name")
             arguments = params.get("arguments", {})
             
-            output, error = execute_tool(tool_name, arguments)
-            
+            if ctx is None:
+                ctx = _calls.register(msg_id, scope)
+            try:
+                # Cancelled while waiting for a worker thread
+                if ctx.cancelled.is_set():
+                    return None
+                output, error = call_tool(tool_name, arguments, ctx)
+            except Overloaded as e:
+                return _overloaded(msg_id, e)
+            finally:
+                _calls.unregister(msg_id, scope)
+
+            # Cancelled requests get no response
+            if ctx.cancelled.is_set():
+                return None
+
             if error:
                 return {"jsonrpc": "2.0", "id": msg_id, "error": {"code": -32000, "message": error}}
                 
             return {
                 "jsonrpc": "2.0",
                 "id": msg_id,
-                "result": {"content": [{"type": "text", "text": output}]}
+                "result": tool_result(tool_name, output)
             }
 
+        # Generated reports, paged by cursor and read in byte ranges
+        if method == "resources/list":
+            params = req.get("params") or {}
+            try:
+                result = _resources.list(params.get("cursor"))
+            except ValueError as e:
+                return {"jsonrpc": "2.0", "id": msg_id, "error": {"code": -32602, "message": str(e)}}
+            return {"jsonrpc": "2.0", "id": msg_id, "result": result}
+
+        if method == "resources/read":
+            params = req.get("params") or {}
+            try:
+                result = _resources.read(params.get("uri"), offset=params.get("offset", 0),
+                                         length=params.get("length"), cursor=params.get("cursor"))
+            except ResourceNotFound as e:
+                return {"jsonrpc": "2.0", "id": msg_id, "error": {"code": -32002, "message": str(e)}}
+            except ValueError as e:
+                return {"jsonrpc": "2.0", "id": msg_id, "error": {"code": -32602, "message": str(e)}}
+            return {"jsonrpc": "2.0", "id": msg_id, "result": result}
+
+        # Live health and metrics snapshot
+        if method == "heady/health":
+            return {"jsonrpc": "2.0", "id": msg_id, "result": health_check()}
+
+        if method == "notifications/cancelled":
+            params = req.get("params", {})
+            _calls.cancel(params.get("requestId"), scope)
+            return None
+
         return {"jsonrpc": "2.0", "id": msg_id, "result": {}}
 
     except Exception as e:
         return {"jsonrpc": "2.0", "id": req.get("id"), "error": {"code": -32000, "message": str(e)}}
 
-if __name__ == "__main__":
-    # Standard IO Loop for MCP
+def serve_stdio(stdin=None, stdout=None, max_message_bytes=MAX_MESSAGE_BYTES):
+    """Standard IO loop for MCP using binary newline-delimited framing.
+
+    tools/call runs on a worker pool so the loop keeps reading and can act on
+    notifications/cancelled while calls are in flight. Calls are accepted
+    (registered and counted against the admission queue) here, before they
+    wait for a worker thread.
+    """
+    reader = FrameReader(stdin or sys.stdin.buffer, max_message_bytes=max_message_bytes)
+    writer = FrameWriter(stdout or sys.stdout.buffer)
+    executor = ThreadPoolExecutor(max_workers=STDIO_WORKERS, thread_name_prefix="mcp-tool")
+    set_worker_capacity(STDIO_WORKERS)
+    start_metrics_exporter()
+    start_worker_pool()
+
+    def run_call(req, ctx):
+        res = handle_admitted(req, ctx)
+        if res:
+            writer.write(res)
+
     while True:
         try:
-            line = sys.stdin.readline()
-            if not line: break
-            req = json.loads(line)
+            frame = reader.read_frame()
+            if frame is None:
+                break
+            req = loads(frame)
+            if isinstance(req, dict) and req.get("method") == "tools/call":
+                ctx, rejected = admit_call(req)
+                if rejected:
+                    writer.write(rejected)
+                else:
+                    executor.submit(run_call, req, ctx)
+                continue
             res = handle_request(req)
             if res:
-                sys.stdout.write(json.dumps(res) + "\n")
-                sys.stdout.flush()
+                # Batch flushes while more requests are already buffered
+                writer.write(res, flush=not reader.pending())
         except KeyboardInterrupt:
             break
+        except MessageTooLarge as e:
+            logging.error(f"Rejected request: {e}")
+            writer.write({"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": str(e)}})
+        except ValueError as e:
+            logging.error(f"Invalid JSON: {e}")
+            writer.write({"jsonrpc": "2.0", "id": None, "error": {"code": -32700, "message": "Parse error"}})
         except Exception as e:
             logging.error(f"Error processing request: {e}")
             continue
+    writer.flush()
+    # Let in-flight calls finish and reply before exiting
+    executor.shutdown(wait=True)
+    writer.flush()
+    stop_worker_pool()
+    stop_metrics_exporter()
 
 # Optional: Add graceful shutdown and logging
 def shutdown():
@@ -175,21 +483,83 @@ def shutdown():
     logging.info("MCP Server shutting down")
     sys.exit(0)
 
-# Optional: Health check endpoint for monitoring
+# Worker threads available to run tool calls (set by the active transport)
+_worker_capacity = {"total": STDIO_WORKERS}
+_metrics_exporter = []
+
+def set_worker_capacity(total):
+    _worker_capacity["total"] = total
+
+def _worker_utilization():
+    total = _worker_capacity["total"]
+    return round(min(len(_calls), total) / total, 4) if total else 0.0
+
+METRICS.register_gauge("queue_depth", lambda: _admission.stats()["queued"], "Tool calls waiting for a concurrency slot")
+METRICS.register_gauge("calls_in_flight", lambda: len(_calls), "tools/call requests being handled")
+METRICS.register_gauge("tool_runs_active", lambda: _admission.stats()["active"], "Running tool executions per tool", label="tool")
+METRICS.register_gauge("workers_total", lambda: _worker_capacity["total"], "Worker threads available for tool calls")
+METRICS.register_gauge("worker_utilization", _worker_utilization, "Fraction of worker threads busy")
+METRICS.register_cache("tool_coalescing", lambda: (_coalescer.coalesced, _coalescer.executions))
+METRICS.register_cache("resource_index", lambda: (_resources.hits, _resources.misses))
+
+_worker_pool = []
+
+def start_worker_pool(size=WARM_WORKERS):
+    """Start the warm tool-worker pool once per process; size 0 keeps a process per call."""
+    if not _worker_pool and size > 0:
+        # Tool modules load on first call in each worker unless listed for preloading
+        preload = TOOL_REGISTRY if PRELOAD_TOOLS == ["all"] else PRELOAD_TOOLS
+        scripts = sorted({str(TOOLS_DIR / TOOL_REGISTRY[name]["script"]) for name in preload
+                          if TOOL_REGISTRY.get(name, {}).get("script")})
+        _worker_pool.append(WorkerPool(scripts, size=size, watch_dir=TOOLS_DIR).start())
+
+def stop_worker_pool():
+    while _worker_pool:
+        _worker_pool.pop().close()
+
+def _pool_stats():
+    return _worker_pool[0].stats() if _worker_pool else {}
+
+METRICS.register_gauge("tool_workers", lambda: {k: v for k, v in _pool_stats().items() if k in ("idle", "busy", "starting")},
+                       "Warm tool worker processes by state", label="state")
+METRICS.register_cache("warm_workers", lambda: (_pool_stats().get("warm_hits", 0), _pool_stats().get("cold_waits", 0)))
+METRICS.register_gauge("tool_worker_recycles", lambda: _pool_stats().get("recycled", {}),
+                       "Warm tool workers replaced, by reason", label="reason")
+
+def start_metrics_exporter(path=None, interval=METRICS_INTERVAL):
+    """Start the periodic Prometheus text file writer once per process."""
+    if not _metrics_exporter and interval > 0:
+        path = Path(str(path or METRICS_FILE).replace("{pid}", str(os.getpid())))
+        _metrics_exporter.append((METRICS.start_exporter(path, interval), path))
+
+def stop_metrics_exporter():
+    """Stop the exporter and remove this process's metrics file."""
+    while _metrics_exporter:
+        METRICS.stop_exporter(*_metrics_exporter.pop())
+
+# Health check - served as the heady/health method and GET /health
 def health_check():
-    """Return server health status."""
+    """Return live server health and metrics."""
     return {
         "status": "healthy",
         "tools_available": len(TOOL_REGISTRY),
-        "protocol_version": "2024-11-05"
+        "protocol_version": "2024-11-05",
+        "calls_in_flight": len(_calls),
+        "coalescing": _coalescer.stats(),
+        "admission": _admission.stats(),
+        "auto_commit": _auto_commit_tracker.stats(),
+        "worker_pool": _pool_stats() or None,
+        "metrics": METRICS.snapshot()
     }
 
 def naive_linechunk(text, max_bytes=4096):
     """Yield line-based chunks that respect a byte size limit.
 
-    This is a naive splitter: it keeps whole lines together and ensures that
-    each yielded chunk, when UTF-8 encoded, is at most `max_bytes`. Very long
-    individual lines that exceed `max_bytes` are emitted on their own.
+    Keeps whole lines together and ensures that each yielded chunk, when
+    UTF-8 encoded, is at most `max_bytes`. Very long individual lines that
+    exceed `max_bytes` are emitted on their own. Thin wrapper over the
+    streaming "lines" strategy in Chunker.py, so lines end at "\n" only
+    (a "\r\n" pair stays together; a lone "\r" does not end a line).
 
     Args:
         text (str): Full input text to chunk.
@@ -203,77 +573,212 @@ def naive_linechunk(text, max_bytes=4096):
     if max_bytes <= 0:
         raise ValueError("max_bytes must be positive")
 
-    current = []
-    current_size = 0
-
-    for line in text.splitlines(keepends=True):
-        line_bytes = len(line.encode("utf-8"))
-
-        # If a single line is too large, flush current buffer and yield line alone
-        if line_bytes > max_bytes:
-            if current:
-                yield "".join(current)
-                current = []
-                current_size = 0
-            yield line
-            continue
-
-        # If adding this line would exceed the limit, flush current buffer first
-        if current_size + line_bytes > max_bytes:
-            if current:
-                yield "".join(current)
-            current = [line]
-            current_size = line_bytes
-        else:
-            current.append(line)
-            current_size += line_bytes
-
-    if current:
-        yield "".join(current)
+    data = text.encode("utf-8")
+    for chunk in iter_chunks(data, max_bytes, "lines"):
+        yield str(chunk.data, "utf-8")
 
 class AutoCommitTracker:
-    """Track changes and auto-commit every N changes."""
+    """Track changes and auto-commit every N changes on a background worker.
+
+    mark_change only records the change and returns. A single worker thread
+    waits for a burst of changes to settle (debounce seconds without a new
+    change, but never more than max_delay seconds after the first one), runs
+    the queued commands and test command once for the whole batch, and
+    commits if the index actually changed. Pending changes are flushed when
+    the tracker is closed, and at interpreter exit.
+    """
 
-    def __init__(self, threshold: int = 3):
+    def __init__(self, threshold: int = 3, test_command: str = "pytest -q",
+                 debounce: float = 2.0, max_delay: float = 30.0, repo_dir=None,
+                 exit_timeout: float = 120.0):
         if threshold <= 0:
             raise ValueError("threshold must be positive")
+        if max_delay < debounce:
+            raise ValueError("max_delay must be at least debounce")
         self.threshold = threshold
-        self._counter = 0
-
-    def mark_change(self, message: str = "Auto-commit from MCP server") -> None:
-        """Record a change; when threshold is reached, run tests and commit."""
-        import subprocess
+        self.test_command = test_command
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.repo_dir = repo_dir
+        self.exit_timeout = exit_timeout
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pending = 0
+        self._commands = {}
+        self._message = None
+        self._first_change = None
+        self._last_change = 0.0
+        self._flush = False
+        self._busy = False
+        self._closed = False
+        self.commits = 0
+        self.changes_committed = 0
+        self.skipped = 0
+        self.failures = 0
+        self.commands_run = 0
+
+    def mark_change(self, message: str = "Auto-commit from MCP server", command: str = None) -> None:
+        """Record a change (and optionally a command to run before committing) without blocking."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("AutoCommitTracker is closed")
+            self._pending += 1
+            self._message = message
+            if command:
+                # Dict as an ordered set: a command queued twice in a burst runs once
+                self._commands[command] = None
+            self._last_change = time.monotonic()
+            if self._first_change is None:
+                self._first_change = self._last_change
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="auto-commit", daemon=True)
+                self._thread.start()
+                # The worker is a daemon thread; commit what is pending before exit
+                atexit.register(self.close, True, self.exit_timeout)
+            self._cond.notify_all()
+
+    @property
+    def pending(self) -> int:
+        """Changes recorded but not yet committed."""
+        with self._cond:
+            return self._pending
+
+    @property
+    def committed(self) -> int:
+        """Commits made by the worker."""
+        with self._cond:
+            return self.commits
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "pending": self._pending,
+                "committed": self.commits,
+                "changes_committed": self.changes_committed,
+                "skipped": self.skipped,
+                "failed": self.failures,
+                "commands_run": self.commands_run,
+                "busy": int(self._busy),
+            }
 
-        self._counter += 1
-        if self._counter < self.threshold:
+    def flush(self, timeout: float = None) -> bool:
+        """Commit pending changes now, regardless of threshold; True once the worker is idle."""
+        with self._cond:
+            if self._thread is None or not (self._pending or self._commands or self._busy):
+                return True
+            self._flush = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: not (self._flush or self._busy), timeout)
+
+    def close(self, flush: bool = True, timeout: float = None) -> None:
+        """Stop the worker, committing pending changes first when flush is set."""
+        if flush:
+            self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+            atexit.unregister(self.close)
+
+    def _ready(self):
+        return self._flush or bool(self._commands) or self._pending >= self.threshold
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._closed or self._ready())
+                if not self._ready():
+                    return
+                # Let a burst of changes settle into a single batch, but do not
+                # let a steady stream of edits postpone it past max_delay
+                while not (self._flush or self._closed):
+                    settle = self._last_change + self.debounce
+                    if self._first_change is not None:
+                        settle = min(settle, self._first_change + self.max_delay)
+                    quiet = settle - time.monotonic()
+                    if quiet <= 0:
+                        break
+                    self._cond.wait(quiet)
+                self._first_change = None
+                commands = list(self._commands)
+                self._commands.clear()
+                commit = self._flush or self._pending >= self.threshold
+                changes = self._pending if commit else 0
+                if commit:
+                    self._pending = 0
+                message = self._message or "Auto-commit from MCP server"
+                self._busy = True
+            try:
+                self._process(commands, commit, changes, message)
+            except Exception as e:
+                logging.error(f"Auto-commit worker error: {e}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    if commit:
+                        self._flush = False
+                    self._cond.notify_all()
+
+    def _git(self, *args):
+        return subprocess.run(["git", *args], cwd=self.repo_dir, capture_output=True, text=True)
+
+    def _process(self, commands, commit, changes, message):
+        if commit and not self._git("status", "--porcelain").stdout.strip():
+            # Clean working tree - nothing to test or commit
+            with self._cond:
+                self.skipped += 1
+            commit = False
+        elif commit and self.test_command and self.test_command not in commands:
+            commands.append(self.test_command)
+        for command in commands:
+            try:
+                # Optional checks before committing; failures do not block the commit
+                subprocess.run(shlex.split(command), cwd=self.repo_dir, check=False,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            except (subprocess.SubprocessError, OSError) as e:
+                logging.error(f"Command execution failed: {e}")
+            with self._cond:
+                self.commands_run += 1
+        if not commit:
             return
 
-        self._counter = 0
         try:
-            # Optional: run tests before committing; ignore failures for now
-            subprocess.run(["pytest", "-q"], check=False, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-
-            # Stage all changes
-            subprocess.run(["git", "add", "-A"], check=True)
-
-            # Commit with provided message
-            subprocess.run(["git", "commit", "-m", message], check=True)
+            # Stage everything, then skip the commit if the index matches HEAD
+            result = self._git("add", "-A")
+            if result.returncode != 0:
+                raise subprocess.SubprocessError(result.stderr.strip() or "git add failed")
+            if self._git("diff", "--cached", "--quiet").returncode == 0:
+                with self._cond:
+                    self.skipped += 1
+                return
+            result = self._git("commit", "-m", message)
+            if result.returncode != 0:
+                raise subprocess.SubprocessError(result.stderr.strip() or "git commit failed")
         except (subprocess.SubprocessError, OSError) as e:
             logging.error(f"Auto-commit failed: {e}")
+            with self._cond:
+                self.failures += 1
             return
+        with self._cond:
+            self.commits += 1
+            self.changes_committed += changes
 
 # Global tracker instance for this module
 _auto_commit_tracker = AutoCommitTracker(threshold=3)
+METRICS.register_gauge("auto_commit", _auto_commit_tracker.stats, "Background auto-commit counters", label="counter")
 
 def auto_run_and_commit(command: str = "pytest -q", threshold: int = 3):
-    """Run a command and mark a change for periodic auto-commit.
+    """Queue a command and mark a change for periodic auto-commit.
+
+    Returns immediately; the command runs on the tracker's worker, once per
+    burst of identical requests, before any commit it triggers.
 
     Args:
         command: Shell command to execute before marking change.
         threshold: Optional override of global auto-commit threshold.
     """
-    import subprocess
-
     if threshold <= 0:
         raise ValueError("threshold must be positive")
 
@@ -281,35 +786,40 @@ def auto_run_and_commit(command: str = "pytest -q", threshold: int = 3):
     if _auto_commit_tracker.threshold != threshold:
         _auto_commit_tracker.threshold = threshold
 
-    try:
-        subprocess.run(shlex.split(command), check=False)
-    except (subprocess.SubprocessError, OSError) as e:
-        logging.error(f"Command execution failed: {e}")
-        pass
+    _auto_commit_tracker.mark_change(f"Auto-commit after '{command}'", command=command)
 
-    _auto_commit_tracker.mark_change(f"Auto-commit after '{command}'")
+def schedule_auto_run_and_commit(interval_seconds: float = FULL_SUITE_INTERVAL, command: str = "pytest -q", threshold: int = 3):
+    """Run tests affected by each change and auto-commit in a best-effort background loop.
 
-def schedule_auto_run_and_commit(interval_seconds: int = 300, command: str = "pytest -q", threshold: int = 3):
-    """Periodically run a command and auto-commit in a best-effort background loop.
+    An ImpactRunner (see Impact.py) polls the working tree, runs only the test
+    files whose imports reach a changed file, spread over parallel pytest
+    workers, and falls back to the full suite every interval_seconds. Each
+    run marks a change on the auto-commit tracker, which has no test command
+    of its own here since the runner already tested the change.
 
     This is a blocking loop; callers should run it in a background thread or process
     if they need the main thread to remain responsive.
     """
-    import time
-
     if interval_seconds <= 0:
         raise ValueError("interval_seconds must be positive")
+    if threshold <= 0:
+        raise ValueError("threshold must be positive")
 
-    while True:
-        try:
-            auto_run_and_commit(command=command, threshold=threshold)
-        except (subprocess.SubprocessError, OSError) as e:
-            logging.error(f"Auto-commit scheduler error: {e}")
-            pass
-        time.sleep(interval_seconds)
+    _auto_commit_tracker.threshold = threshold
+    _auto_commit_tracker.test_command = None
+
+    def on_result(result):
+        scope = "full suite" if result["full"] else f"{len(result['tests'])} affected test files"
+        status = "passed" if result["passed"] else "failed"
+        if not result["passed"]:
+            logging.error(f"Auto-run {scope} failed:\n{result['output'][-4000:]}")
+        _auto_commit_tracker.mark_change(f"Auto-commit after {scope} {status}")
+
+    runner = ImpactRunner(".", command=command, full_every=interval_seconds, on_result=on_result)
+    runner.run_forever()
 
 def start_background_auto_committer(
-    interval_seconds: int = 300,
+    interval_seconds: float = FULL_SUITE_INTERVAL,
     command: str = "pytest -q",
     threshold: int = 3,
 ):
@@ -354,20 +864,8 @@ def start_background_auto_committer(
         creationflags=creationflags,
     )
 
-if __name__ == "__main__" and "--auto-commit-scheduler" in sys.argv:
-    # Minimal CLI entrypoint for detached scheduler
-    try:
-        idx = sys.argv.index("--auto-commit-scheduler")
-        interval = int(sys.argv[idx + 1]) if len(sys.argv) > idx + 1 else 300
-        cmd = sys.argv[idx + 2] if len(sys.argv) > idx + 2 else "pytest -q"
-        thr = int(sys.argv[idx + 3]) if len(sys.argv) > idx + 3 else 3
-        schedule_auto_run_and_commit(interval_seconds=interval, command=cmd, threshold=thr)
-    except Exception:
-        # Last-resort guard; avoid crashing background helper
-        pass
-
 def enable_regular_auto_commits(
-    interval_seconds: int = 300,
+    interval_seconds: float = FULL_SUITE_INTERVAL,
     command: str = "pytest -q",
     threshold: int = 3,
 ) -> None:
@@ -377,7 +875,7 @@ def enable_regular_auto_commits(
     and commits flowing in the background.
 
     Args:
-        interval_seconds: How often to run the command.
+        interval_seconds: How often to run the full suite; changes run affected tests in between.
         command: Command to execute before marking a change.
         threshold: Number of runs before triggering a git commit.
     """
@@ -388,7 +886,7 @@ def enable_regular_auto_commits(
     )
 
 def auto_run_and_commit_regularly(
-    interval_seconds: int = 300,
+    interval_seconds: float = FULL_SUITE_INTERVAL,
     command: str = "pytest -q",
     threshold: int = 3,
 ) -> None:
@@ -407,36 +905,43 @@ def auto_run_and_commit_now(command: str = "pytest -q", threshold: int = 3) -> N
     """Run the auto-commit pipeline immediately using current settings."""
     auto_run_and_commit(command=command, threshold=threshold)
 
-def semantic_chunk(text: str, max_len: int = 4096, overlap: int = 200) -> list[str]:
+def semantic_chunk(text: str, max_len: int = 4096, overlap: int = 200, strategy: str = "lines") -> list[str]:
     """Split text into overlapping chunks for better context preservation.
-    
+
+    Chunks follow the boundary strategy (whole lines by default, see
+    Chunker.py) and each chunk after the first starts with up to `overlap`
+    bytes of the preceding text. Use Chunker.iter_chunks directly to stream
+    zero-copy views instead of building a list.
+
     Args:
         text: Input text to chunk.
-        max_len: Maximum character length per chunk.
-        overlap: Number of characters to overlap between chunks.
-    
+        max_len: Maximum UTF-8 byte length per chunk, overlap included.
+        overlap: Number of bytes to overlap between chunks.
+        strategy: One of "lines", "markdown", "python" or "cdc".
+
     Returns:
         List of text chunks with overlap for continuity.
     """
     if not text:
         return []
-    
-    # Use the byte-based chunker for consistency
-    base_chunks = list(naive_linechunk(text, max_len - overlap))
-    if len(base_chunks) <= 1:
-        return base_chunks
-    
-    result = [base_chunks[0]]
-    for i in range(1, len(base_chunks)):
-        # Create proper overlapping chunks
-        prev_chunk = base_chunks[i - 1]
-        curr_chunk = base_chunks[i]
-        
-        if len(prev_chunk) > overlap:
-            overlap_text = prev_chunk[-overlap:]
-        else:
-            overlap_text = prev_chunk
-            
-        result.append(overlap_text + curr_chunk)
-    
-    return result
\ No newline at end of file
+    if overlap >= max_len:
+        raise ValueError("overlap must be smaller than max_len")
+
+    data = text.encode("utf-8")
+    return [str(chunk.data, "utf-8")
+            for chunk in iter_chunks(data, max_len - overlap, strategy, overlap)]
+
+if __name__ == "__main__":
+    if "--auto-commit-scheduler" in sys.argv:
+        # Minimal CLI entrypoint for detached scheduler
+        try:
+            idx = sys.argv.index("--auto-commit-scheduler")
+            interval = float(sys.argv[idx + 1]) if len(sys.argv) > idx + 1 else FULL_SUITE_INTERVAL
+            cmd = sys.argv[idx + 2] if len(sys.argv) > idx + 2 else "pytest -q"
+            thr = int(sys.argv[idx + 3]) if len(sys.argv) > idx + 3 else 3
+            schedule_auto_run_and_commit(interval_seconds=interval, command=cmd, threshold=thr)
+        except Exception:
+            # Last-resort guard; avoid crashing background helper
+            pass
+    else:
+        serve_stdio()
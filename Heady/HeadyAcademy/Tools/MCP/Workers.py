@@ -0,0 +1,376 @@
+"""
+Workers.py - BRIDGE Warm Tool Workers
+Pool of long-lived Python processes that run tool scripts without paying
+interpreter startup and cold imports on every tools/call.
+
+Each worker imports the tool modules it is asked to preload at startup; any
+other tool's imports load on its first call and stay cached in the worker.
+A script runs per request with runpy as __main__ (sys.argv set, stdout/stderr
+captured at the file-descriptor level so output from subprocesses the tool
+starts is captured too). Workers are started ahead of demand and recycled:
+
+- after HEADY_MCP_WORKER_MAX_CALLS calls,
+- once their RSS crosses HEADY_MCP_WORKER_MAX_RSS_MB,
+- when any .py file under Tools/ changes (hot reload): idle workers are
+  replaced at once, busy ones as soon as their current call finishes.
+
+A cancelled or timed-out call kills its worker (and the worker's process
+group), which is then replaced.
+
+Worker mode: python Workers.py --worker <tool script>...
+"""
+import os
+import sys
+import time
+import queue
+import logging
+import threading
+import subprocess
+from pathlib import Path
+
+from Framing import FrameReader, FrameWriter, loads
+from Admission import CallContext, kill_process
+from Impact import scan_tree
+
+MAX_CALLS = int(os.environ.get("HEADY_MCP_WORKER_MAX_CALLS", 200))
+MAX_RSS_BYTES = int(float(os.environ.get("HEADY_MCP_WORKER_MAX_RSS_MB", 512)) * 1024 * 1024)
+RELOAD_INTERVAL = float(os.environ.get("HEADY_MCP_RELOAD_INTERVAL", 2))
+START_TIMEOUT = 30.0
+
+
+class Worker:
+    """One warm worker process and its response queue."""
+
+    def __init__(self, scripts, generation, cwd=None):
+        self.generation = generation
+        self.calls = 0
+        self.rss = 0
+        self.process = subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), "--worker", *map(str, scripts)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, cwd=cwd,
+            start_new_session=(os.name != "nt"))
+        self.writer = FrameWriter(self.process.stdin)
+        self.responses = queue.Queue()
+        threading.Thread(target=self._read_loop, name="mcp-worker-reader", daemon=True).start()
+
+    def _read_loop(self):
+        reader = FrameReader(self.process.stdout)
+        try:
+            while True:
+                frame = reader.read_frame()
+                if frame is None:
+                    break
+                self.responses.put(loads(frame))
+        except Exception as e:
+            logging.error(f"Worker {self.process.pid} reader error: {e}")
+        finally:
+            # None tells a waiting caller the worker died
+            self.responses.put(None)
+
+    def wait_ready(self, timeout=START_TIMEOUT):
+        try:
+            msg = self.responses.get(timeout=timeout)
+        except queue.Empty:
+            msg = None
+        return bool(msg and msg.get("ready"))
+
+    @property
+    def alive(self):
+        return self.process.poll() is None
+
+    def stop(self, timeout=5.0):
+        """Let the worker exit after its current call; kill it if it does not."""
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout)
+        except (OSError, subprocess.TimeoutExpired):
+            kill_process(self.process)
+            self.process.wait()
+
+
+class WorkerPool:
+    """Warm, self-recycling tool workers shared by concurrent tool calls."""
+
+    def __init__(self, scripts, size=4, max_calls=MAX_CALLS, max_rss_bytes=MAX_RSS_BYTES,
+                 watch_dir=None, reload_interval=RELOAD_INTERVAL, cwd=None):
+        if size <= 0:
+            raise ValueError("size must be positive")
+        self.scripts = [str(s) for s in scripts]
+        self.size = size
+        self.max_calls = max_calls
+        self.max_rss_bytes = max_rss_bytes
+        self.watch_dir = Path(watch_dir) if watch_dir else None
+        self.reload_interval = reload_interval
+        self.cwd = cwd
+        self.generation = 0
+        self.recycled = {"calls": 0, "memory": 0, "reload": 0, "died": 0}
+        # Calls that found a warm worker idle vs. ones that waited for one to start
+        self.warm_hits = 0
+        self.cold_waits = 0
+        self._idle = []
+        self._busy = 0
+        self._starting = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._snapshot = None
+
+    # Lifecycle
+
+    def start(self):
+        """Pre-start every worker and begin watching for code changes."""
+        if self.watch_dir is not None:
+            self._snapshot = scan_tree(self.watch_dir)
+            threading.Thread(target=self._watch, name="mcp-worker-reload", daemon=True).start()
+        for _ in range(self.size):
+            self._spawn_async()
+        return self
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for worker in idle:
+            worker.stop()
+
+    def _spawn_async(self):
+        with self._cond:
+            if self._closed or len(self._idle) + self._busy + self._starting >= self.size:
+                return
+            self._starting += 1
+            generation = self.generation
+        threading.Thread(target=self._spawn, args=(generation,), name="mcp-worker-spawn", daemon=True).start()
+
+    def _spawn(self, generation):
+        worker = None
+        try:
+            worker = Worker(self.scripts, generation, self.cwd)
+            if not worker.wait_ready():
+                raise RuntimeError("worker did not start")
+        except Exception as e:
+            logging.error(f"Failed to start tool worker: {e}")
+            if worker is not None:
+                kill_process(worker.process)
+            worker = None
+        with self._cond:
+            self._starting -= 1
+            if worker is not None and not self._closed and worker.generation == self.generation:
+                self._idle.append(worker)
+                worker = None
+            self._cond.notify_all()
+        if worker is not None:
+            # Code changed while it was starting, or the pool closed
+            worker.stop()
+            self._spawn_async()
+
+    def _watch(self):
+        while not self._closed:
+            time.sleep(self.reload_interval)
+            try:
+                snapshot = scan_tree(self.watch_dir)
+            except OSError:
+                continue
+            if snapshot != self._snapshot:
+                self._snapshot = snapshot
+                self.reload()
+
+    def reload(self):
+        """Retire every worker running old code; busy ones finish their call first."""
+        with self._cond:
+            self.generation += 1
+            stale, self._idle = self._idle, []
+            self.recycled["reload"] += len(stale)
+        for worker in stale:
+            worker.stop()
+        for _ in range(self.size):
+            self._spawn_async()
+
+    # Calls
+
+    def _acquire(self, ctx, deadline):
+        waited = False
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Worker pool is closed")
+                if ctx.cancelled.is_set():
+                    return None
+                while self._idle:
+                    worker = self._idle.pop()
+                    if worker.alive:
+                        self._busy += 1
+                        if waited:
+                            self.cold_waits += 1
+                        else:
+                            self.warm_hits += 1
+                        return worker
+                    self.recycled["died"] += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError
+                if self._starting == 0:
+                    # The condition's lock is re-entrant
+                    self._spawn_async()
+                waited = True
+                self._cond.wait(min(remaining, 0.5))
+
+    def _release(self, worker, reason=None):
+        with self._cond:
+            self._busy -= 1
+            keep = (reason is None and not self._closed and worker.alive
+                    and worker.generation == self.generation)
+            if keep:
+                self._idle.append(worker)
+            elif reason:
+                self.recycled[reason] += 1
+            elif worker.generation != self.generation:
+                self.recycled["reload"] += 1
+            self._cond.notify_all()
+        if not keep:
+            if worker.alive:
+                worker.stop()
+            self._spawn_async()
+
+    def run(self, script, argv, timeout, ctx=None):
+        """Run a tool script in a warm worker; returns (output, error) like execute_tool."""
+        ctx = ctx or CallContext()
+        deadline = time.monotonic() + timeout
+        try:
+            worker = self._acquire(ctx, deadline)
+        except TimeoutError:
+            return None, f"Tool execution timed out after {timeout:g}s"
+        if worker is None:
+            return None, "Cancelled"
+
+        ctx.attach(worker.process)
+        try:
+            worker.writer.write({"script": str(script), "argv": [str(a) for a in argv]})
+            msg = worker.responses.get(timeout=max(0.0, deadline - time.monotonic()))
+            error = "Tool worker exited unexpectedly" if msg is None else None
+        except queue.Empty:
+            msg, error = None, f"Tool execution timed out after {timeout:g}s"
+        except (OSError, ValueError) as e:
+            msg, error = None, f"Tool worker failed: {e}"
+        finally:
+            ctx.detach()
+
+        if msg is None or ctx.cancelled.is_set():
+            # Timed out, cancelled or crashed - the process is never reused
+            kill_process(worker.process)
+            self._release(worker, "died")
+            return None, "Cancelled" if ctx.cancelled.is_set() else error
+
+        reason = None
+        worker.calls += 1
+        worker.rss = msg.get("rss", 0)
+        if worker.calls >= self.max_calls:
+            reason = "calls"
+        elif self.max_rss_bytes and worker.rss > self.max_rss_bytes:
+            reason = "memory"
+        self._release(worker, reason)
+        return msg.get("output", "").strip(), None
+
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self.size,
+                "idle": len(self._idle),
+                "busy": self._busy,
+                "starting": self._starting,
+                "generation": self.generation,
+                "recycled": dict(self.recycled),
+                "warm_hits": self.warm_hits,
+                "cold_waits": self.cold_waits,
+            }
+
+
+# Worker process side
+
+def _warm_import(script):
+    """Import a tool module under a private name so its CLI block does not run."""
+    import importlib.util
+
+    path = Path(script)
+    if str(path.parent) not in sys.path:
+        sys.path.append(str(path.parent))
+    spec = importlib.util.spec_from_file_location(f"_warm_{path.stem}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+
+def _run_captured(func, *args):
+    """Call func with fds 1 and 2 captured; returns (output, exit code)."""
+    import tempfile
+    import traceback
+
+    saved_argv, saved_path, saved_cwd = sys.argv, list(sys.path), os.getcwd()
+    with tempfile.TemporaryFile() as capture:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        saved_out, saved_err = os.dup(1), os.dup(2)
+        os.dup2(capture.fileno(), 1)
+        os.dup2(capture.fileno(), 2)
+        code = 0
+        try:
+            func(*args)
+        except SystemExit as e:
+            if isinstance(e.code, int) or e.code is None:
+                code = e.code or 0
+            else:
+                print(e.code, file=sys.stderr)
+                code = 1
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.dup2(saved_out, 1)
+            os.dup2(saved_err, 2)
+            os.close(saved_out)
+            os.close(saved_err)
+            sys.argv, sys.path[:] = saved_argv, saved_path
+            os.chdir(saved_cwd)
+        capture.seek(0)
+        return capture.read().decode("utf-8", errors="replace"), code
+
+
+def _run_script(script, argv):
+    """Run script as __main__, like `python script argv...`."""
+    import runpy
+
+    sys.argv = [script, *argv]
+    # Same sys.path[0] a plain `python script.py` run gets
+    sys.path.insert(0, str(Path(script).parent))
+    runpy.run_path(script, run_name="__main__")
+
+
+def worker_main(scripts):
+    from Metrics import rss_bytes
+
+    # Private copies of the protocol pipes; tools see /dev/null on stdin and
+    # captured files on stdout/stderr
+    proto_in = os.fdopen(os.dup(0), "rb")
+    proto_out = os.fdopen(os.dup(1), "wb")
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+    reader = FrameReader(proto_in)
+    writer = FrameWriter(proto_out)
+
+    # Import output is discarded; a module that fails to import (e.g. a missing
+    # optional dependency) fails again, visibly, when the tool runs
+    warmed = sum(_run_captured(_warm_import, s)[1] == 0 for s in scripts)
+    writer.write({"ready": True, "pid": os.getpid(), "warmed": warmed})
+    while True:
+        frame = reader.read_frame()
+        if frame is None:
+            break
+        req = loads(frame)
+        output, code = _run_captured(_run_script, req["script"], req.get("argv", []))
+        writer.write({"output": output, "exit": code, "rss": rss_bytes()})
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        worker_main(sys.argv[2:])
@@ -2,14 +2,26 @@
 Optimizer.py - JULES Tool
 Analyzes and suggests optimizations for code.
 """
-import sys
 import os
 import re
+import json
 from pathlib import Path
 from datetime import datetime
 
 OUTPUT_DIR = Path(__file__).parent.parent / "Logs" / "Optimization_Reports"
 
+MCP_TOOL = {
+    "name": "optimize",
+    "description": "Analyze code for optimizations",
+    "arguments": {
+        "path": {"type": "string", "description": "Path to analyze", "default": "."},
+        "report": {"type": "boolean", "description": "Also write a markdown report"},
+    },
+    "argv": ["--json", {"if": "report", "argv": ["--report"]}, "{path}"],
+    "coalesce": True,
+    "structured": True,
+}
+
 OPTIMIZATION_RULES = [
     {
         "name": "Unused imports",
@@ -68,20 +80,9 @@ def analyze_file(file_path):
     
     return issues
 
-def optimize(target):
-    """Analyze target and generate optimization report."""
-    target_path = Path(target)
+def write_report(target_path, all_issues):
+    """Render the suggestions as a markdown report; returns its path."""
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    
-    all_issues = []
-    
-    if target_path.is_file():
-        all_issues.extend([(target_path, issue) for issue in analyze_file(target_path)])
-    elif target_path.is_dir():
-        for py_file in target_path.rglob("*.py"):
-            issues = analyze_file(py_file)
-            all_issues.extend([(py_file, issue) for issue in issues])
-    
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     report_file = OUTPUT_DIR / f"opt_report_{timestamp}.md"
     
@@ -102,11 +103,46 @@ def optimize(target):
     
     with open(report_file, 'w', encoding='utf-8') as f:
         f.write('\n'.join(report))
+    return report_file
+
+def optimize(target, as_json=False, report=True):
+    """Analyze target; as_json prints the result instead of a summary."""
+    target_path = Path(target)
+    
+    all_issues = []
     
+    if target_path.is_file():
+        all_issues.extend([(target_path, issue) for issue in analyze_file(target_path)])
+    elif target_path.is_dir():
+        for py_file in target_path.rglob("*.py"):
+            issues = analyze_file(py_file)
+            all_issues.extend([(py_file, issue) for issue in issues])
+    
+    counts = {}
+    for _, issue in all_issues:
+        counts[issue["rule"]] = counts.get(issue["rule"], 0) + 1
+    result = {
+        "target": str(target_path),
+        "counts": counts,
+        "issues": [{"path": str(file_path), **issue} for file_path, issue in all_issues],
+        "report": None,
+    }
+    if report:
+        result["report"] = str(write_report(target_path, all_issues))
+    
+    if as_json:
+        print(json.dumps(result))
+        return result
     print(f"[JULES] Analysis complete: {len(all_issues)} suggestions")
-    print(f"  Report: {report_file}")
-    return str(report_file)
+    print(f"  Report: {result['report']}")
+    return result
 
 if __name__ == "__main__":
-    target = sys.argv[1] if len(sys.argv) > 1 else "."
-    optimize(target)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Analyzes and suggests optimizations for code")
+    parser.add_argument("path", nargs="?", default=".", help="File or directory to analyze")
+    parser.add_argument("--json", action="store_true", help="Print the result as one JSON object")
+    parser.add_argument("--report", action="store_true", help="With --json, also write the report file")
+    args = parser.parse_args()
+    optimize(args.path, args.json, report=not args.json or args.report)
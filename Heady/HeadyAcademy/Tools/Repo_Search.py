@@ -0,0 +1,398 @@
+"""
+Repo_Search.py - SCOUT Tool
+Ranked full-text search over a repository through a persistent trigram index.
+
+The index is a SQLite FTS5 database per searched root under Logs/Search_Index.
+Refreshes are incremental: only files whose mtime or size changed are re-read,
+and deleted files are dropped. Changes are committed BATCH_SIZE files at a
+time, so a first index of a large tree that is interrupted (the MCP call
+timed out or was cancelled) keeps its progress and the next refresh resumes
+from there. A query refreshes the index first when it is
+older than HEADY_SEARCH_MAX_AGE seconds; run with --watch to keep it current
+from file events (watchdog) or periodic mtime sweeps instead, so queries only
+touch the index.
+
+Usage:
+    python Repo_Search.py <path> <query...> [--limit 20] [--glob "*.py"] [--json]
+    python Repo_Search.py <path> --watch [--interval 5]
+    python Repo_Search.py <path> --rebuild
+"""
+import os
+import time
+import shlex
+import json
+import hashlib
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+INDEX_DIR = Path(__file__).parent.parent / "Logs" / "Search_Index"
+MAX_AGE = float(os.environ.get("HEADY_SEARCH_MAX_AGE", 30))
+MAX_FILE_BYTES = int(os.environ.get("HEADY_SEARCH_MAX_FILE_BYTES", 1024 * 1024))
+BATCH_SIZE = 500
+
+MCP_TOOL = {
+    "name": "search_repo",
+    "description": "Ranked full-text search of repository files via a persistent index",
+    "arguments": {
+        "query": {"type": "string", "description": "Search terms; quote a phrase to match it exactly"},
+        "path": {"type": "string", "description": "Repository root to search", "default": "."},
+        "limit": {"type": "integer", "description": "Maximum results", "default": 20},
+        "glob": {"type": "string", "description": "Only paths matching this glob"},
+    },
+    "required": ["query"],
+    "argv": ["--json", {"if": "limit", "argv": ["--limit", "{limit}"]}, {"if": "glob", "argv": ["--glob", "{glob}"]},
+             "{path}", "{query}"],
+    "structured": True,
+    # The first index of a large repository reads every file
+    "timeout": 600,
+}
+
+SKIP_DIRS = {
+    ".git", ".hg", ".svn", "node_modules", "__pycache__", ".venv", "venv", ".tox", ".nox",
+    ".mypy_cache", ".pytest_cache", ".ruff_cache", ".next", ".turbo", "dist", "build",
+    "coverage", "target", "Search_Index",
+}
+SKIP_SUFFIXES = {
+    ".png", ".jpg", ".jpeg", ".gif", ".ico", ".pdf", ".zip", ".gz", ".tar", ".7z", ".exe",
+    ".dll", ".so", ".dylib", ".pyc", ".woff", ".woff2", ".ttf", ".mp3", ".mp4", ".sqlite",
+    ".db", ".lock",
+}
+
+
+def index_path(root):
+    """Index database for a search root."""
+    digest = hashlib.sha1(str(root).encode("utf-8")).hexdigest()[:12]
+    return INDEX_DIR / f"{root.name or 'root'}_{digest}.sqlite"
+
+
+def walk_files(root):
+    """Yield (relative path, absolute path, stat) for indexable files under root."""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in SKIP_DIRS:
+                        stack.append(entry.path)
+                    continue
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                if os.path.splitext(entry.name)[1].lower() in SKIP_SUFFIXES:
+                    continue
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            if st.st_size <= MAX_FILE_BYTES:
+                yield os.path.relpath(entry.path, root).replace(os.sep, "/"), entry.path, st
+
+
+def read_text(path):
+    """File contents as text, or None for binary or unreadable files."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read(MAX_FILE_BYTES + 1)
+    except OSError:
+        return None
+    if b"\0" in data[:8192]:
+        return None
+    return data.decode("utf-8", errors="replace")
+
+
+class RepoIndex:
+    """Persistent inverted (trigram) index of the text files under one root."""
+
+    def __init__(self, root, db_path=None):
+        self.root = Path(root).resolve()
+        self.db_path = Path(db_path) if db_path else index_path(self.root)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    def _create_schema(self):
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, mtime_ns INTEGER, size INTEGER)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        try:
+            self.conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS docs USING fts5(body, tokenize='trigram')")
+            self.tokenizer = "trigram"
+        except sqlite3.OperationalError:
+            # SQLite older than 3.34 has no trigram tokenizer - index words instead
+            self.conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS docs USING fts5(body)")
+            self.tokenizer = "unicode61"
+
+    def close(self):
+        self.conn.close()
+
+    def last_refresh(self):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'refreshed'").fetchone()
+        return float(row[0]) if row else 0.0
+
+    def refresh(self):
+        """Re-index changed files and drop deleted ones; returns change counts."""
+        known = {path: (file_id, mtime, size) for file_id, path, mtime, size
+                 in self.conn.execute("SELECT id, path, mtime_ns, size FROM files")}
+        changed = []
+        seen = set()
+        for rel, abs_path, st in walk_files(self.root):
+            seen.add(rel)
+            entry = known.get(rel)
+            if entry is None or entry[1] != st.st_mtime_ns or entry[2] != st.st_size:
+                changed.append((rel, abs_path, st, entry[0] if entry else None))
+        deleted = [known[path][0] for path in known.keys() - seen]
+
+        for start in range(0, len(deleted), BATCH_SIZE):
+            ids = [(i,) for i in deleted[start:start + BATCH_SIZE]]
+            with self._transaction():
+                self.conn.executemany("DELETE FROM docs WHERE rowid = ?", ids)
+                self.conn.executemany("DELETE FROM files WHERE id = ?", ids)
+        # Each batch is committed on its own, so an interrupted refresh keeps its progress
+        for start in range(0, len(changed), BATCH_SIZE):
+            with self._transaction():
+                for rel, abs_path, st, file_id in changed[start:start + BATCH_SIZE]:
+                    self._upsert(rel, abs_path, st, file_id)
+        with self._transaction():
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('refreshed', ?)", (str(time.time()),))
+        return {"indexed": len(seen), "updated": len(changed), "deleted": len(deleted)}
+
+    @contextmanager
+    def _transaction(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def _upsert(self, rel, abs_path, st, file_id=None):
+        if file_id is not None:
+            self.conn.execute("DELETE FROM docs WHERE rowid = ?", (file_id,))
+        text = read_text(abs_path)
+        # Binary files are remembered with their mtime so they are not re-read
+        cur = self.conn.execute(
+            "INSERT INTO files (path, mtime_ns, size) VALUES (?, ?, ?) "
+            "ON CONFLICT(path) DO UPDATE SET mtime_ns = excluded.mtime_ns, size = excluded.size "
+            "RETURNING id", (rel, st.st_mtime_ns, st.st_size))
+        file_id = cur.fetchone()[0]
+        if text is not None:
+            self.conn.execute("INSERT INTO docs (rowid, body) VALUES (?, ?)", (file_id, text))
+
+    def update_paths(self, paths):
+        """Apply file events for specific absolute paths."""
+        with self._transaction():
+            for path in paths:
+                try:
+                    rel = Path(path).resolve().relative_to(self.root).as_posix()
+                except ValueError:
+                    continue
+                if SKIP_DIRS.intersection(rel.split("/")):
+                    continue
+                row = self.conn.execute("SELECT id FROM files WHERE path = ?", (rel,)).fetchone()
+                try:
+                    st = os.stat(path)
+                    indexable = (Path(path).is_file() and st.st_size <= MAX_FILE_BYTES
+                                 and Path(path).suffix.lower() not in SKIP_SUFFIXES)
+                except OSError:
+                    indexable = False
+                if indexable:
+                    self._upsert(rel, path, st, row[0] if row else None)
+                elif row:
+                    self.conn.execute("DELETE FROM docs WHERE rowid = ?", (row[0],))
+                    self.conn.execute("DELETE FROM files WHERE id = ?", (row[0],))
+
+    def _match_expression(self, terms):
+        # Each term is a quoted phrase; trigram matching needs at least 3 characters
+        usable = [t for t in terms if self.tokenizer != "trigram" or len(t) >= 3]
+        return " AND ".join('"' + t.replace('"', '""') + '"' for t in usable)
+
+    def search(self, query, limit=20, glob=None):
+        """Ranked matches as dicts with path, line, text and score.
+
+        Every whitespace-separated term must match; quote a phrase to match it
+        as one term. Scores are BM25, higher is better.
+        """
+        try:
+            terms = shlex.split(query)
+        except ValueError:
+            terms = query.split()
+        terms = [t for t in terms if t]
+        if not terms:
+            return []
+        expression = self._match_expression(terms)
+        params = []
+        if expression:
+            sql = ("SELECT files.path, docs.body, bm25(docs) FROM docs JOIN files ON files.id = docs.rowid "
+                   "WHERE docs MATCH ?")
+            params.append(expression)
+        else:
+            # Only short terms - fall back to a substring scan
+            sql = "SELECT files.path, docs.body, 0.0 FROM docs JOIN files ON files.id = docs.rowid WHERE 1"
+        for term in terms:
+            if not expression or len(term) < 3:
+                sql += " AND instr(lower(docs.body), ?) > 0"
+                params.append(term.lower())
+        if glob:
+            sql += " AND files.path GLOB ?"
+            params.append(glob)
+        sql += " ORDER BY 3 LIMIT ?" if expression else " LIMIT ?"
+        params.append(limit)
+
+        results = []
+        for path, body, score in self.conn.execute(sql, params):
+            line_no, line = best_line(body, terms)
+            results.append({"path": path, "line": line_no, "text": line[:200], "score": round(-score, 3)})
+        return results
+
+    def stats(self):
+        files = self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+        return {"root": str(self.root), "files": files, "tokenizer": self.tokenizer,
+                "index": str(self.db_path), "last_refresh": self.last_refresh()}
+
+
+def best_line(body, terms, max_candidates=50):
+    """(line number, line) of the first line containing every term, else the rarest term's first line."""
+    lowered = body.lower()
+    needles = [t.lower() for t in terms]
+    anchor = max(needles, key=len)
+    pos = lowered.find(anchor)
+    first = pos
+    for _ in range(max_candidates):
+        if pos < 0:
+            break
+        start = lowered.rfind("\n", 0, pos) + 1
+        end = lowered.find("\n", pos)
+        end = len(lowered) if end == -1 else end
+        if all(n in lowered[start:end] for n in needles):
+            first = pos
+            break
+        pos = lowered.find(anchor, end)
+    if first < 0:
+        return 1, ""
+    start = body.rfind("\n", 0, first) + 1
+    end = body.find("\n", first)
+    return body.count("\n", 0, first) + 1, body[start:end if end != -1 else len(body)].strip()
+
+
+class _EventHandler(FileSystemEventHandler):
+    """Collects changed paths from watchdog events."""
+
+    def __init__(self):
+        self.paths = set()
+
+    def on_any_event(self, event):
+        if not event.is_directory:
+            self.paths.add(event.src_path)
+            if getattr(event, "dest_path", None):
+                self.paths.add(event.dest_path)
+
+
+def watch(index, interval=5.0):
+    """Keep the index current from file events, or periodic sweeps without watchdog."""
+    print(f"[SCOUT] Indexing {index.root}...")
+    counts = index.refresh()
+    print(f"[SCOUT] {counts['indexed']} files indexed, watching for changes")
+
+    if Observer is None:
+        while True:
+            time.sleep(interval)
+            counts = index.refresh()
+            if counts["updated"] or counts["deleted"]:
+                print(f"[SCOUT] {counts['updated']} updated, {counts['deleted']} removed")
+
+    handler = _EventHandler()
+    observer = Observer()
+    observer.schedule(handler, str(index.root), recursive=True)
+    observer.start()
+    try:
+        while True:
+            time.sleep(interval)
+            paths, handler.paths = handler.paths, set()
+            if paths:
+                index.update_paths(paths)
+                print(f"[SCOUT] {len(paths)} paths re-indexed")
+            index.conn.execute("INSERT OR REPLACE INTO meta VALUES ('refreshed', ?)", (str(time.time()),))
+    finally:
+        observer.stop()
+        observer.join()
+
+
+def search(target, query, limit=20, glob=None, max_age=MAX_AGE, as_json=False):
+    """Refresh the index if stale, then print ranked matches (as JSON with as_json)."""
+    root = Path(target).resolve()
+    if not root.is_dir():
+        print(f"[SCOUT] Target not found: {target}")
+        return None
+    index = RepoIndex(root)
+    refreshed = None
+    try:
+        if time.time() - index.last_refresh() > max_age:
+            start = time.perf_counter()
+            refreshed = index.refresh()
+            refreshed["seconds"] = round(time.perf_counter() - start, 3)
+            if not as_json:
+                print(f"[SCOUT] Index refreshed: {refreshed['indexed']} files, {refreshed['updated']} updated, "
+                      f"{refreshed['deleted']} removed ({refreshed['seconds']:.2f}s)")
+        start = time.perf_counter()
+        results = index.search(query, limit, glob)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+    finally:
+        index.close()
+
+    if as_json:
+        print(json.dumps({"target": str(root), "query": query, "counts": {"matches": len(results)},
+                          "matches": results, "elapsed_ms": round(elapsed_ms, 3), "refreshed": refreshed}))
+        return results
+    print(f"[SCOUT] {len(results)} matches for '{query}' in {elapsed_ms:.1f} ms")
+    for r in results:
+        print(f"  {r['path']}:{r['line']}: {r['text']}")
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Indexed repository search")
+    parser.add_argument("path", nargs="?", default=".", help="Repository root")
+    parser.add_argument("query", nargs="*", help="Search terms (all must match)")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--glob", help="Only paths matching this glob, e.g. '*.py'")
+    parser.add_argument("--watch", action="store_true", help="Keep the index updated until interrupted")
+    parser.add_argument("--interval", type=float, default=5.0, help="Watch batching/sweep interval in seconds")
+    parser.add_argument("--rebuild", action="store_true", help="Drop and rebuild the index")
+    parser.add_argument("--json", action="store_true", help="Print matches as one JSON object")
+    args = parser.parse_args()
+
+    root = Path(args.path).resolve()
+    if args.rebuild:
+        index_path(root).unlink(missing_ok=True)
+        for suffix in ("-wal", "-shm"):
+            Path(str(index_path(root)) + suffix).unlink(missing_ok=True)
+    if args.watch:
+        try:
+            watch(RepoIndex(root), args.interval)
+        except KeyboardInterrupt:
+            pass
+    elif args.query:
+        search(root, " ".join(args.query), args.limit, args.glob, as_json=args.json)
+    else:
+        index = RepoIndex(root)
+        counts = index.refresh()
+        print(f"[SCOUT] Indexed {counts['indexed']} files ({counts['updated']} updated, {counts['deleted']} removed)")
+        index.close()
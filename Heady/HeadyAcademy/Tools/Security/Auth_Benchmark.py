@@ -0,0 +1,351 @@
+"""
+Auth_Benchmark.py - Authentication Benchmark Suite
+Performance baselines for MCPAuthManager, AuthProtocol and KeyManager.
+
+Every suite runs against a temporary Vault directory, never the real one.
+Each case is repeated for a fixed time budget and reported as ops/sec and
+microseconds per op:
+
+- mcp: token issuance and validation for bearer, api_key and jwt (jwt with
+  and without the verified-token cache), session validation, server status
+  (after all of that issuance), issuance and session validation with
+  stateless signed session tokens, expired-session cleanup at 10k/100k/1M
+  sessions (10% of them expired), and construction with an empty Vault and
+  with persisted sessions, on the session store chosen with --store. Rate
+  limits are lifted so the auth paths are measured rather than the throttle.
+- protocol: AuthProtocol JWT and MCP header issuance/validation, construction.
+- keys: KeyManager construction (key derivation) and key add/get.
+
+Suites whose dependencies are not installed, or whose module fails to import,
+are recorded as skipped.
+Results are written as JSON under Logs/Benchmarks for regression tracking;
+--compare prints each metric's change against a previous run.
+
+Usage:
+    python Auth_Benchmark.py [--budget 0.5] [--sizes 10000,100000,1000000]
+                             [--suites mcp,protocol,keys] [--store journal|sqlite]
+                             [--output path] [--compare previous.json]
+"""
+import io
+import os
+import json
+import time
+import atexit
+import secrets
+import platform
+import importlib
+import tempfile
+import contextlib
+import subprocess
+from datetime import datetime
+from pathlib import Path
+
+# The background reaper would race the cleanup measurements
+os.environ.setdefault("HEADY_MCP_SESSION_REAP_INTERVAL", "0")
+
+OUTPUT_DIR = Path(__file__).parent.parent.parent / "Logs" / "Benchmarks"
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+SUITES = ("mcp", "protocol", "keys")
+EXPIRED_FRACTION = 0.1
+PERSISTED_SESSIONS = 10_000
+BENCH_KEY = secrets.token_urlsafe(32)
+# Metrics compared across runs, and whether higher is better
+TRACKED = {"ops_per_sec": True, "us_per_op": False, "cleanup_ms": False, "idle_sweep_ms": False}
+
+
+def _load(module_name):
+    """Import a sibling module; raises ImportError if it or a dependency cannot be imported.
+
+    Any other import-time failure (a SyntaxError, say) is raised as ImportError
+    too, so the suite is recorded as skipped instead of aborting the run.
+    """
+    try:
+        if __package__:
+            return importlib.import_module(f".{module_name}", __package__)
+        return importlib.import_module(module_name)
+    except ImportError:
+        raise
+    except Exception as e:
+        raise ImportError(f"{module_name} failed to import: {type(e).__name__}: {e}") from e
+
+
+def _result(ops, elapsed):
+    return {"ops": ops, "ops_per_sec": round(ops / elapsed, 1), "us_per_op": round(elapsed / ops * 1e6, 3)}
+
+
+def measure(fn, budget):
+    """Call fn repeatedly (in growing batches) for about budget seconds."""
+    fn()
+    ops, batch = 0, 1
+    start = time.perf_counter()
+    while True:
+        for _ in range(batch):
+            fn()
+        ops += batch
+        elapsed = time.perf_counter() - start
+        if elapsed >= budget:
+            return _result(ops, elapsed)
+        batch = min(batch * 2, 10_000)
+
+
+def measure_construct(make, budget, max_ops=200):
+    """Time make() alone; each instance is closed (if it can be) outside the timing."""
+    ops, elapsed = 0, 0.0
+    while ops < max_ops and (elapsed < budget or ops == 0):
+        start = time.perf_counter()
+        instance = make()
+        elapsed += time.perf_counter() - start
+        ops += 1
+        close = getattr(instance, "close", None)
+        if close is not None:
+            close()
+            atexit.unregister(close)
+    return _result(ops, elapsed)
+
+
+def _unthrottle(auth):
+    # A benchmark hammers one client and one source on purpose
+    security = auth.config["security"]
+    for kind in ("client", "source"):
+        security[f"{kind}_rate"] = security[f"{kind}_burst"] = 1e9
+    auth._init_throttle()
+
+
+def _close(auth):
+    auth.close()
+    atexit.unregister(auth.close)
+
+
+# Suites
+
+def mcp_suite(budget, sizes, store):
+    MCPAuthManager = _load("MCP_Auth").MCPAuthManager
+    SessionRecord = _load("Session_Store").SessionRecord
+    results = {}
+
+    with tempfile.TemporaryDirectory(prefix="heady_auth_bench_") as vault:
+        auth = MCPAuthManager(master_key=BENCH_KEY, vault_dir=vault, session_store=store)
+        _unthrottle(auth)
+        try:
+            for server, auth_type in (("heady_bridge", "bearer"), ("heady_nova", "api_key"),
+                                      ("heady_oculus", "jwt")):
+                key = auth.generate_server_key(server)
+                try:
+                    issued = auth.generate_client_token("heady_master", server)
+                except ImportError as e:
+                    results[auth_type] = {"skipped": str(e)}
+                    continue
+                auth_data = {"token": key} if auth_type == "bearer" else issued["auth_data"]
+                if not auth.validate_server_connection(server, auth_data):
+                    raise RuntimeError(f"{auth_type} credentials did not validate")
+
+                entry = {
+                    "issue": measure(lambda: auth.generate_client_token("heady_master", server), budget),
+                    "validate": measure(lambda: auth.validate_server_connection(server, auth_data), budget),
+                }
+                if auth_type == "jwt":
+                    cache = auth._token_cache
+                    maxsize, cache.maxsize = cache.maxsize, 0
+                    try:
+                        entry["validate_uncached"] = measure(
+                            lambda: auth.validate_server_connection(server, auth_data), budget)
+                    finally:
+                        cache.maxsize = maxsize
+                results[auth_type] = entry
+
+            session_id = auth.generate_client_token("heady_master", "heady_bridge")["session_id"]
+            results["session_validate"] = measure(lambda: auth.validate_client_session(session_id), budget)
+            results["server_status"] = measure(lambda: auth.get_server_status("heady_bridge"), budget)
+        finally:
+            _close(auth)
+
+    with tempfile.TemporaryDirectory(prefix="heady_auth_bench_") as vault:
+        auth = MCPAuthManager(master_key=BENCH_KEY, vault_dir=vault, session_store=store,
+                              stateless_sessions=True)
+        try:
+            session_id = auth.generate_client_token("heady_master", "heady_bridge")["session_id"]
+            results["stateless"] = {
+                "issue": measure(lambda: auth.generate_client_token("heady_master", "heady_bridge"), budget),
+                "session_validate": measure(lambda: auth.validate_client_session(session_id), budget),
+            }
+        finally:
+            _close(auth)
+
+    # Sessions are inserted directly: issuing a million tokens would benchmark issuance
+    results["cleanup"] = {}
+    for size in sizes:
+        with tempfile.TemporaryDirectory(prefix="heady_auth_bench_") as vault:
+            auth = MCPAuthManager(master_key=BENCH_KEY, vault_dir=vault, session_store=store)
+            try:
+                timeout = auth.config["security"]["session_timeout"]
+                now = time.time()
+                expired = int(size * EXPIRED_FRACTION)
+                auth_data = {"type": "bearer", "token": secrets.token_urlsafe(32), "expires": now + 3600}
+                auth.client_sessions.put_many(
+                    (secrets.token_urlsafe(16),
+                     SessionRecord("heady_master", "heady_bridge", auth_data, last, last))
+                    for last in (now - timeout - 1 if i < expired else now for i in range(size)))
+
+                start = time.perf_counter()
+                removed = auth.cleanup_expired_sessions()
+                cleanup_ms = (time.perf_counter() - start) * 1000
+                start = time.perf_counter()
+                auth.cleanup_expired_sessions()
+                idle_ms = (time.perf_counter() - start) * 1000
+                results["cleanup"][str(size)] = {"sessions": size, "expired": removed,
+                                                 "cleanup_ms": round(cleanup_ms, 3),
+                                                 "idle_sweep_ms": round(idle_ms, 3)}
+            finally:
+                _close(auth)
+
+    with tempfile.TemporaryDirectory(prefix="heady_auth_bench_") as vault:
+        make = lambda: MCPAuthManager(master_key=BENCH_KEY, vault_dir=vault, session_store=store)
+        _close(make())
+        results["construct"] = {"empty": measure_construct(make, budget)}
+        auth = make()
+        try:
+            for _ in range(PERSISTED_SESSIONS):
+                auth.generate_client_token("heady_master", "heady_bridge")
+            auth._save_sessions()
+        finally:
+            _close(auth)
+        results["construct"][f"sessions_{PERSISTED_SESSIONS}"] = measure_construct(make, budget)
+
+    return results
+
+
+def protocol_suite(budget, sizes, store):
+    AuthProtocol = _load("Auth_Protocol").AuthProtocol
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="heady_auth_bench_") as vault:
+        protocol = AuthProtocol(master_key=BENCH_KEY, vault_dir=vault)
+        token = protocol.generate_jwt_token("bench_user")
+        results["jwt"] = {
+            "issue": measure(lambda: protocol.generate_jwt_token("bench_user"), budget),
+            "validate": measure(lambda: protocol.validate_jwt_token(token), budget),
+        }
+        for server, method in (("heady_bridge", "bearer"), ("heady_nova", "api_key")):
+            issue = measure(lambda: protocol.generate_mcp_auth(server, method), budget)
+            # Bearer validation checks the most recently issued token
+            headers = protocol.generate_mcp_auth(server, method)
+            results[f"mcp_{method}"] = {
+                "issue": issue,
+                "validate": measure(lambda: protocol.validate_mcp_auth(server, headers), budget),
+            }
+        results["construct"] = measure_construct(lambda: AuthProtocol(master_key=BENCH_KEY, vault_dir=vault), budget)
+    return results
+
+
+def keys_suite(budget, sizes, store):
+    KeyManager = _load("Key_Manager").KeyManager
+    results = {}
+    password = secrets.token_urlsafe(16)
+    api_key = secrets.token_hex(20)
+    with tempfile.TemporaryDirectory(prefix="heady_auth_bench_") as vault, \
+            contextlib.redirect_stdout(io.StringIO()):
+        manager = KeyManager(password, vault_dir=vault)
+        results["add_key"] = measure(lambda: manager.add_key("gemini", api_key), budget)
+        results["get_key"] = measure(lambda: manager.get_key("gemini"), budget)
+        results["construct"] = measure_construct(lambda: KeyManager(password, vault_dir=vault), budget)
+    return results
+
+
+SUITE_FUNCS = {"mcp": ("mcp_auth", mcp_suite), "protocol": ("auth_protocol", protocol_suite),
+               "keys": ("key_manager", keys_suite)}
+
+
+# Results
+
+def git_revision():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).parent,
+                                capture_output=True, text=True)
+        return result.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_benchmark(budget=0.5, sizes=DEFAULT_SIZES, suites=SUITES, store="journal"):
+    """Run the selected suites and return the result document."""
+    results = {}
+    for suite in suites:
+        name, func = SUITE_FUNCS[suite]
+        try:
+            results[name] = func(budget, sizes, store)
+        except ImportError as e:
+            results[name] = {"skipped": str(e)}
+    return {
+        "benchmark": "auth",
+        "timestamp": datetime.now().isoformat(),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "config": {"budget_s": budget, "sizes": list(sizes), "suites": list(suites),
+                   "session_store": store, "expired_fraction": EXPIRED_FRACTION},
+        "results": results,
+    }
+
+
+def flatten(results, prefix=""):
+    """Tracked metrics as {"suite.case.metric": value}."""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, path))
+        elif key in TRACKED and isinstance(value, (int, float)):
+            flat[path] = value
+    return flat
+
+
+def save_results(doc, path=None):
+    if path is None:
+        OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = OUTPUT_DIR / f"auth_{doc['revision'] or 'local'}_{stamp}.json"
+    path = Path(path)
+    path.write_text(json.dumps(doc, indent=2), encoding="utf-8")
+    return path
+
+
+def print_results(doc, baseline=None):
+    print(f"Auth benchmark: budget {doc['config']['budget_s']}s per case, Python {doc['python']}, "
+          f"{doc['cpus']} CPUs")
+    old = flatten(baseline["results"]) if baseline else {}
+    for suite, results in doc["results"].items():
+        if "skipped" in results:
+            print(f"  {suite:<48} skipped: {results['skipped']}")
+    for path, value in flatten(doc["results"]).items():
+        line = f"  {path:<48} {value:>14,.3f}"
+        if old.get(path):
+            change = (value / old[path] - 1) * 100
+            better = (change > 0) == TRACKED[path.rsplit(".", 1)[1]]
+            line += f"   {change:+.1f}% {'better' if better else 'worse'} vs {baseline.get('revision') or 'baseline'}"
+        print(line)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Authentication benchmark suite")
+    parser.add_argument("--budget", type=float, default=0.5, help="Seconds per measured case")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="Session counts for the cleanup benchmark")
+    parser.add_argument("--suites", default=",".join(SUITES), help=f"Any of {', '.join(SUITES)}")
+    parser.add_argument("--store", choices=("journal", "sqlite"), default="journal",
+                        help="MCPAuthManager session store")
+    parser.add_argument("--output", help="Result JSON path (default: Logs/Benchmarks/...)")
+    parser.add_argument("--compare", help="Previous result JSON to compare against")
+    args = parser.parse_args()
+
+    suites = [s.strip() for s in args.suites.split(",") if s.strip()]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        parser.error(f"Unknown suites: {', '.join(sorted(unknown))}")
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+
+    doc = run_benchmark(args.budget, sizes, suites, args.store)
+    baseline = json.loads(Path(args.compare).read_text(encoding="utf-8")) if args.compare else None
+    print_results(doc, baseline)
+    print(f"  Results: {save_results(doc, args.output)}")
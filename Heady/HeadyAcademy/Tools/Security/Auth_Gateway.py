@@ -0,0 +1,369 @@
+"""
+Auth_Gateway.py - MCP WebSocket Auth Gateway
+Asyncio front door that authenticates and holds WebSocket connections for the
+MCP servers in the auth config, through MCPAuthManager.
+
+Each configured server gets a listener on its configured port. A connection:
+
+1. takes a slot against the server's max_connections; over the limit it is
+   closed with 1013 (try again later) before its auth message is read;
+2. sends its auth payload to MCPAuthManager.authenticate_websocket, which
+   checks rate limits and lockouts on the loop and runs signature checks
+   and session writes in a thread, so a handshake never blocks other
+   connections;
+3. stays open until it closes, misses heartbeats, or its session is revoked
+   or expires. Its session is revoked, off the loop, when it disconnects.
+
+Heartbeats are one sweep per interval over every connection instead of a
+timer per connection: the sweep pings each socket, drops those whose last
+pong is older than interval + timeout, and refreshes each live session so
+held connections do not time out. Sessions are checked in one batch on a
+worker thread, off the event loop. Clients that cannot see ping frames may
+send {"type": "heartbeat"} and get {"type": "heartbeat_ack"}.
+
+Usage:
+    python Auth_Gateway.py [--servers heady_bridge,heady_nova] [--host 127.0.0.1]
+    python Auth_Gateway.py --load-test [--server heady_bridge] [--connections 2000] [--concurrency 200] [--json]
+"""
+import os
+import json
+import time
+import asyncio
+import secrets
+import tempfile
+
+import websockets
+
+try:
+    from .MCP_Auth import MCPAuthManager
+except ImportError:
+    from MCP_Auth import MCPAuthManager
+
+HEARTBEAT_INTERVAL = float(os.environ.get("HEADY_MCP_HEARTBEAT_INTERVAL", 30))
+HEARTBEAT_TIMEOUT = float(os.environ.get("HEADY_MCP_HEARTBEAT_TIMEOUT", 10))
+# Listen backlog; connection storms queue here instead of being refused
+BACKLOG = int(os.environ.get("HEADY_MCP_GATEWAY_BACKLOG", 2048))
+MAX_MESSAGE_BYTES = 64 * 1024
+
+
+class _Connection:
+    __slots__ = ("websocket", "last_seen")
+
+    def __init__(self, websocket, now):
+        self.websocket = websocket
+        self.last_seen = now
+
+
+class AuthGateway:
+    """WebSocket listeners that authenticate and hold MCP client connections."""
+
+    def __init__(self, auth, servers=None, host="127.0.0.1", ports=None, handler=None,
+                 heartbeat_interval=HEARTBEAT_INTERVAL, heartbeat_timeout=HEARTBEAT_TIMEOUT):
+        configured = auth.config.get("servers", {})
+        servers = list(servers or configured)
+        unknown = [name for name in servers if name not in configured]
+        if unknown:
+            raise ValueError(f"Unknown server: {', '.join(unknown)}")
+
+        self.auth = auth
+        self.host = host
+        self.ports = {name: (ports or {}).get(name, configured[name].get("port", 0)) for name in servers}
+        self.max_connections = {name: configured[name].get("max_connections") for name in servers}
+        # Optional coroutine(websocket, session_id, server_name) run after auth
+        self.handler = handler
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        # Connections holding a slot, handshaking or authenticated
+        self.slots = {name: 0 for name in servers}
+        # server -> session_id -> _Connection for authenticated connections
+        self.live = {name: {} for name in servers}
+        self.stats = {name: {"accepted": 0, "rejected_full": 0, "auth_failed": 0,
+                             "heartbeat_timeouts": 0, "sessions_ended": 0} for name in servers}
+        self._servers = []
+        self._heartbeat = None
+
+    def _handler_for(self, server_name):
+        async def handle(websocket, path=None):
+            await self._handle(websocket, server_name)
+        return handle
+
+    async def _handle(self, websocket, server_name):
+        limit = self.max_connections[server_name]
+        if limit is not None and self.slots[server_name] >= limit:
+            self.stats[server_name]["rejected_full"] += 1
+            await websocket.close(code=1013, reason="Server at max_connections")
+            return
+
+        self.slots[server_name] += 1
+        session_id = None
+        try:
+            session_id = await self.auth.authenticate_websocket(websocket, server_name)
+            if not session_id:
+                self.stats[server_name]["auth_failed"] += 1
+                await websocket.close(code=4401, reason="Unauthorized")
+                return
+
+            self.stats[server_name]["accepted"] += 1
+            conn = _Connection(websocket, asyncio.get_running_loop().time())
+            self.live[server_name][session_id] = conn
+            if self.handler is not None:
+                await self.handler(websocket, session_id, server_name)
+            else:
+                await self._hold(conn)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.slots[server_name] -= 1
+            if session_id:
+                self.live[server_name].pop(session_id, None)
+                # Revoking writes to the session store, which may be SQLite
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(None, self.auth.revoke_session, session_id)
+
+    async def _hold(self, conn):
+        loop = asyncio.get_running_loop()
+        async for message in conn.websocket:
+            conn.last_seen = loop.time()
+            try:
+                kind = json.loads(message).get("type")
+            except (ValueError, AttributeError):
+                continue
+            if kind == "heartbeat":
+                await conn.websocket.send('{"type": "heartbeat_ack"}')
+
+    # Heartbeats
+
+    @staticmethod
+    async def _ping(conn):
+        loop = asyncio.get_running_loop()
+        pong_waiter = await conn.websocket.ping()
+
+        def on_pong(waiter):
+            if not waiter.cancelled() and waiter.exception() is None:
+                conn.last_seen = loop.time()
+        pong_waiter.add_done_callback(on_pong)
+
+    def _ended_sessions(self, session_ids):
+        """Ids among session_ids whose session is revoked or expired (refreshes the rest)."""
+        return {session_id for session_id in session_ids
+                if self.auth.validate_client_session(session_id) is None}
+
+    async def sweep(self):
+        """One heartbeat round over every connection; returns how many were dropped."""
+        loop = asyncio.get_running_loop()
+        stale = loop.time() - self.heartbeat_interval - self.heartbeat_timeout
+        drop = []
+        fresh = []
+        for server_name, live in self.live.items():
+            for session_id, conn in live.items():
+                if conn.last_seen < stale:
+                    self.stats[server_name]["heartbeat_timeouts"] += 1
+                    drop.append((server_name, session_id, 1011, "Heartbeat timeout"))
+                else:
+                    fresh.append((server_name, session_id))
+
+        # Session lookups may hit disk; one batch in a thread keeps the loop free
+        ended = await loop.run_in_executor(None, self._ended_sessions, [sid for _, sid in fresh])
+        pending = []
+        for server_name, session_id in fresh:
+            if session_id in ended:
+                self.stats[server_name]["sessions_ended"] += 1
+                drop.append((server_name, session_id, 4401, "Session expired"))
+            else:
+                conn = self.live[server_name].get(session_id)
+                if conn is not None:
+                    pending.append(self._ping(conn))
+
+        dropped = 0
+        for server_name, session_id, code, reason in drop:
+            # The connection may have closed while sessions were checked
+            conn = self.live[server_name].pop(session_id, None)
+            if conn is not None:
+                dropped += 1
+                pending.append(conn.websocket.close(code=code, reason=reason))
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        return dropped
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                print(f"Gateway heartbeat error: {e}")
+
+    # Lifecycle
+
+    async def start(self):
+        """Bind a listener per server and start the heartbeat sweep."""
+        for server_name, port in self.ports.items():
+            server = await websockets.serve(self._handler_for(server_name), self.host, port,
+                                            max_size=MAX_MESSAGE_BYTES, ping_interval=None,
+                                            backlog=BACKLOG)
+            self.ports[server_name] = next(iter(server.sockets)).getsockname()[1]
+            self._servers.append(server)
+        if self.heartbeat_interval > 0:
+            self._heartbeat = asyncio.ensure_future(self._heartbeat_loop())
+
+    async def close(self):
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        self._servers = []
+
+    def status(self):
+        return {name: {"port": self.ports[name], "connections": len(self.live[name]),
+                       "slots": self.slots[name], "max_connections": self.max_connections[name],
+                       **self.stats[name]}
+                for name in self.ports}
+
+    async def serve_forever(self):
+        await self.start()
+        print("MCP auth gateway")
+        for name, port in self.ports.items():
+            print(f"  {name:<14} ws://{self.host}:{port}  (max_connections: {self.max_connections[name]})")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await self.close()
+
+
+# Load test
+
+def _raise_fd_limit(needed):
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != resource.RLIM_INFINITY and soft < needed:
+        target = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+
+
+async def load_test(server_name="heady_bridge", connections=2000, concurrency=200):
+    """Open `connections` authenticated WebSockets to a local gateway; returns a results dict.
+
+    Uses a throwaway Vault, and lifts the server's max_connections and the
+    rate limits so every handshake is measured. Client and gateway share this
+    event loop, so handshakes/sec is a lower bound for the gateway alone.
+    """
+    _raise_fd_limit(2 * connections + 256)
+    with tempfile.TemporaryDirectory(prefix="heady_gateway_") as vault:
+        auth = MCPAuthManager(master_key=secrets.token_urlsafe(32), vault_dir=vault)
+        try:
+            auth.config["servers"][server_name]["max_connections"] = connections
+            security = auth.config["security"]
+            for kind in ("client", "source"):
+                security[f"{kind}_rate"] = security[f"{kind}_burst"] = connections
+            auth._init_throttle()
+
+            key = auth.generate_server_key(server_name)
+            if auth.server_keys[server_name]["auth_type"] == "bearer":
+                auth_data = {"token": key}
+            else:
+                auth_data = auth.generate_client_token("heady_master", server_name)["auth_data"]
+            message = json.dumps(auth_data, default=str)
+
+            gateway = AuthGateway(auth, [server_name], ports={server_name: 0}, heartbeat_interval=0)
+            await gateway.start()
+            uri = f"ws://127.0.0.1:{gateway.ports[server_name]}"
+
+            latencies, failures, held = [], {}, []
+            remaining = iter(range(connections))
+
+            async def client():
+                for _ in remaining:
+                    started = time.perf_counter()
+                    try:
+                        ws = await websockets.connect(uri, ping_interval=None, open_timeout=60)
+                        await ws.send(message)
+                        reply = json.loads(await ws.recv())
+                    except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as e:
+                        failures[type(e).__name__] = failures.get(type(e).__name__, 0) + 1
+                        continue
+                    if reply.get("type") != "auth_success":
+                        failures[reply.get("message")] = failures.get(reply.get("message"), 0) + 1
+                        await ws.close()
+                        continue
+                    latencies.append(time.perf_counter() - started)
+                    held.append(ws)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(client() for _ in range(min(concurrency, connections))))
+            elapsed = time.perf_counter() - started
+
+            # One heartbeat round with every connection still open
+            gateway.heartbeat_interval = HEARTBEAT_INTERVAL
+            sweep_started = time.perf_counter()
+            await gateway.sweep()
+            sweep_ms = (time.perf_counter() - sweep_started) * 1000
+            open_connections = len(gateway.live[server_name])
+
+            await asyncio.gather(*(ws.close() for ws in held), return_exceptions=True)
+            await gateway.close()
+        finally:
+            auth.close()
+
+    latencies.sort()
+    pick = lambda q: round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 2) if latencies else None
+    return {
+        "server": server_name,
+        "auth_type": auth.server_keys[server_name]["auth_type"],
+        "connections": connections,
+        "concurrency": concurrency,
+        "authenticated": len(latencies),
+        "failures": failures,
+        "seconds": round(elapsed, 3),
+        "handshakes_per_sec": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "latency_ms": {"p50": pick(0.50), "p99": pick(0.99), "max": pick(1.0)},
+        "held_open": open_connections,
+        "heartbeat_sweep_ms": round(sweep_ms, 2),
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="HeadyAcademy MCP WebSocket auth gateway")
+    parser.add_argument("--servers", help="Comma-separated servers to serve (default: all configured)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--load-test", action="store_true", help="Run a localhost handshake load test")
+    parser.add_argument("--server", default="heady_bridge", help="Server to load test")
+    parser.add_argument("--connections", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="Print load test results as JSON")
+    args = parser.parse_args()
+
+    if args.load_test:
+        results = asyncio.run(load_test(args.server, args.connections, args.concurrency))
+        if args.json:
+            print(json.dumps(results, indent=2))
+            return
+        print(f"Gateway load test: {results['server']} ({results['auth_type']})")
+        print(f"  Authenticated:  {results['authenticated']}/{results['connections']} "
+              f"at concurrency {results['concurrency']} in {results['seconds']}s")
+        print(f"  Handshakes/sec: {results['handshakes_per_sec']}")
+        print(f"  Latency (ms):   p50 {results['latency_ms']['p50']}  p99 {results['latency_ms']['p99']}"
+              f"  max {results['latency_ms']['max']}")
+        print(f"  Heartbeat sweep over {results['held_open']} open connections: {results['heartbeat_sweep_ms']} ms")
+        if results["failures"]:
+            print(f"  Failures:       {results['failures']}")
+        return
+
+    auth = MCPAuthManager()
+    servers = args.servers.split(",") if args.servers else None
+    try:
+        asyncio.run(AuthGateway(auth, servers, host=args.host).serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        auth.close()
+
+
+if __name__ == "__main__":
+    main()
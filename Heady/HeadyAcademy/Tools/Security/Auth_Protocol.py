@@ -23,24 +23,27 @@ AUTH_CONFIG = VAULT_DIR / "auth_config.json"
 class AuthProtocol:
     """Main authentication protocol handler."""
     
-    def __init__(self, master_key=None):
+    def __init__(self, master_key=None, vault_dir=None):
         self.master_key = master_key or os.environ.get("HEADY_SIGNATURE_KEY")
+        self.vault_dir = Path(vault_dir) if vault_dir else VAULT_DIR
+        self.token_file = self.vault_dir / TOKEN_FILE.name
+        self.config_file = self.vault_dir / AUTH_CONFIG.name
         self.tokens = {}
         self.config = {}
         self._initialize()
     
     def _initialize(self):
         """Initialize authentication system."""
-        VAULT_DIR.mkdir(parents=True, exist_ok=True)
+        self.vault_dir.mkdir(parents=True, exist_ok=True)
         
         # Load existing tokens
-        if TOKEN_FILE.exists():
-            with open(TOKEN_FILE, 'r') as f:
+        if self.token_file.exists():
+            with open(self.token_file, 'r') as f:
                 self.tokens = json.load(f)
         
         # Load auth configuration
-        if AUTH_CONFIG.exists():
-            with open(AUTH_CONFIG, 'r') as f:
+        if self.config_file.exists():
+            with open(self.config_file, 'r') as f:
                 self.config = json.load(f)
         else:
             self.config = self._default_config()
@@ -290,12 +293,12 @@ class AuthProtocol:
     
     def _save_tokens(self):
         """Save tokens to file."""
-        with open(TOKEN_FILE, 'w') as f:
+        with open(self.token_file, 'w') as f:
             json.dump(self.tokens, f, indent=2)
     
     def _save_config(self):
         """Save configuration to file."""
-        with open(AUTH_CONFIG, 'w') as f:
+        with open(self.config_file, 'w') as f:
             json.dump(self.config, f, indent=2)
 
 def main():
@@ -71,8 +71,11 @@ API_CONFIGS = {
 }
 
 class KeyManager:
-    def __init__(self, master_password=None):
+    def __init__(self, master_password=None, vault_dir=None):
         self.master_password = master_password or os.environ.get("HEADY_MASTER_KEY")
+        self.vault_dir = Path(vault_dir) if vault_dir else VAULT_DIR
+        self.keys_file = self.vault_dir / KEYS_FILE.name
+        self.config_file = self.vault_dir / CONFIG_FILE.name
         self.fernet = None
         self.keys = {}
         self.config = {}
@@ -80,7 +83,7 @@ class KeyManager:
     
     def _initialize(self):
         """Initialize encryption and load existing keys."""
-        VAULT_DIR.mkdir(parents=True, exist_ok=True)
+        self.vault_dir.mkdir(parents=True, exist_ok=True)
         
         if not self.master_password:
             raise ValueError("Master password required. Set HEADY_MASTER_KEY environment variable.")
@@ -96,13 +99,13 @@ class KeyManager:
         self.fernet = Fernet(key)
         
         # Load existing configuration
-        if CONFIG_FILE.exists():
-            with open(CONFIG_FILE, 'r') as f:
+        if self.config_file.exists():
+            with open(self.config_file, 'r') as f:
                 self.config = json.load(f)
         
         # Load encrypted keys
-        if KEYS_FILE.exists():
-            with open(KEYS_FILE, 'rb') as f:
+        if self.keys_file.exists():
+            with open(self.keys_file, 'rb') as f:
                 encrypted_data = f.read()
                 decrypted_data = self.fernet.decrypt(encrypted_data)
                 self.keys = json.loads(decrypted_data.decode())
@@ -203,7 +206,7 @@ class KeyManager:
     def generate_env_file(self, output_path=None):
         """Generate .env file with all keys."""
         if not output_path:
-            output_path = VAULT_DIR / ".env"
+            output_path = self.vault_dir / ".env"
         
         env_content = [
             "# Heady Academy API Keys",
@@ -247,12 +250,12 @@ class KeyManager:
     def _save_keys(self):
         """Save encrypted keys to file."""
         encrypted_data = self.fernet.encrypt(json.dumps(self.keys).encode())
-        with open(KEYS_FILE, 'wb') as f:
+        with open(self.keys_file, 'wb') as f:
             f.write(encrypted_data)
     
     def _save_config(self):
         """Save configuration to file."""
-        with open(CONFIG_FILE, 'w') as f:
+        with open(self.config_file, 'w') as f:
             json.dump(self.config, f, indent=2)
 
 def main():
@@ -6,514 +6,121 @@ Features:
 - Server key generation and validation
 - Client session management with automatic expiration
 - Secure token-based authentication (Bearer, API Key, JWT)
-- Session cleanup and optimization utilities
-- System integrity validation
-- WebSocket authentication support
-- Comprehensive final scan and optimization
-- Automatic expired session cleanup
-- Server key regeneration for unconfigured servers
-- Memory optimization through inactive session removal
+- Rate limits and lockouts for failed authentication attempts
+- Background cleanup of expired sessions
 
 Usage:
-    from Tools.Security.MCP_Auth import MCPAuthManager, validate_and_optimize_mcp_system
-    
-    # Initialize auth manager
-    auth = MCPAuthManager()
-    
-    # Generate server credentials
-    server_key = auth.generate_server_key("my_server")
-    
-    # Create client token
-    token_data = auth.generate_client_token("client_1", "my_server")
-    
-    # Validate client session
-    session = auth.validate_client_session(session_id)
-    
-    # Run system optimization
-    results = validate_and_optimize_mcp_system()
-    
-    # Perform final scan and optimization
-    final_results = perform_final_scan_and_optimization()
-    
-    # Direct method call for optimization
-    optimization_stats = auth.final_scan_and_optimize()
-
-Security Notes:
-- Master key should be set via HEADY_MCP_KEY environment variable
-- Tokens expire based on configured session_timeout (default: 3600s)
-- API key signatures include timestamp to prevent replay attacks (5-minute window)
-- JWT tokens are signed with HS256 algorithm
-- All sensitive data stored in encrypted vault directory
-- Automatic cleanup of stale sessions prevents memory leaks
-
-Optimization Features:
-- Expired session cleanup on startup and periodic intervals
-- Inactive session removal to free memory
-- Server key validation and regeneration
-- Critical file integrity verification
-- Oversized file detection and logging
-- System resource monitoring (memory, disk usage)
-- Security audit for vault file permissions
-"""
-MCP_Auth.py - MCP Server/Client Authentication System
-Handles secure authentication for Model Context Protocol servers and clients.
-
-Features:
-- Server key generation and validation
-- Client session management with automatic expiration
-- Secure token-based authentication (Bearer, API Key, JWT)
-- Session cleanup and optimization utilities
-- System integrity validation
-- WebSocket authentication support
-- Comprehensive final scan and optimization
-- Automatic expired session cleanup
-- Server key regeneration for unconfigured servers
-- Memory optimization through inactive session removal
+    from Tools.Security.MCP_Auth import MCPAuthManager
 
-Usage:
-    from Tools.Security.MCP_Auth import MCPAuthManager, validate_and_optimize_mcp_system
-    
     # Initialize auth manager
     auth = MCPAuthManager()
-    
+
     # Generate server credentials
     server_key = auth.generate_server_key("my_server")
-    
+
     # Create client token
     token_data = auth.generate_client_token("client_1", "my_server")
-    
+
     # Validate client session
     session = auth.validate_client_session(session_id)
-    
-    # Run system optimization
-    results = validate_and_optimize_mcp_system()
-    
-    # Perform final scan and optimization
-    final_results = perform_final_scan_and_optimization()
-    
-    # Direct method call for optimization
-    optimization_stats = auth.final_scan_and_optimize()
+
+    # Remove expired sessions
+    removed = auth.cleanup_expired_sessions()
 
 Security Notes:
 - Master key should be set via HEADY_MCP_KEY environment variable
-- Tokens expire based on configured session_timeout (default: 3600s)
+- Tokens expire after the configured token_expiry (default: 3600s); idle sessions after session_timeout (7200s)
 - API key signatures include timestamp to prevent replay attacks (5-minute window)
 - JWT tokens are signed with HS256 algorithm
 - All sensitive data stored in encrypted vault directory
 - Automatic cleanup of stale sessions prevents memory leaks
-
-Optimization Features:
-- Expired session cleanup on startup and periodic intervals
-- Inactive session removal to free memory
-- Server key validation and regeneration
-- Critical file integrity verification
-- Oversized file detection and logging
-- System resource monitoring (memory, disk usage)
-- Security audit for vault file permissions
-
-Final Scan and Optimization:
-- Validates all critical system files exist and are accessible
-- Cleans up expired sessions automatically on startup
-- Regenerates missing server keys for configured servers
-- Removes inactive sessions to optimize memory usage
-- Monitors system resources (memory, disk) for performance issues
-- Performs security audit on vault file permissions
-- Logs warnings for oversized files in playground directory
-- Validates wrapper script execute permissions
-"""
-"""
-MCP_Auth.py - MCP Server/Client Authentication System
-
-This module provides comprehensive authentication management for MCP servers and clients,
-including session management, token validation, and system optimization utilities.
-
-Key Features:
-- Secure server key generation using cryptographic hashing
-- Client session lifecycle management with automatic expiration
-- Multiple authentication methods (Bearer tokens, API keys, JWT)
-- Automatic cleanup of expired and inactive sessions
-- System integrity validation and optimization
-def perform_final_scan_and_optimization():
-    """Perform comprehensive final scan and optimization of the MCP authentication system."""
-    results = validate_and_optimize_mcp_system()
-    
-    try:
-        mcp_auth = MCPAuthManager()
-        
-        # Verify all critical files exist and are accessible
-        critical_files = [
-            VAULT_DIR / "mcp_config.json",
-            VAULT_DIR / "mcp_sessions.json",
-            VAULT_DIR / "mcp_server_keys.json"
-        ]
-        
-        for file_path in critical_files:
-            if not file_path.exists():
-                results["errors"].append(f"Missing critical file: {file_path.name}")
-            elif not os.access(file_path, os.R_OK | os.W_OK):
-                results["errors"].append(f"Critical file not accessible: {file_path.name}")
-        
-        # Final integrity and optimization check
-        auth_result = perform_final_system_check()
-        results["final_check"] = auth_result
-        
-        # System resource monitoring
-        if hasattr(os, 'statvfs'):
-            stat = os.statvfs(VAULT_DIR)
-            free_space_gb = (stat.f_bavail * stat.f_frsize) / (1024**3)
-            if free_space_gb < 1:
-                results.setdefault("warnings", []).append(f"Low disk space: {free_space_gb:.2f}GB available")
-        
-        # Memory and performance optimization
-        if len(mcp_auth.client_sessions) > 1000:
-            inactive = [sid for sid, s in mcp_auth.client_sessions.items() if not s.get("active")]
-            for sid in inactive:
-                del mcp_auth.client_sessions[sid]
-            results["optimizations"].append(f"Optimized memory: removed {len(inactive)} inactive sessions")
-        
-        # Log comprehensive results
-        status = results.get("summary", {}).get("status")
-        if status == "success":
-            active_count = results['summary']['active_sessions']
-            server_count = results['summary']['configured_servers']
-            print(f"[OK] MCP Auth System optimized - {active_count} active sessions, {server_count} servers")
-        else:
-            error_count = len(results.get("errors", []))
-            warning_count = len(results.get("warnings", []))
-            print(f"[WARN] MCP Auth System issues - {error_count} errors, {warning_count} warnings")
-            
-    except Exception as e:
-        results["errors"].append(f"Final scan error: {str(e)}")
-    
-    # Set final status based on results
-    if not results.get("errors") and not results.get("warnings"):
-        results["status"] = "optimized"
-        results["message"] = "MCP authentication system fully scanned and optimized"
-    elif not results.get("errors"):
-        results["status"] = "completed_with_warnings"
-        results["message"] = f"Optimization complete with {len(results.get('warnings', []))} warning(s)"
-    else:
-        results["status"] = "completed_with_errors"
-        results["message"] = f"Optimization failed with {len(results.get('errors', []))} error(s)"
-    
-    return resultsPerform a final scan and ensure funtionality and optimization
-def perform_final_scan_and_optimization():
-    """Perform comprehensive final scan and optimization of the MCP authentication system."""
-    results = validate_and_optimize_mcp_system()
-    
-    try:
-        mcp_auth = MCPAuthManager()
-        
-        # Verify all critical files exist and are accessible
-        critical_files = [
-            VAULT_DIR / "mcp_config.json",
-            VAULT_DIR / "mcp_sessions.json",
-            VAULT_DIR / "mcp_server_keys.json"
-        ]
-        
-        for file_path in critical_files:
-            if not file_path.exists():
-                results["errors"].append(f"Missing critical file: {file_path.name}")
-            elif not os.access(file_path, os.R_OK | os.W_OK):
-                results["errors"].append(f"Critical file not accessible: {file_path.name}")
-        
-        # Final integrity and optimization check
-        auth_result = perform_final_system_check()
-        results["final_check"] = auth_result
-        
-        # System resource monitoring
-        if hasattr(os, 'statvfs'):
-            stat = os.statvfs(VAULT_DIR)
-            free_space_gb = (stat.f_bavail * stat.f_frsize) / (1024**3)
-            if free_space_gb < 1:
-                results.setdefault("warnings", []).append(f"Low disk space: {free_space_gb:.2f}GB available")
-        
-        # Memory and performance optimization
-        if len(mcp_auth.client_sessions) > 1000:
-            inactive = [sid for sid, s in mcp_auth.client_sessions.items() if not s.get("active")]
-            for sid in inactive:
-                del mcp_auth.client_sessions[sid]
-            results["optimizations"].append(f"Optimized memory: removed {len(inactive)} inactive sessions")
-        
-        # Log comprehensive results
-        status = results.get("summary", {}).get("status")
-        if status == "success":
-            active_count = results['summary']['active_sessions']
-            server_count = results['summary']['configured_servers']
-            print(f"[OK] MCP Auth System optimized - {active_count} active sessions, {server_count} servers")
-        else:
-            error_count = len(results.get("errors", []))
-            warning_count = len(results.get("warnings", []))
-            print(f"[WARN] MCP Auth System issues - {error_count} errors, {warning_count} warnings")
-            
-    except Exception as e:
-        results["errors"].append(f"Final scan error: {str(e)}")
-    
-    # Set final status based on results
-    if not results.get("errors") and not results.get("warnings"):
-        results["status"] = "optimized"
-        results["message"] = "MCP authentication system fully scanned and optimized"
-    elif not results.get("errors"):
-        results["status"] = "completed_with_warnings"
-        results["message"] = f"Optimization complete with {len(results.get('warnings', []))} warning(s)"
-    else:
-        results["status"] = "completed_with_errors"
-        results["message"] = f"Optimization failed with {len(results.get('errors', []))} error(s)"
-    
-    return results
-
-
-def perform_final_scan_and_optimization():
-    """Perform comprehensive final scan and optimization of the MCP authentication system."""
-    results = validate_and_optimize_mcp_system()
-    
-    try:
-        mcp_auth = MCPAuthManager()
-        
-        # Verify all critical files exist and are accessible
-        critical_files = [
-            VAULT_DIR / "mcp_config.json",
-            VAULT_DIR / "mcp_sessions.json", 
-            VAULT_DIR / "mcp_server_keys.json"
-        ]
-        
-        for file_path in critical_files:
-            if not file_path.exists():
-                results["errors"].append(f"Missing critical file: {file_path.name}")
-            elif not os.access(file_path, os.R_OK | os.W_OK):
-                results["errors"].append(f"Critical file not accessible: {file_path.name}")
-        
-        # Clean expired sessions and optimize memory
-        expired_count = mcp_auth.cleanup_expired_sessions()
-        if expired_count > 0:
-            results["optimizations"].append(f"Cleaned {expired_count} expired sessions")
-        
-        # Remove inactive sessions for memory optimization
-        inactive = [sid for sid, s in mcp_auth.client_sessions.items() if not s.get("active")]
-        for sid in inactive:
-            del mcp_auth.client_sessions[sid]
-        if inactive:
-            results["optimizations"].append(f"Removed {len(inactive)} inactive sessions")
-        
-        # Validate and regenerate missing server keys
-        servers_regenerated = 0
-        for server_name in mcp_auth.config.get("servers", {}):
-            if server_name not in mcp_auth.server_keys:
-                mcp_auth.generate_server_key(server_name)
-                servers_regenerated += 1
-        if servers_regenerated > 0:
-            results["optimizations"].append(f"Regenerated {servers_regenerated} server keys")
-        
-        # Verify security settings
-        security = mcp_auth.config.get("security", {})
-        if security.get("session_timeout", 0) < 300:
-            results["warnings"].append("Session timeout too short (< 5 min)")
-        
-        # System resource monitoring
-        if hasattr(os, 'statvfs'):
-            stat = os.statvfs(VAULT_DIR)
-            free_space_gb = (stat.f_bavail * stat.f_frsize) / (1024**3)
-            if free_space_gb < 1:
-                results.setdefault("warnings", []).append(f"Low disk space: {free_space_gb:.2f}GB available")
-        
-        # Save optimized state
-        mcp_auth._save_sessions()
-        mcp_auth._save_server_keys()
-        mcp_auth._save_config()
-        
-        # Final integrity check
-        auth_result = perform_final_system_check()
-        results["final_check"] = auth_result
-        
-        # Update summary with latest counts
-        results["summary"].update({
-            "active_sessions": len(mcp_auth.client_sessions),
-            "configured_servers": len(mcp_auth.server_keys),
-            "total_optimizations": len(results["optimizations"])
-        })
-        
-        # Log comprehensive results
-        status = results.get("summary", {}).get("status")
-        if status == "success":
-            active_count = results['summary']['active_sessions']
-            server_count = results['summary']['configured_servers']
-            opt_count = results['summary']['total_optimizations']
-            print(f"[OK] MCP Auth System optimized - {active_count} active sessions, {server_count} servers, {opt_count} optimizations")
-        else:
-            error_count = len(results.get("errors", []))
-            warning_count = len(results.get("warnings", []))
-            print(f"[WARN] MCP Auth System issues - {error_count} errors, {warning_count} warnings")
-# Perform comprehensive system integrity validation
-integrity_issues = []
-
-# Check vault directory permissions and security
-if VAULT_DIR.exists():
-    vault_stat = VAULT_DIR.stat()
-    vault_mode = oct(vault_stat.st_mode)[-3:]
-    if vault_mode != "700":
-        results["warnings"].append(f"Vault directory permissions not secure: {vault_mode} (should be 700)")
-        integrity_issues.append("vault_permissions")
-
-# Validate wrapper script integrity and functionality
-wrapper_dir = ACADEMY_ROOT / "Students" / "Wrappers" if "ACADEMY_ROOT" in globals() else None
-if wrapper_dir and wrapper_dir.exists():
-    wrapper_count = 0
-    functional_wrappers = 0
-    for script in wrapper_dir.glob("Call_*"):
-        if script.suffix.lower() in WRAPPER_EXTENSIONS if "WRAPPER_EXTENSIONS" in globals() else [".py", ".sh"]:
-            wrapper_count += 1
-            if os.access(script, os.X_OK):
-                functional_wrappers += 1
-            else:
-                results["warnings"].append(f"Wrapper script not executable: {script.name}")
-    
-    if wrapper_count > 0:
-        results["wrapper_integrity"] = {
-            "total": wrapper_count,
-            "functional": functional_wrappers,
-            "success_rate": f"{(functional_wrappers/wrapper_count)*100:.1f}%"
-        }
-
-# Test MCP authentication flow with simulated request
-try:
-    test_server = "test_mcp_server"
-    test_headers = mcp_auth.generate_mcp_auth(test_server)
-    validation_result = mcp_auth.validate_mcp_auth(test_server, test_headers)
-    
-    if not validation_result.get("valid", False):
-        results["errors"].append("MCP authentication flow validation failed")
-        integrity_issues.append("mcp_auth_flow")
-    else:
-        results["optimizations"].append("MCP authentication flow validated successfully")
-except Exception as auth_test_error:
-    results["warnings"].append(f"MCP auth test inconclusive: {str(auth_test_error)}")
-
-# Check for memory leaks in session storage
-session_memory_usage = len(str(mcp_auth.client_sessions))  # Rough estimate
-if session_memory_usage > 10 * 1024 * 1024:  # 10MB threshold
-    results["warnings"].append(f"High memory usage in sessions: {session_memory_usage/1024/1024:.2f}MB")
-    # Force aggressive cleanup
-    oldest_sessions = sorted(mcp_auth.client_sessions.items(), key=lambda x: x[1].get("created", 0))[:100]
-    for sid, _ in oldest_sessions:
-        del mcp_auth.client_sessions[sid]
-    results["optimizations"].append(f"Aggressively cleaned {len(oldest_sessions)} oldest sessions")
-
-# Validate system clock synchronization (critical for token expiration)
-clock_skew_threshold = 300  # 5 minutes
-system_time = datetime.now().timestamp()
-ntp_time = system_time  # Would check with NTP server in production
-time_diff = abs(system_time - ntp_time)
-if time_diff > clock_skew_threshold:
-    results["errors"].append(f"System clock skew detected: {time_diff}s difference")
-    integrity_issues.append("clock_sync")
-
-# Final functionality test matrix
-functionality_tests = {
-    "session_creation": False,
-    "token_validation": False,
-    "server_key_gen": False,
-    "websocket_auth": False
-}
-
-try:
-    # Test session creation
-    test_session = mcp_auth.create_client_session("test_client", "test_server")
-    functionality_tests["session_creation"] = bool(test_session)
-    
-    # Test token validation 
-    test_token = mcp_auth.generate_client_token("test_client", "test_server")
-    validation = mcp_auth.validate_client_session(test_token.get("session_id"))
-    functionality_tests["token_validation"] = validation is not None
-    
-    # Test server key generation
-    test_key = mcp_auth.generate_server_key("functionality_test_server")
-    functionality_tests["server_key_gen"] = bool(test_key)
-    
-    # Test WebSocket authentication (if available)
-    if "websockets" in globals():
-        functionality_tests["websocket_auth"] = True  # Would test actual WebSocket connection
-    
-except Exception as func_test_error:
-    results["warnings"].append(f"Functionality test incomplete: {str(func_test_error)}")
-
-# Report functionality test results
-failed_tests = [k for k, v in functionality_tests.items() if not v]
-if failed_tests:
-    results["errors"].append(f"Functionality tests failed: {', '.join(failed_tests)}")
-else:
-    results["optimizations"].append("All functionality tests passed")
-
-# Final system optimization recommendations
-if integrity_issues:
-    results["integrity_issues"] = integrity_issues
-    results["recommendations"] = [
-        "Review vault directory permissions",
-        "Verify MCP authentication configuration",
-        "Synchronize system clock",
-        "Check wrapper script functionality"
-    ]
-
-            
-    except Exception as e:
-        results["errors"].append(f"Final scan error: {str(e)}")
-    
-    # Set final status based on results
-    if not results.get("errors") and not results.get("warnings"):
-        results["status"] = "optimized"
-        results["message"] = "MCP authentication system fully scanned and optimized"
-    elif not results.get("errors"):
-        results["status"] = "completed_with_warnings"
-        results["message"] = f"Optimization complete with {len(results.get('warnings', []))} warning(s)"
-    else:
-        results["status"] = "completed_with_errors"
-        results["message"] = f"Optimization failed with {len(results.get('errors', []))} error(s)"
-    
-    return results
-
-
-Handles authentication for Model Context Protocol servers and clients.
 """
 import os
 import json
 import time
+import hmac
 import hashlib
 import secrets
 import asyncio
+import atexit
+import threading
 import websockets
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Dict, Optional, Any
 
+try:
+    from .Session_Backends import SESSION_STORE, open_session_store
+    from .Session_Store import SessionRecord
+    from .Session_Tokens import DenyList, SessionTokenCodec
+    from .Token_Cache import VerifiedTokenCache
+    from .Rate_Limiter import FailureTracker, TokenBuckets
+except ImportError:
+    from Session_Backends import SESSION_STORE, open_session_store
+    from Session_Store import SessionRecord
+    from Session_Tokens import DenyList, SessionTokenCodec
+    from Token_Cache import VerifiedTokenCache
+    from Rate_Limiter import FailureTracker, TokenBuckets
+
 VAULT_DIR = Path(__file__).parent.parent.parent / "Vault"
 MCP_CONFIG = VAULT_DIR / "mcp_config.json"
 MCP_KEYS = VAULT_DIR / "mcp_keys.json"
+MCP_SESSIONS = VAULT_DIR / "mcp_sessions.json"
+# Seconds between background expired-session sweeps (0 disables the reaper)
+SESSION_REAP_INTERVAL = float(os.environ.get("HEADY_MCP_SESSION_REAP_INTERVAL", 30))
+# Issue stateless signed session tokens instead of stored sessions (see Session_Tokens)
+STATELESS_SESSIONS = os.environ.get("HEADY_MCP_STATELESS_SESSIONS", "").lower() in ("1", "true", "yes")
 
 class MCPAuthManager:
     """Manages authentication for MCP servers and clients."""
     
-    def __init__(self, master_key=None):
+    def __init__(self, master_key=None, vault_dir=None, session_store=None, stateless_sessions=None):
+        # vault_dir overrides the shared Vault (benchmarks and load tests use a temporary one)
+        self.vault_dir = Path(vault_dir) if vault_dir else VAULT_DIR
+        self.config_file = self.vault_dir / MCP_CONFIG.name
+        self.session_store = session_store or SESSION_STORE
+        self.stateless_sessions = STATELESS_SESSIONS if stateless_sessions is None else bool(stateless_sessions)
+        self.keys_file = self.vault_dir / MCP_KEYS.name
         self.master_key = master_key or os.environ.get("HEADY_MCP_KEY")
+        # Keyed once; each signature copies this state instead of re-keying
+        self._api_key_mac = hmac.new(self.master_key.encode(), digestmod=hashlib.sha256) if self.master_key else None
+        self._token_cache = VerifiedTokenCache()
         self.config = {}
         self.server_keys = {}
-        self.client_sessions = {}
+        # session_id -> SessionRecord (persistent state only), see Session_Backends
+        self.client_sessions = None
+        # session_id -> live WebSocket of this process; never persisted
+        self._connections = {}
+        self._session_tokens = SessionTokenCodec(self.master_key) if self.stateless_sessions else None
+        self._deny_list = None
+        self._reaper_stop = threading.Event()
+        self._reaper = None
         self._initialize()
+        self._init_throttle()
+        atexit.register(self.close)
+        self.start_reaper()
     
     def _initialize(self):
         """Initialize MCP authentication system."""
-        VAULT_DIR.mkdir(parents=True, exist_ok=True)
+        self.vault_dir.mkdir(parents=True, exist_ok=True)
         
         # Load configuration
-        if MCP_CONFIG.exists():
-            with open(MCP_CONFIG, 'r') as f:
+        if self.config_file.exists():
+            with open(self.config_file, 'r') as f:
                 self.config = json.load(f)
         else:
             self.config = self._default_config()
             self._save_config()
         
         # Load server keys
-        if MCP_KEYS.exists():
-            with open(MCP_KEYS, 'r') as f:
+        if self.keys_file.exists():
+            with open(self.keys_file, 'r') as f:
                 self.server_keys = json.load(f)
+        
+        # Open (and for the journal store, recover) the session store
+        self.client_sessions = open_session_store(self.session_store, self.vault_dir / MCP_SESSIONS.name)
+        if self.stateless_sessions:
+            self._deny_list = DenyList(self.vault_dir / "mcp_denylist")
     
     def _default_config(self):
         """Default MCP configuration."""
@@ -557,7 +164,11 @@ class MCPAuthManager:
                 "token_expiry": 3600,
                 "session_timeout": 7200,
                 "max_failed_attempts": 5,
-                "lockout_duration": 300
+                "lockout_duration": 300,
+                "client_rate": 10,
+                "client_burst": 20,
+                "source_rate": 20,
+                "source_burst": 50
             }
         }
     
@@ -599,13 +210,13 @@ class MCPAuthManager:
             auth_data = {
                 "type": "bearer",
                 "token": token,
-                "expires": (datetime.now() + timedelta(seconds=self.config["security"]["token_expiry"])).isoformat()
+                "expires": (datetime.now(timezone.utc) + timedelta(seconds=self.config["security"]["token_expiry"])).isoformat()
             }
         
         elif server_config["auth_type"] == "api_key":
             timestamp = str(int(time.time()))
             message = f"{client_id}:{server_name}:{timestamp}"
-            signature = hashlib.sha256((message + self.master_key).encode()).hexdigest()
+            signature = self._sign(message)
             
             auth_data = {
                 "type": "api_key",
@@ -634,16 +245,15 @@ class MCPAuthManager:
         else:
             raise ValueError(f"Unsupported auth type: {server_config['auth_type']}")
         
-        # Store session
-        session_id = secrets.token_urlsafe(16)
-        self.client_sessions[session_id] = {
-            "client_id": client_id,
-            "server": server_name,
-            "auth_data": auth_data,
-            "created": datetime.now().isoformat(),
-            "last_activity": datetime.now().isoformat(),
-            "active": True
-        }
+        # Store session (or sign it into the session id)
+        if self._session_tokens is not None:
+            session_id = self._issue_session_token(client_id, server_name,
+                                                   permissions or client_config["permissions"])
+        else:
+            session_id = secrets.token_urlsafe(16)
+            now = time.time()
+            session = SessionRecord(client_id, server_name, auth_data, created=now, last_activity=now)
+            self.client_sessions.put(session_id, session)
         
         return {
             "session_id": session_id,
@@ -655,9 +265,68 @@ class MCPAuthManager:
             }
         }
     
-    def validate_server_connection(self, server_name: str, auth_data: Dict[str, Any]) -> bool:
-        """Validate server connection authentication."""
-        if server_name not in self.server_keys:
+    def _init_throttle(self):
+        """Rate limits and lockouts from the security config (older configs get defaults)."""
+        security = self.config.get("security", {})
+        self._client_buckets = TokenBuckets(security.get("client_rate", 10), security.get("client_burst", 20))
+        self._source_buckets = TokenBuckets(security.get("source_rate", 20), security.get("source_burst", 50))
+        self._failures = FailureTracker(security.get("max_failed_attempts", 5),
+                                        security.get("lockout_duration", 300))
+    
+    @staticmethod
+    def _auth_identities(auth_data, source):
+        """Throttling keys for an attempt: the claimed client id per source, and the source.
+        
+        The client id is unauthenticated, so it is never a key on its own:
+        failures from one address must not lock out or drain the same client
+        connecting from another. In-process callers without a source share
+        the "local" source, so every attempt has at least one key.
+        """
+        source = source or "local"
+        identities = []
+        client_id = auth_data.get("client_id") if isinstance(auth_data, dict) else None
+        if isinstance(client_id, str) and client_id:
+            identities.append(("client", (client_id, source)))
+        identities.append(("source", source))
+        return identities
+    
+    def _admission_error(self, identities) -> Optional[str]:
+        """Reason to turn an attempt away before verifying it, or None to go ahead."""
+        for identity in identities:
+            if self._failures.locked_until(identity):
+                return "Too many failed attempts"
+        for kind, key in identities:
+            buckets = self._client_buckets if kind == "client" else self._source_buckets
+            if not buckets.allow(key):
+                return "Rate limit exceeded"
+        return None
+    
+    def _record_attempt(self, identities, ok):
+        for identity in identities:
+            if ok:
+                self._failures.success(identity)
+            elif self._failures.failure(identity):
+                kind, key = identity
+                if kind == "client":
+                    key = f"{key[0]} from {key[1]}"
+                print(f"MCP auth lockout: {kind} {key} after repeated failures")
+    
+    def validate_server_connection(self, server_name: str, auth_data: Dict[str, Any], source: str = None) -> bool:
+        """Validate server connection authentication.
+        
+        Attempts are throttled per (client id, source address) and per source
+        address; locked-out or rate-limited callers are rejected before any
+        cryptographic check. Callers without a source share one local source.
+        """
+        identities = self._auth_identities(auth_data, source)
+        if self._admission_error(identities):
+            return False
+        ok = self._verify_server_auth(server_name, auth_data)
+        self._record_attempt(identities, ok)
+        return ok
+    
+    def _verify_server_auth(self, server_name: str, auth_data: Dict[str, Any]) -> bool:
+        if not isinstance(auth_data, dict) or server_name not in self.server_keys:
             return False
         
         server_key = self.server_keys[server_name]
@@ -668,83 +337,120 @@ class MCPAuthManager:
             if not token:
                 return False
             
-            # Check if token matches stored key
-            return token == server_key["key"]
+            # Check if token matches stored key (constant time)
+            return isinstance(token, str) and hmac.compare_digest(token.encode(), server_key["key"].encode())
         
         elif auth_type == "api_key":
             signature = auth_data.get("signature")
             timestamp = auth_data.get("timestamp")
             client_id = auth_data.get("client_id")
             
-            if not all([signature, timestamp, client_id]):
+            if not all([signature, timestamp, client_id]) or not isinstance(signature, str):
                 return False
             
-            # Verify signature
-            message = f"{client_id}:{server_name}:{timestamp}"
-            expected_signature = hashlib.sha256((message + self.master_key).encode()).hexdigest()
-            
-            # Check timestamp (prevent replay attacks)
+            # Check timestamp first (prevent replay attacks); it costs no crypto
             current_time = int(time.time())
-            request_time = int(timestamp)
+            try:
+                request_time = int(timestamp)
+            except (TypeError, ValueError):
+                return False
             if abs(current_time - request_time) > 300:  # 5 minute window
                 return False
             
-            return signature == expected_signature
+            # Verify signature
+            message = f"{client_id}:{server_name}:{timestamp}"
+            return hmac.compare_digest(signature.encode(), self._sign(message).encode())
         
         elif auth_type == "jwt":
-            import jwt
             token = auth_data.get("token")
             if not token:
                 return False
             
-            try:
-                payload = jwt.decode(token, self.master_key, algorithms=["HS256"])
-                return payload.get("server") == server_name
-            except jwt.InvalidTokenError:
-                return False
+            # Tokens verified before are served from the cache until they expire
+            payload = self._token_cache.get(token)
+            if payload is None:
+                import jwt
+                try:
+                    payload = jwt.decode(token, self.master_key, algorithms=["HS256"])
+                except jwt.InvalidTokenError:
+                    return False
+                self._token_cache.put(token, payload)
+            return payload.get("server") == server_name
         
         return False
     
-    def validate_client_session(self, session_id: str) -> Optional[Dict[str, Any]]:
-        """Validate client session."""
-        if session_id not in self.client_sessions:
-            return None
+    def validate_client_session(self, session_id: str) -> Optional[SessionRecord]:
+        """Validate client session.
+        
+        Stateless tokens are checked locally (signature, expiry, deny-list)
+        and return their SessionClaims; stored sessions return a SessionRecord.
+        """
+        if self._session_tokens is not None and self._session_tokens.is_token(session_id):
+            now = time.time()
+            claims = self._session_tokens.verify(session_id, now)
+            if claims is None or self._deny_list.is_denied(claims, now):
+                return None
+            return claims
         
-        session = self.client_sessions[session_id]
+        session = self.client_sessions.get(session_id)
+        if session is None:
+            return None
         
         # Check if session is active
-        if not session["active"]:
+        if not session.active:
             return None
         
         # Check session timeout
-        last_activity = datetime.fromisoformat(session["last_activity"])
-        if datetime.now() - last_activity > timedelta(seconds=self.config["security"]["session_timeout"]):
-            session["active"] = False
+        now = time.time()
+        if now - session.last_activity > self.config["security"]["session_timeout"]:
+            session.active = False
+            self.client_sessions.put(session_id, session)
             return None
         
-        # Update last activity
-        session["last_activity"] = datetime.now().isoformat()
-        self._save_sessions()
+        # Update last activity (stores write it behind or at a coarse resolution)
+        if now - session.last_activity >= self.client_sessions.touch_resolution:
+            self.client_sessions.touch(session_id, now)
+        session.last_activity = now
         
         return session
     
     async def authenticate_websocket(self, websocket, server_name: str) -> Optional[str]:
-        """Authenticate WebSocket connection for MCP server."""
+        """Authenticate WebSocket connection for MCP server.
+        
+        Signature checks and session store writes run in a thread, so the
+        handshake never blocks the event loop.
+        """
         try:
             # Wait for authentication message
             auth_message = await asyncio.wait_for(websocket.recv(), timeout=10.0)
             auth_data = json.loads(auth_message)
             
-            if self.validate_server_connection(server_name, auth_data):
+            # Throttle per remote host (the port changes with every connection)
+            remote = getattr(websocket, "remote_address", None)
+            source = remote[0] if isinstance(remote, (tuple, list)) and remote else remote
+            identities = self._auth_identities(auth_data, source)
+            reason = self._admission_error(identities)
+            if reason:
+                await websocket.send(json.dumps({
+                    "type": "auth_error",
+                    "message": reason
+                }))
+                return None
+            
+            ok = await self._verify_server_auth_async(server_name, auth_data)
+            self._record_attempt(identities, ok)
+            if ok:
                 # Generate session ID
-                session_id = secrets.token_urlsafe(16)
-                self.client_sessions[session_id] = {
-                    "server": server_name,
-                    "websocket": websocket,
-                    "created": datetime.now().isoformat(),
-                    "last_activity": datetime.now().isoformat(),
-                    "active": True
-                }
+                if self._session_tokens is not None:
+                    session_id = self._issue_session_token(None, server_name, [])
+                else:
+                    session_id = secrets.token_urlsafe(16)
+                    now = time.time()
+                    session = SessionRecord(None, server_name, created=now, last_activity=now)
+                    # The session store may write to SQLite; keep it off the loop
+                    loop = asyncio.get_running_loop()
+                    await loop.run_in_executor(None, self.client_sessions.put, session_id, session)
+                self._connections[session_id] = websocket
                 
                 # Send success response
                 await websocket.send(json.dumps({
@@ -770,38 +476,101 @@ class MCPAuthManager:
             print(f"WebSocket auth error: {e}")
             return None
     
+    async def _verify_server_auth_async(self, server_name: str, auth_data: Dict[str, Any]) -> bool:
+        """_verify_server_auth without blocking the event loop."""
+        server_key = self.server_keys.get(server_name)
+        if server_key is None or server_key["auth_type"] == "bearer":
+            # A constant-time compare is cheaper than a thread hop
+            return self._verify_server_auth(server_name, auth_data)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._verify_server_auth, server_name, auth_data)
+    
+    def _issue_session_token(self, client_id, server_name, permissions):
+        now = time.time()
+        return self._session_tokens.issue(client_id, server_name, permissions, now,
+                                          now + self.config["security"]["session_timeout"])
+    
     def revoke_session(self, session_id: str) -> bool:
         """Revoke client session."""
-        if session_id in self.client_sessions:
-            self.client_sessions[session_id]["active"] = False
-            self._save_sessions()
+        if self._session_tokens is not None and self._session_tokens.is_token(session_id):
+            self._connections.pop(session_id, None)
+            claims = self._session_tokens.verify(session_id)
+            if claims is None:
+                return False
+            self._deny_list.deny_token(claims.token_id, claims.expires)
+            return True
+        
+        session = self.client_sessions.get(session_id)
+        if session is not None:
+            # Inactive sessions are removed by the next sweep
+            session.active = False
+            self.client_sessions.put(session_id, session)
             return True
         return False
     
+    def revoke_sessions(self, server_name: str = None, client_id: str = None) -> int:
+        """Revoke every active session of a server and/or client; returns how many stored ones.
+        
+        Stateless tokens cannot be enumerated: all of the subject's tokens issued
+        so far are denied, and are not included in the count.
+        """
+        if server_name is None and client_id is None:
+            raise ValueError("Give a server or a client to revoke")
+        if self._deny_list is not None:
+            self._deny_list.deny_subject(client_id, server_name,
+                                         lifetime=self.config["security"]["session_timeout"])
+        return len(self.client_sessions.revoke(server_name, client_id))
+    
+    def list_sessions(self, server_name: str = None, client_id: str = None) -> list:
+        """Sessions of a server and/or client (all if neither is given), without credentials."""
+        sessions = []
+        for session_id in self.client_sessions.session_ids(server_name, client_id):
+            session = self.client_sessions.get(session_id)
+            if session is not None:
+                sessions.append({
+                    "session_id": session_id,
+                    "client_id": session.client_id,
+                    "server": session.server,
+                    "created": session.created,
+                    "last_activity": session.last_activity,
+                    "active": session.active,
+                    "connected": session_id in self._connections
+                })
+        return sessions
+    
+    def _sign(self, message: str) -> str:
+        """HMAC-SHA256 of message under the master key, as hex."""
+        if self._api_key_mac is None:
+            raise ValueError("HEADY_MCP_KEY is not set")
+        mac = self._api_key_mac.copy()
+        mac.update(message.encode())
+        return mac.hexdigest()
+    
     def cleanup_expired_sessions(self):
-        """Clean up expired sessions."""
-        current_time = datetime.now()
-        expired_sessions = []
-        
-        for session_id, session in self.client_sessions.items():
-            if not session["active"]:
-                expired_sessions.append(session_id)
-                continue
-            
-            last_activity = datetime.fromisoformat(session["last_activity"])
-            if current_time - last_activity > timedelta(seconds=self.config["security"]["session_timeout"]):
-                session["active"] = False
-                expired_sessions.append(session_id)
+        """Clean up expired and revoked sessions; only sessions that are due are examined."""
+        cutoff = time.time() - self.config["security"]["session_timeout"]
+        expired_sessions = self.client_sessions.expire(cutoff)
         
-        # Remove expired sessions
         for session_id in expired_sessions:
-            del self.client_sessions[session_id]
-        
-        if expired_sessions:
-            self._save_sessions()
+            self._connections.pop(session_id, None)
         
         return len(expired_sessions)
     
+    def start_reaper(self, interval=SESSION_REAP_INTERVAL):
+        """Run cleanup_expired_sessions every interval seconds in a background thread."""
+        if self._reaper is not None or interval <= 0:
+            return
+        self._reaper = threading.Thread(target=self._reap_loop, args=(interval,),
+                                        name="mcp-session-reaper", daemon=True)
+        self._reaper.start()
+    
+    def _reap_loop(self, interval):
+        while not self._reaper_stop.wait(interval):
+            try:
+                self.cleanup_expired_sessions()
+            except Exception as e:
+                print(f"Session reaper error: {e}")
+    
     def get_server_status(self, server_name: str) -> Dict[str, Any]:
         """Get server authentication status."""
         if server_name not in self.config["servers"]:
@@ -811,7 +580,7 @@ class MCPAuthManager:
             return {"status": "not_configured", "message": "Server key not generated"}
         
         server_key = self.server_keys[server_name]
-        active_sessions = sum(1 for s in self.client_sessions.values() if s["server"] == server_name and s["active"])
+        active_sessions = self.client_sessions.count_active(server_name)
         
         return {
             "status": "active",
@@ -819,24 +588,32 @@ class MCPAuthManager:
             "auth_type": server_key["auth_type"],
             "generated": server_key["generated"],
             "last_used": server_key["last_used"],
-            "active_sessions": active_sessions
+            "active_sessions": active_sessions,
+            "stateless_sessions": self.stateless_sessions
         }
     
     def _save_config(self):
         """Save configuration to file."""
-        with open(MCP_CONFIG, 'w') as f:
+        with open(self.config_file, 'w') as f:
             json.dump(self.config, f, indent=2)
     
     def _save_server_keys(self):
         """Save server keys to file."""
-        with open(MCP_KEYS, 'w') as f:
+        with open(self.keys_file, 'w') as f:
             json.dump(self.server_keys, f, indent=2)
     
     def _save_sessions(self):
-        """Save sessions to file."""
-        sessions_file = VAULT_DIR / "mcp_sessions.json"
-        with open(sessions_file, 'w') as f:
-            json.dump(self.client_sessions, f, indent=2)
+        """Compact session storage now (normally done in the background)."""
+        self.client_sessions.compact()
+    
+    def get_connection(self, session_id: str):
+        """Live WebSocket of an authenticated session, if it is connected to this process."""
+        return self._connections.get(session_id)
+    
+    def close(self):
+        """Stop the reaper and flush pending session changes to disk."""
+        self._reaper_stop.set()
+        self.client_sessions.close()
 
 def main():
     """Command line interface for MCP authentication."""
@@ -888,1858 +665,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
-def final_scan_and_optimize(self):
-    """Perform final scan and optimization of MCP authentication system."""
-    # Clean up expired sessions
-    expired_count = self.cleanup_expired_sessions()
-    
-    # Validate server keys and regenerate if needed
-    for server_name in self.config["servers"]:
-        if server_name not in self.server_keys:
-            self.generate_server_key(server_name)
-    
-    # Optimize memory by clearing inactive sessions
-    inactive_sessions = [sid for sid, session in self.client_sessions.items() 
-                        if not session["active"]]
-    for sid in inactive_sessions:
-        del self.client_sessions[sid]
-    
-    # Save optimized state
-    self._save_sessions()
-    self._save_server_keys()
-    
-    return {
-        "expired_sessions": expired_count,
-        "active_sessions": len(self.client_sessions),
-        "servers_configured": len(self.server_keys)
-    }
-
-
-
-
-
-
-def perform_final_system_check():
-    """Standalone utility to perform final MCP auth system check."""
-    try:
-        mcp_auth = MCPAuthManager()
-        
-        # Cleanup expired sessions
-        expired = mcp_auth.cleanup_expired_sessions()
-        
-        # Validate all server configurations
-        for server in mcp_auth.config.get("servers", {}):
-            status = mcp_auth.get_server_status(server)
-            if status["status"] == "not_configured":
-                mcp_auth.generate_server_key(server)
-        
-        # Remove stale inactive sessions
-        stale = [sid for sid, s in mcp_auth.client_sessions.items() if not s.get("active")]
-        for sid in stale:
-            del mcp_auth.client_sessions[sid]
-        
-        mcp_auth._save_sessions()
-        
-        return {
-            "status": "optimized",
-            "expired_cleaned": expired,
-            "stale_removed": len(stale),
-            "active_sessions": len(mcp_auth.client_sessions),
-            "configured_servers": len(mcp_auth.server_keys)
-        }
-    except Exception as e:
-        return {"status": "error", "message": str(e)}
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-def validate_and_optimize_mcp_system():
-    """Comprehensive validation and optimization of MCP authentication system."""
-    results = {
-        "timestamp": datetime.now().isoformat()
-        "checks": [],
-        "optimizations": [],
-        "errors": []
-    }
-    
-    try:
-        mcp_auth = MCPAuthManager()
-        
-        # 1. Validate configuration integrity
-        if mcp_auth.config:
-            results["checks"].append("Configuration loaded successfully")
-        else:
-            results["errors"].append("Configuration missing or empty")
-        
-        # 2. Verify Vault directory exists and is writable
-        if VAULT_DIR.exists() and os.access(VAULT_DIR, os.W_OK):
-            results["checks"].append("Vault directory accessible")
-        else:
-            VAULT_DIR.mkdir(parents=True, exist_ok=True)
-            results["optimizations"].append("Created Vault directory")
-        
-        # 3. Clean expired sessions
-        expired_count = mcp_auth.cleanup_expired_sessions()
-        if expired_count > 0:
-            results["optimizations"].append(f"Cleaned {expired_count} expired sessions")
-        
-        # 4. Validate and regenerate missing server keys
-        servers_regenerated = 0
-        for server_name in mcp_auth.config.get("servers", {}):
-            if server_name not in mcp_auth.server_keys:
-                mcp_auth.generate_server_key(server_name)
-                servers_regenerated += 1
-        if servers_regenerated > 0:
-            results["optimizations"].append(f"Regenerated {servers_regenerated} server keys")
-        
-        # 5. Verify security settings
-        security = mcp_auth.config.get("security", {})
-        if security.get("session_timeout", 0) < 300:
-            results["errors"].append("Session timeout too short (< 5 min)")
-        else:
-            results["checks"].append("Security settings validated")
-        
-        # 6. Memory optimization - remove inactive sessions
-        inactive = [sid for sid, s in mcp_auth.client_sessions.items() if not s.get("active")]
-        for sid in inactive:
-            del mcp_auth.client_sessions[sid]
-        if inactive:
-            results["optimizations"].append(f"Removed {len(inactive)} inactive sessions")
-        
-        # 7. Save optimized state
-        mcp_auth._save_sessions()
-        mcp_auth._save_server_keys()
-        mcp_auth._save_config()
-        
-        results["summary"] = {
-            "status": "success" if not results["errors"] else "warnings",
-            "active_sessions": len(mcp_auth.client_sessions),
-            "configured_servers": len(mcp_auth.server_keys),
-            "total_checks": len(results["checks"]),
-            "total_optimizations": len(results["optimizations"])
-        }
-        
-    except Exception as e:
-        results["errors"].append(f"System error: {str(e)}")
-        results["summary"] = {"status": "error"}
-    
-    return results
-
-
-if __name__ == "__main__":
-    # Run validation when executed directly
-    import sys
-    if len(sys.argv) > 1 and sys.argv[1] == "--validate":
-        result = validate_and_optimize_mcp_system()
-        print(json.dumps(result, indent=2))
-
-
-
-def final_scan_and_optimize(self):
-    """Perform final scan and optimization of MCP authentication system."""
-    # Clean up expired sessions
-    expired_count = self.cleanup_expired_sessions()
-    
-    # Validate server keys and regenerate if needed
-    for server_name in self.config["servers"]:
-        if server_name not in self.server_keys:
-            self.generate_server_key(server_name)
-    
-    # Optimize memory by clearing inactive sessions
-    inactive_sessions = [sid for sid, session in self.client_sessions.items() 
-                        if not session["active"]]
-    for sid in inactive_sessions:
-        del self.client_sessions[sid]
-    
-    # Save optimized state
-    self._save_sessions()
-    self._save_server_keys()
-    
-    return {
-        "expired_sessions": expired_count,
-        "active_sessions": len(self.client_sessions),
-        "servers_configured": len(self.server_keys)
-    }Perform a final scan and ensure funtionality and optimization
-
-
-
-
-
-
-
-
-
-
-def perform_final_scan_and_optimization():
-    """Perform a comprehensive final scan and optimization of the MCP auth system."""
-    results = validate_and_optimize_mcp_system()
-    
-    # Additional final checks
-    try:
-        mcp_auth = MCPAuthManager()
-
-        # Verify all critical files exist
-        critical_files = [
-            VAULT_DIR / "mcp_config.json",
-            VAULT_DIR / "mcp_sessions.json",
-            VAULT_DIR / "mcp_server_keys.json"
-        ]
-        
-        for file_path in critical_files:
-            if not file_path.exists():
-                results["errors"].append(f"Missing critical file: {file_path.name}")
-        
-        # Final integrity check
-        auth_result = perform_final_system_check()
-        results["final_check"] = auth_result
-        
-        # Log optimization results
-        if results.get("summary", {}).get("status") == "success":
-            print(f"[OK] MCP Auth System optimized - {results['summary']['active_sessions']} active sessions")
-        else:
-            print(f"[WARN] MCP Auth System has issues: {results.get('errors', [])}")
-            
-    except Exception as e:
-        results["errors"].append(f"Final scan error: {str(e)}")
-    
-    # Perform final validation pass
-    if not results.get("errors"):
-        results["status"] = "optimized"
-        results["message"] = "MCP authentication system fully scanned and optimized"
-    else:
-        results["status"] = "completed_with_warnings"
-        results["message"] = f"Optimization complete with {len(results['errors'])} issue(s)"
-    
-    return resultsPerform a final scan and ensure funtionality and optimization
-
-
-
-
-
-
-
-
-
-def final_scan_and_optimization():
-    """Perform final system scan and optimization before full start."""
-    # Import MCP authentication validation
-    from .Tools.Security.MCP_Auth import validate_and_optimize_mcp_system, perform_final_system_check
-    
-    log.info("Performing final system scan...")
-    
-    # 1. Run MCP authentication system validation
-    mcp_results = validate_and_optimize_mcp_system()
-    if mcp_results.get("summary", {}).get("status") == "error":
-        log.error(f"MCP Auth validation failed: {mcp_results.get('errors', [])}")
-        return False
-    
-    # 2. Check for orphaned log files older than 7 days
-    from datetime import timedelta
-    cutoff = datetime.now() - timedelta(days=7)
-    for log_file in LOG_DIR.glob("*.log"):
-        if datetime.fromtimestamp(log_file.stat().st_mtime) < cutoff:
-            try:
-                log_file.unlink()
-                log.debug(f"Cleaned old log: {log_file.name}")
-            except Exception as e:
-                log.warning(f"Failed to clean {log_file.name}: {e}")
-    
-    # 3. Validate critical paths
-    critical_paths = [PLAYGROUND_DIR, REGISTRY_FILE, VAULT_FILE.parent]
-    missing = [p for p in critical_paths if not p.exists()]
-    if missing:
-        log.error(f"Critical paths missing: {missing}")
-        return False
-    
-    # 4. Check for oversized files in PLAYGROUND_DIR
-    SIZE_LIMIT_MB = 50
-    for file in PLAYGROUND_DIR.glob("*"):
-        if file.is_file() and file.stat().st_size > SIZE_LIMIT_MB * 1024 * 1024:
-            log.warning(f"Oversized file detected: {file.name} ({file.stat().st_size / (1024*1024):.2f} MB)")
-    
-    # 5. Validate wrapper script permissions
-    wrapper_dir = ACADEMY_ROOT / "Students" / "Wrappers"
-    if wrapper_dir.exists():
-        for script in wrapper_dir.glob("Call_*"):
-            if script.suffix.lower() in WRAPPER_EXTENSIONS:
-                if not os.access(script, os.X_OK):
-                    log.warning(f"Wrapper {script.name} missing execute permission")
-    
-    # 6. Run final MCP system check
-    final_check = perform_final_system_check()
-    if final_check.get("status") != "optimized":
-        log.warning(f"MCP final check issues: {final_check}")
-    
-    log.info(f"Final scan complete - system optimized ({final_check.get('active_sessions', 0)} active sessions)")
-    return True
-
-# 7. Validate system resources and performance
-try:
-    import psutil
-    memory = psutil.virtual_memory()
-    if memory.percent > 90:
-        log.warning(f"High memory usage: {memory.percent:.1f}%")
-    
-    disk = psutil.disk_usage(str(ACADEMY_ROOT))
-    if disk.percent > 85:
-        log.warning(f"Low disk space: {disk.percent:.1f}% used")
-except ImportError:
-    log.debug("psutil not available - skipping resource checks")
-
-# 8. Final security audit
-security_issues = []
-if VAULT_FILE.exists():
-    if os.stat(VAULT_FILE).st_mode & 0o077:
-        security_issues.append("Vault file has overly permissive permissions")
-
-if security_issues:
-    log.warning(f"Security issues found: {security_issues}")
-
-# 9. System readiness confirmation
-log.info("System optimization complete - ready for operation")
-return True
-def perform_final_scan_and_optimization():
-    """Perform final system scan and optimization before full start."""
-    log.info("Performing final system scan...")
-    
-    # Check for orphaned log files older than 7 days
-    from datetime import timedelta
-    cutoff = datetime.now() - timedelta(days=7)
-    for log_file in LOG_DIR.glob("*.log"):
-        if datetime.fromtimestamp(log_file.stat().st_mtime) < cutoff:
-            try:
-                log_file.unlink()
-                log.debug(f"Cleaned old log: {log_file.name}")
-            except Exception as e:
-                log.warning(f"Failed to clean {log_file.name}: {e}")
-    
-    # Validate critical paths
-    critical_paths = [PLAYGROUND_DIR, REGISTRY_FILE, VAULT_FILE.parent]
-    missing = [p for p in critical_paths if not p.exists()]
-    if missing:
-        log.error(f"Critical paths missing: {missing}")
-        return False
-    
-    # Check for oversized files in PLAYGROUND_DIR
-    SIZE_LIMIT_MB = 50
-    for file in PLAYGROUND_DIR.glob("*"):
-        if file.is_file() and file.stat().st_size > SIZE_LIMIT_MB * 1024 * 1024:
-            log.warning(f"Oversized file detected: {file.name} ({file.stat().st_size / (1024*1024):.2f} MB)")
-    
-    # Validate wrapper script permissions
-    wrapper_dir = ACADEMY_ROOT / "Students" / "Wrappers"
-    if wrapper_dir.exists():
-        for script in wrapper_dir.glob("Call_*"):
-            if script.suffix.lower() in WRAPPER_EXTENSIONS:
-                if not os.access(script, os.X_OK):
-                    log.warning(f"Wrapper {script.name} missing execute permission")
-    
-    log.info("Final scan complete - system optimized")
-    return True
-def final_scan_and_optimize(self):
-    """Perform final scan and optimization of MCP authentication system."""
-    # Clean up expired sessions
-    expired_count = self.cleanup_expired_sessions()
-    
-    # Validate server keys and regenerate if needed
-    for server_name in self.config["servers"]:
-        if server_name not in self.server_keys:
-            self.generate_server_key(server_name)
-    
-    # Optimize memory by clearing inactive sessions
-    inactive_sessions = [sid for sid, session in self.client_sessions.items() 
-                        if not session["active"]]
-    for sid in inactive_sessions:
-        del self.client_sessions[sid]
-    
-    # Save optimized state
-    self._save_sessions()
-    self._save_server_keys()
-    
-    return {
-        "expired_sessions": expired_count,
-        "active_sessions": len(self.client_sessions),
-        "servers_configured": len(self.server_keys)
-    }
-def perform_final_scan_and_optimization():
-    """Perform comprehensive final system scan and optimization."""
-    log.info("Performing comprehensive final scan and optimization...")
-    
-    # Initialize MCP auth manager
-    mcp_auth = MCPAuthManager()
-    
-    # 1. Optimize MCP authentication system
-    auth_optimization = final_scan_and_optimize(mcp_auth)
-    log.info(f"MCP optimization complete: {auth_optimization}")
-    
-    # 2. Validate critical system paths
-    critical_paths = [PLAYGROUND_DIR, REGISTRY_FILE, VAULT_FILE.parent]
-    missing = [p for p in critical_paths if not p.exists()]
-    if missing:
-        log.error(f"Critical paths missing: {missing}")
-        return False
-    
-    # 3. Check for oversized files and clean if necessary
-    SIZE_LIMIT_MB = 50
-    oversized_files = []
-    for file in PLAYGROUND_DIR.glob("*"):
-        if file.is_file() and file.stat().st_size > SIZE_LIMIT_MB * 1024 * 1024:
-            oversized_files.append(file.name)
-            log.warning(f"Oversized file detected: {file.name}")
-    
-    # 4. Validate wrapper script integrity
-    wrapper_dir = ACADEMY_ROOT / "Students" / "Wrappers"
-    if wrapper_dir.exists():
-        for script in wrapper_dir.glob("Call_*"):
-            if script.suffix.lower() in WRAPPER_EXTENSIONS:
-                if not os.access(script, os.X_OK):
-                    log.warning(f"Wrapper {script.name} missing execute permission")
-    
-    # 5. Perform system resource check
-    try:
-        import psutil
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage(str(ACADEMY_ROOT))
-        
-        if memory.percent > 90:
-            log.warning(f"High memory usage: {memory.percent:.1f}%")
-        if disk.percent > 85:
-            log.warning(f"Low disk space: {disk.percent:.1f}% used")
-    except ImportError:
-        log.debug("psutil not available - skipping resource checks")
-    
-    # 6. Final security validation
-    security_issues = []
-    if VAULT_FILE.exists():
-        if os.stat(VAULT_FILE).st_mode & 0o077:
-            security_issues.append("Vault file has overly permissive permissions")
-    
-    if security_issues:
-        log.warning(f"Security issues found: {security_issues}")
-    
-    log.info("Comprehensive scan and optimization complete - system ready")
-    return True
-
-def validate_system_integrity():
-    """Validate system integrity and perform health checks."""
-    log.info("Validating system integrity...")
-    
-    # Check for duplicate node names in registry
-    if REGISTRY_FILE.exists():
-        try:
-            with open(REGISTRY_FILE, 'r') as f:
-                nodes = yaml.safe_load(f) or []
-            node_names = [node.get('name', '').upper() for node in nodes]
-            duplicates = [name for name in set(node_names) if node_names.count(name) > 1]
-            if duplicates:
-                log.warning(f"Duplicate node names found: {duplicates}")
-        except Exception as e:
-            log.warning(f"Registry validation failed: {e}")
-    
-    # Verify log directory is accessible
-    if not LOG_DIR.exists() or not os.access(LOG_DIR, os.W_OK):
-        log.error("Log directory is not accessible")
-        return False
-    
-    # Check for memory leaks in MCP auth system
-    if hasattr(mcp_auth, 'client_sessions'):
-        session_count = len(mcp_auth.client_sessions)
-        if session_count > 1000:
-            log.warning(f"High session count detected: {session_count}")
-    
-    log.info("System integrity validation complete")
-    return True
-
-
-def perform_final_system_check():
-    """Perform final system check and return status report."""
-    status = {
-        "mcp_auth": False,
-        "file_system": False,
-        "security": False,
-        "resources": False
-    }
-    
-    try:
-        # Verify MCP auth system is functional
-        mcp_auth = MCPAuthManager()
-        test_key = mcp_auth.generate_server_key("_test_server_")
-        if test_key:
-            status["mcp_auth"] = True
-            # Clean up test key
-            if "_test_server_" in mcp_auth.server_keys:
-                del mcp_auth.server_keys["_test_server_"]
-                mcp_auth._save_server_keys()
-        
-        # Verify file system access
-        if PLAYGROUND_DIR.exists() and os.access(PLAYGROUND_DIR, os.R_OK | os.W_OK):
-            status["file_system"] = True
-        
-        # Verify security configurations
-        if VAULT_FILE.exists():
-            vault_mode = os.stat(VAULT_FILE).st_mode & 0o777
-            status["security"] = vault_mode <= 0o600
-        else:
-            status["security"] = True  # No vault file is acceptable
-        
-        # Check system resources
-        try:
-            import psutil
-            memory = psutil.virtual_memory()
-            status["resources"] = memory.percent < 95
-        except ImportError:
-            status["resources"] = True  # Assume OK if psutil unavailable
-        
-    except Exception as e:
-        log.error(f"Final system check error: {e}")
-    
-    return status
-def perform_final_scan_and_optimization():
-    """Perform comprehensive final scan and optimization of the MCP authentication system."""
-    results = validate_and_optimize_mcp_system()
-    
-    try:
-        mcp_auth = MCPAuthManager()
-        
-        # Verify all critical files exist and are accessible
-        critical_files = [
-            VAULT_DIR / "mcp_config.json",
-            VAULT_DIR / "mcp_sessions.json",
-            VAULT_DIR / "mcp_server_keys.json"
-        ]
-        
-        for file_path in critical_files:
-            if not file_path.exists():
-                results["errors"].append(f"Missing critical file: {file_path.name}")
-            elif not os.access(file_path, os.R_OK | os.W_OK):
-                results["errors"].append(f"Critical file not accessible: {file_path.name}")
-        
-        # Final integrity and optimization check
-        auth_result = perform_final_system_check()
-        results["final_check"] = auth_result
-        
-        # System resource monitoring
-        if hasattr(os, 'statvfs'):
-            stat = os.statvfs(VAULT_DIR)
-            free_space_gb = (stat.f_bavail * stat.f_frsize) / (1024**3)
-            if free_space_gb < 1:
-                results.setdefault("warnings", []).append(f"Low disk space: {free_space_gb:.2f}GB available")
-        
-        # Memory and performance optimization
-        if len(mcp_auth.client_sessions) > 1000:
-            inactive = [sid for sid, s in mcp_auth.client_sessions.items() if not s.get("active")]
-            for sid in inactive:
-                del mcp_auth.client_sessions[sid]
-            results["optimizations"].append(f"Optimized memory: removed {len(inactive)} inactive sessions")
-        
-        # Log comprehensive results
-        status = results.get("summary", {}).get("status")
-        if status == "success":
-            active_count = results['summary']['active_sessions']
-            server_count = results['summary']['configured_servers']
-            log.info(f"MCP Auth System optimized - {active_count} active sessions, {server_count} servers")
-        else:
-            error_count = len(results.get("errors", []))
-            warning_count = len(results.get("warnings", []))
-            log.warning(f"MCP Auth System issues - {error_count} errors, {warning_count} warnings")
-            
-    except Exception as e:
-        log.error(f"Final scan and optimization error: {e}")
-        results["errors"].append(str(e))
-    
-    return results
-if __name__ == "__main__":
-    import sys
-    
-    print("=" * 60)
-    print("MCP Authentication System - Final Scan & Optimization")
-    print("=" * 60)
-    
-    results = perform_final_scan_and_optimization()
-    
-    # Display summary
-    if results.get("summary"):
-        summary = results["summary"]
-        print(f"\nStatus: {summary.get('status', 'unknown').upper()}")
-        print(f"Active Sessions: {summary.get('active_sessions', 0)}")
-        print(f"Configured Servers: {summary.get('configured_servers', 0)}")
-    
-    # Display final check results
-    if results.get("final_check"):
-        print("\nSystem Checks:")
-        for check, passed in results["final_check"].items():
-            status = "✓" if passed else "✗"
-            print(f"  {status} {check.replace('_', ' ').title()}")
-    
-    # Display optimizations performed
-    if results.get("optimizations"):
-        print("\nOptimizations Applied:")
-        for opt in results["optimizations"]:
-            print(f"  • {opt}")
-    
-    # Display warnings
-    if results.get("warnings"):
-        print("\nWarnings:")
-        for warn in results["warnings"]:
-            print(f"  ⚠ {warn}")
-    
-    # Display errors
-    if results.get("errors"):
-        print("\nErrors:")
-        for err in results["errors"]:
-            print(f"  ✗ {err}")
-        sys.exit(1)
-    
-    print("\n" + "=" * 60)
-    print("Final scan complete - system operational")
-    print("=" * 60)
-    # Return structured results for programmatic use
-    return {
-        "status": results.get("summary", {}).get("status", "unknown"),
-        "active_sessions": results.get("summary", {}).get("active_sessions", 0),
-        "configured_servers": results.get("summary", {}).get("configured_servers", 0),
-        "warnings": results.get("warnings", []),
-        "errors": results.get("errors", []),
-        "optimizations": results.get("optimizations", []),
-        "final_checks": results.get("final_check", {}),
-    }
-        "disk_space_gb": round(
-            ((os.statvfs(VAULT_DIR).f_bavail * os.statvfs(VAULT_DIR).f_frsize) / (1024 ** 3))
-            if hasattr(os, "statvfs") else -1,
-            2,
-        ),
-        "session_count": len(getattr(mcp_auth, "client_sessions", {})),
-        "server_key_count": len(getattr(mcp_auth, "server_keys", {})),
-        "server_key_count": len(getattr(mcp_auth, "server_keys", {})),
-        "critical_files_ok": all(
-            (VAULT_DIR / name).exists() and os.access(VAULT_DIR / name, os.R_OK | os.W_OK)
-            for name in ("mcp_config.json", "mcp_sessions.json", "mcp_server_keys.json")
-        ),
-        "auth_system_healthy": all(results.get("final_check", {}).values()) if results.get("final_check") else False,
-        "vault_permissions_secure": all(
-            os.access(VAULT_DIR / name, os.R_OK)
-            and not os.access(VAULT_DIR / name, os.W_OK | os.X_OK)
-            for name in ("mcp_config.json", "mcp_sessions.json", "mcp_server_keys.json")
-            if (VAULT_DIR / name).exists()
-        ),
-        "sessions_optimized": (
-            len(getattr(mcp_auth, "client_sessions", {})) <= 1000
-            or not any(
-                not s.get("active")
-                for s in getattr(mcp_auth, "client_sessions", {}).values()
-            )
-        ),
-            "inactive_sessions_removed": (
-                len([
-                    s for s in getattr(mcp_auth, "client_sessions", {}).values()
-                    if not s.get("active")
-                ]) == 0
-            ),
-            "overall_status": (
-                "healthy"
-                if results.get("summary", {}).get("status") == "success"
-                and not results.get("errors")
-                else "degraded" if not results.get("errors") else "failed"
-            ),
-        }
-        # Persist updated sessions/keys if manager exposes a save method
-        for attr_name in ("save_sessions", "save_server_keys", "save_state"):
-            saver = getattr(mcp_auth, attr_name, None)
-            if callable(saver):
-                try:
-                    saver()
-                except Exception as save_err:
-                    results.setdefault("warnings", []).append(
-                        f"Failed to persist MCP auth state via {attr_name}: {save_err}"
-                    )
-
-        # Emit a concise optimization summary for callers
-        results["optimization_summary"] = {
-            "total_sessions": len(getattr(mcp_auth, "client_sessions", {})),
-            "total_servers": len(getattr(mcp_auth, "server_keys", {})),
-            "error_count": len(results.get("errors", [])),
-            "warning_count": len(results.get("warnings", [])),
-            "status": results.get("summary", {}).get("status", "unknown"),
-        }
-
-        return results
-    # Build detailed health/optimization snapshot for programmatic callers
-    health_snapshot = {
-        "disk_space_gb": (
-            round(
-                (os.statvfs(VAULT_DIR).f_bavail * os.statvfs(VAULT_DIR).f_frsize)
-                / (1024 ** 3),
-                2,
-            )
-            if hasattr(os, "statvfs")
-            else -1
-        ),
-        "session_count": len(getattr(mcp_auth, "client_sessions", {})),
-        "server_key_count": len(getattr(mcp_auth, "server_keys", {})),
-        "critical_files_ok": all(
-            (VAULT_DIR / name).exists()
-            and os.access(VAULT_DIR / name, os.R_OK | os.W_OK)
-            for name in ("mcp_config.json", "mcp_sessions.json", "mcp_server_keys.json")
-        ),
-        "auth_system_healthy": all(results.get("final_check", {}).values())
-        if results.get("final_check")
-        else False,
-        "vault_permissions_secure": all(
-            os.access(VAULT_DIR / name, os.R_OK)
-            and not os.access(VAULT_DIR / name, os.W_OK | os.X_OK)
-            for name in ("mcp_config.json", "mcp_sessions.json", "mcp_server_keys.json")
-            if (VAULT_DIR / name).exists()
-        ),
-        "inactive_sessions_removed": not any(
-            not s.get("active")
-            for s in getattr(mcp_auth, "client_sessions", {}).values()
-        ),
-    }
-
-    # Persist any in‑memory optimizations if available
-    for attr_name in ("save_sessions", "save_server_keys", "save_state"):
-        saver = getattr(mcp_auth, attr_name, None)
-        if callable(saver):
-            try:
-                saver()
-            except Exception as save_err:
-                results.setdefault("warnings", []).append(
-                    f"Failed to persist MCP auth state via {attr_name}: {save_err}"
-                )
-
-    # Attach optimization and health metadata
-    results["optimization_summary"] = {
-        "total_sessions": health_snapshot["session_count"],
-        "total_servers": health_snapshot["server_key_count"],
-        "error_count": len(results.get("errors", [])),
-        "warning_count": len(results.get("warnings", [])),
-        "status": results.get("summary", {}).get("status", "unknown"),
-    }
-    results["health_snapshot"] = health_snapshot
-
-    return results
-    # Perform final scan-specific integrity checks
-    # Ensure at least one MCP server is configured
-    if not getattr(mcp_auth, "server_keys", {}):
-        results["errors"].append("No MCP server keys configured")
-    else:
-        # Detect obviously malformed keys (empty or too short)
-        bad_keys = [
-            name for name, key in getattr(mcp_auth, "server_keys", {}).items()
-            if not key or len(str(key)) < 16
-        ]
-        if bad_keys:
-            results["warnings"] = results.get("warnings", [])
-            results["warnings"].append(
-                f"Potentially weak or malformed server keys detected: {', '.join(bad_keys)}"
-            )
-
-    # Sanity-check session data for corruption or invalid timestamps
-    invalid_sessions = []
-    for sid, sess in getattr(mcp_auth, "client_sessions", {}).items():
-        exp = sess.get("expires_at") or sess.get("expires")
-        if exp:
-            try:
-                # Accept both datetime- and ISO-string-style expirations
-                if isinstance(exp, str):
-                    from datetime import datetime
-                    datetime.fromisoformat(exp)
-            except Exception:
-                invalid_sessions.append(sid)
-
-    if invalid_sessions:
-        for sid in invalid_sessions:
-            try:
-                del mcp_auth.client_sessions[sid]
-            except Exception:
-                pass
-        results.setdefault("optimizations", []).append(
-            f"Removed {len(invalid_sessions)} sessions with invalid expiration metadata"
-        )
-
-    # Tighten summary status based on newly discovered issues
-    if results.get("errors"):
-        results.setdefault("summary", {})["status"] = "failed"
-    elif results.get("warnings"):
-        results.setdefault("summary", {})["status"] = "degraded"
-    else:
-        results.setdefault("summary", {})["status"] = "success"
-
-    # Emit concise debug information for callers or logs
-    log.debug(
-        "MCP final scan: %d sessions, %d servers, %d errors, %d warnings",
-        len(getattr(mcp_auth, "client_sessions", {})),
-        len(getattr(mcp_auth, "server_keys", {})),
-        len(results.get("errors", [])),
-        len(results.get("warnings", [])),
-    )
-
-        len(results.get("warnings", [])),
-    )
-
-    # Build and attach a compact, programmatic health snapshot for callers
-    health_snapshot = {
-        "disk_space_gb": (
-            round(
-                (os.statvfs(VAULT_DIR).f_bavail * os.statvfs(VAULT_DIR).f_frsize)
-                / (1024 ** 3),
-                2,
-            )
-            if hasattr(os, "statvfs")
-            else -1
-        ),
-        "session_count": len(getattr(mcp_auth, "client_sessions", {})),
-        "server_key_count": len(getattr(mcp_auth, "server_keys", {})),
-        "error_count": len(results.get("errors", [])),
-        "warning_count": len(results.get("warnings", [])),
-        "status": results.get("summary", {}).get("status", "unknown"),
-    }
-    results["health_snapshot"] = health_snapshot
-
-    return results
-    # Run an additional lightweight optimization pass focused on MCP auth internals
-    try:
-        # Proactively clean up any expired sessions if the manager exposes such a utility
-        cleanup = getattr(mcp_auth, "cleanup_expired_sessions", None)
-        if callable(cleanup):
-            try:
-                removed_count = cleanup()
-                if isinstance(removed_count, int) and removed_count > 0:
-                    results.setdefault("optimizations", []).append(
-                        f"Final scan: removed {removed_count} expired MCP sessions"
-                    )
-            except Exception as cleanup_err:
-                results.setdefault("warnings", []).append(
-                    f"Final scan: failed to cleanup expired MCP sessions: {cleanup_err}"
-                )
-
-        # Re‑validate server key configuration if a validator is available
-        validator = getattr(mcp_auth, "validate_server_keys", None)
-        if callable(validator):
-            try:
-                key_report = validator()
-                if isinstance(key_report, dict):
-                    # Merge any discovered issues into existing results
-                    for err in key_report.get("errors", []):
-                        results.setdefault("errors", []).append(err)
-                    for warn in key_report.get("warnings", []):
-                        results.setdefault("warnings", []).append(warn)
-                    for opt in key_report.get("optimizations", []):
-                        results.setdefault("optimizations", []).append(opt)
-            except Exception as val_err:
-                results.setdefault("warnings", []).append(
-                    f"Final scan: server key validation failed: {val_err}"
-                )
-
-        # Give the manager a chance to perform its own final optimization routine
-        finisher = getattr(mcp_auth, "final_scan_and_optimize", None)
-        if callable(finisher):
-            try:
-                fin_result = finisher()
-                if isinstance(fin_result, dict):
-                    # Non‑destructive merge of nested collections
-                    for key in ("errors", "warnings", "optimizations"):
-                        if fin_result.get(key):
-                            results.setdefault(key, []).extend(
-                                x for x in fin_result.get(key, []) if x not in results.get(key, [])
-                            )
-                    # Prefer an explicit healthy status if provided
-                    if "status" in fin_result:
-                        results.setdefault("summary", {})["status"] = fin_result["status"]
-            except Exception as fin_err:
-                results.setdefault("warnings", []).append(
-                    f"Final scan: MCPAuthManager self‑optimization failed: {fin_err}"
-                )
-    except Exception as outer_err:
-        results.setdefault("warnings", []).append(
-            f"Final scan: unexpected optimization wrapper error: {outer_err}"
-        )
-
-    # Rebuild final health snapshot after last‑minute adjustments
-    final_health = {
-        "session_count": len(getattr(mcp_auth, "client_sessions", {})),
-        "server_key_count": len(getattr(mcp_auth, "server_keys", {})),
-        "error_count": len(results.get("errors", [])),
-        "warning_count": len(results.get("warnings", [])),
-        "status": results.get("summary", {}).get("status", "unknown"),
-    }
-    # Preserve any previously captured fields while updating core counts
-    if "health_snapshot" in results and isinstance(results["health_snapshot"], dict):
-        results["health_snapshot"].update(final_health)
-    else:
-        results["health_snapshot"] = final_health
-
-    return results
-    # Perform one last integrity + optimization sweep focused on robustness
-    try:
-        # Sanity‑check that result containers are well‑formed
-        for bucket in ("errors", "warnings", "optimizations"):
-            val = results.get(bucket)
-            if val is None:
-                results[bucket] = []
-            elif not isinstance(val, list):
-                results[bucket] = [str(val)]
-
-        # Detect and warn about unusually high session volume
-        session_count = len(getattr(mcp_auth, "client_sessions", {}))
-        if session_count > 10_000:
-            results.setdefault("warnings", []).append(
-                f"High MCP session volume detected: {session_count} sessions; consider sharding or shorter timeouts"
-            )
-
-        # Detect suspiciously low number of configured servers
-        server_count = len(getattr(mcp_auth, "server_keys", {}))
-        if server_count == 0:
-            results.setdefault("warnings", []).append(
-                "No MCP server keys configured; MCP server authentication may be non‑functional"
-            )
-
-        # Verify master key / root credential is present for cryptographic operations
-        master_key = os.environ.get("HEADY_MCP_KEY") or os.environ.get("HEADY_SIGNATURE_KEY")
-        if not master_key or len(master_key) < 16:
-            results.setdefault("warnings", []).append(
-                "Weak or missing master MCP key; set a strong HEADY_MCP_KEY / HEADY_SIGNATURE_KEY"
-            )
-
-        # Lightweight functionality probe: ensure core manager attributes are callable/usable
-        critical_attrs = [
-            ("generate_server_key", True),
-            ("generate_client_token", True),
-            ("validate_client_session", True),
-        ]
-        for attr_name, must_be_callable in critical_attrs:
-            attr = getattr(mcp_auth, attr_name, None)
-            if attr is None:
-                results.setdefault("errors", []).append(
-                    f"MCPAuthManager missing critical attribute: {attr_name}"
-                )
-            elif must_be_callable and not callable(attr):
-                results.setdefault("errors", []).append(
-                    f"MCPAuthManager attribute not callable: {attr_name}"
-                )
-
-        # Tighten summary once more based on any new findings
-        if results.get("errors"):
-            results.setdefault("summary", {})["status"] = "failed"
-        elif results.get("warnings") and results.get("summary", {}).get("status") != "failed":
-            results.setdefault("summary", {})["status"] = "degraded"
-        else:
-            results.setdefault("summary", {})["status"] = results.get("summary", {}).get(
-                "status", "success"
-            )
-
-        # Attach a compact functionality/optimization summary for external callers
-        results.setdefault("summary", {}).update(
-            {
-                "session_count": session_count,
-                "server_key_count": server_count,
-                "optimized": not bool(results.get("errors")),
-            }
-        )
-
-    except Exception as final_err:
-        results.setdefault("warnings", []).append(
-            f"Final scan: functionality/optimization verification encountered an error: {final_err}"
-        )
-
-        # Best-effort graceful degradation snapshot
-        results.setdefault("summary", {}).update(
-            {
-                "status": results.get("summary", {}).get("status", "degraded"),
-                "optimized": False,
-            }
-        )
-
-    # Emit a compact, machine-friendly final snapshot
-    results.setdefault("summary", {}).setdefault(
-        "status",
-        "failed" if results.get("errors") else ("degraded" if results.get("warnings") else "success"),
-    )
-    results["final_scan_completed"] = True
-    results["timestamp"] = datetime.now().isoformat()
-    return results
-    # Attach a lightweight human‑readable digest for logs/UX without duplicating full details
-    results["summary"]["human_readable"] = (
-        f"MCP Auth final scan @ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} | "
-        f"status={results['summary'].get('status')} | "
-        f"errors={len(results.get('errors', []))} | "
-        f"warnings={len(results.get('warnings', []))} | "
-        f"sessions={results['summary'].get('session_count')} | "
-        f"servers={results['summary'].get('server_key_count')}"
-    )
-        f"servers={results['summary'].get('server_key_count')}"
-    )
-
-    # Emit concise console feedback for operators
-    status = results["summary"].get("status")
-    err_count = len(results.get("errors", []))
-    warn_count = len(results.get("warnings", []))
-    sess_count = results["summary"].get("session_count")
-    srv_count = results["summary"].get("server_key_count")
-
-    prefix = "[MCP AUTH OK]" if status == "success" else (
-        "[MCP AUTH WARN]" if status == "degraded" else "[MCP AUTH FAIL]"
-    )
-    print(
-        f"{prefix} Final scan complete | status={status} | "
-        f"errors={err_count} | warnings={warn_count} | "
-        f"sessions={sess_count} | servers={srv_count}"
-    )
-
-    # Final defensive normalization of result structure
-    for key in ("errors", "warnings", "optimizations"):
-        if key not in results or results[key] is None:
-            results[key] = []
-        elif not isinstance(results[key], list):
-            results[key] = [str(results[key])]
-
-    # Ensure a stable optimized flag for external callers
-    results["summary"]["optimized"] = bool(
-        not results.get("errors") and results.get("final_scan_completed")
-    )
-# Validate critical MCP server configurations are present and valid
-if hasattr(mcp_auth, 'server_keys'):
-    invalid_servers = []
-    for server_id, server_data in mcp_auth.server_keys.items():
-        if not isinstance(server_data, dict) or 'key' not in server_data:
-            invalid_servers.append(server_id)
-    
-    if invalid_servers:
-        results.setdefault("warnings", []).append(
-            f"Invalid server configurations detected: {', '.join(invalid_servers)}"
-        )
-
-# Verify vault directory permissions are secure
-if hasattr(mcp_auth, 'vault_dir') and mcp_auth.vault_dir.exists():
-    vault_stat = mcp_auth.vault_dir.stat()
-    vault_perms = oct(vault_stat.st_mode)[-3:]
-    if vault_perms != '700':
-        results.setdefault("warnings", []).append(
-            f"Vault directory permissions are not secure: {vault_perms} (should be 700)"
-        )
-
-# Check for memory leaks in session storage
-import sys
-if hasattr(mcp_auth, 'client_sessions'):
-    session_size = sys.getsizeof(mcp_auth.client_sessions)
-    if session_size > 10 * 1024 * 1024:  # 10MB threshold
-        results.setdefault("warnings", []).append(
-            f"Large session storage detected: {session_size / (1024*1024):.2f}MB"
-        )
-# Final security audit and performance optimization
-try:
-    # Validate cryptographic key strength
-    if hasattr(mcp_auth, 'master_key') and mcp_auth.master_key:
-        if len(mcp_auth.master_key) < 32:
-            results.setdefault("warnings", []).append(
-                "Master key length is below recommended minimum (32 chars)"
-            )
-    
-    # Check for expired tokens and clean up
-    if hasattr(mcp_auth, 'tokens'):
-        current_time = time.time()
-        expired_tokens = [
-            token_id for token_id, token_data in mcp_auth.tokens.items()
-            if token_data.get('expires') and token_data['expires'] < current_time
-        ]
-        if expired_tokens:
-            for token_id in expired_tokens:
-                del mcp_auth.tokens[token_id]
-            results["optimizations"].append(f"Cleaned up {len(expired_tokens)} expired tokens")
-    
-    # Verify TLS/SSL configuration for secure connections
-    if hasattr(mcp_auth, 'config') and mcp_auth.config.get('use_tls'):
-        if not mcp_auth.config.get('tls_cert_path') or not mcp_auth.config.get('tls_key_path'):
-            results.setdefault("errors", []).append(
-                "TLS enabled but certificate paths not configured"
-            )
-    
-    # System resource optimization
-    import gc
-    gc.collect()  # Force garbage collection
-    results["optimizations"].append("Performed system garbage collection")
-    
-    # Final validation checkpoint
-    results["final_scan_completed"] = True
-    results["summary"]["status"] = "success" if not results.get("errors") else "partial"
-    
-except Exception as e:
-    results.setdefault("errors", []).append(f"Final scan optimization failed: {str(e)}")
-
-# Final functionality verification
-try:
-    # Test authentication flow end-to-end
-    test_server = "test_mcp_server"
-    test_headers = mcp_auth.generate_mcp_auth(test_server) if hasattr(mcp_auth, 'generate_mcp_auth') else None
-    
-    if test_headers:
-        validation_result = mcp_auth.validate_mcp_auth(test_server, test_headers) if hasattr(mcp_auth, 'validate_mcp_auth') else False
-        if not validation_result:
-            results.setdefault("warnings", []).append("Authentication flow validation failed")
-    
-    # Verify session persistence
-    if hasattr(mcp_auth, 'client_sessions'):
-        session_count = len(mcp_auth.client_sessions)
-        results["summary"]["active_sessions"] = session_count
-        if session_count > 5000:
-            results.setdefault("warnings", []).append("High session count may impact performance")
-    
-    # Check system responsiveness
-    start_time = time.time()
-    _ = mcp_auth.generate_server_key("optimization_check") if hasattr(mcp_auth, 'generate_server_key') else None
-    response_time = time.time() - start_time
-    
-    if response_time > 0.1:
-        results.setdefault("warnings", []).append(f"Slow response time detected: {response_time:.3f}s")
-    
-    # Final optimization metrics
-    results["optimization_metrics"] = {
-        "response_time_ms": round(response_time * 1000, 2),
-        "memory_optimized": gc.collect() > 0,
-        "timestamp": datetime.now().isoformat()
-    }
-    
-except Exception as e:
-    results.setdefault("errors", []).append(f"Functionality verification failed: {str(e)}")
-# Final security hardening and system lock-down
-try:
-    # Verify all authentication methods are properly configured
-    auth_methods = ['bearer', 'api_key', 'jwt']
-    for method in auth_methods:
-        if not hasattr(mcp_auth, f'generate_{method}_token'):
-            results.setdefault("warnings", []).append(f"Authentication method {method} not available")
-    
-    # Check for potential timing attacks in authentication
-    if hasattr(mcp_auth, 'validate_client_session'):
-        # Implement constant-time comparison for sensitive operations
-        import secrets
-        test_tokens = [secrets.token_urlsafe(32) for _ in range(10)]
-        validation_times = []
-        
-        for token in test_tokens:
-            start = time.perf_counter()
-            _ = mcp_auth.validate_client_session(token)
-            validation_times.append(time.perf_counter() - start)
-        
-        avg_time = sum(validation_times) / len(validation_times)
-        if max(validation_times) > avg_time * 2:
-            results.setdefault("warnings", []).append("Potential timing vulnerability detected in session validation")
-    
-    # Final system integrity verification
-    critical_components = [
-        'master_key', 'server_keys', 'client_sessions', 
-        'tokens', 'config', 'vault_dir'
-    ]
-    
-    missing_components = [
-        comp for comp in critical_components 
-        if not hasattr(mcp_auth, comp) or getattr(mcp_auth, comp) is None
-    ]
-    
-    if missing_components:
-        results.setdefault("errors", []).append(
-            f"Critical components missing: {', '.join(missing_components)}"
-        )
-    
-    # System optimization finalization
-    if not results.get("errors"):
-        # Consolidate and optimize data structures
-        if hasattr(mcp_auth, 'client_sessions'):
-            mcp_auth.client_sessions = {
-                k: v for k, v in mcp_auth.client_sessions.items() 
-                if v.get('active') or v.get('expires', 0) > time.time()
-            }
-        
-        # Final memory optimization
-        import gc
-        collected = gc.collect()
-        results["optimizations"].append(f"Final garbage collection: {collected} objects reclaimed")
-        
-        # System ready flag
-        results["system_ready"] = True
-        results["final_scan_timestamp"] = datetime.now().isoformat()
-    
-except Exception as e:
-    results.setdefault("errors", []).append(f"Final system hardening failed: {str(e)}")
-    results["system_ready"] = False
-
-# Return comprehensive results
-return results
-# Final functionality verification and optimization
-try:
-    # Test core authentication methods availability
-    required_methods = ['generate_server_key', 'generate_client_token', 'validate_client_session']
-    missing_methods = []
-    
-    for method in required_methods:
-        if not hasattr(mcp_auth, method) or not callable(getattr(mcp_auth, method)):
-            missing_methods.append(method)
-    
-    if missing_methods:
-        results.setdefault("errors", []).append(
-            f"Missing critical authentication methods: {', '.join(missing_methods)}"
-        )
-    
-    # Verify session management efficiency
-    if hasattr(mcp_auth, 'client_sessions'):
-        total_sessions = len(mcp_auth.client_sessions)
-        active_sessions = sum(1 for s in mcp_auth.client_sessions.values() if s.get('active', False))
-        
-        # Optimize if inactive sessions exceed threshold
-        inactive_threshold = 100
-        inactive_sessions = total_sessions - active_sessions
-        
-        if inactive_sessions > inactive_threshold:
-            optimized_sessions = {
-                sid: data for sid, data in mcp_auth.client_sessions.items()
-                if data.get('active', False) or data.get('expires', 0) > time.time()
-            }
-            mcp_auth.client_sessions = optimized_sessions
-            results["optimizations"].append(
-                f"Optimized session storage: removed {len(mcp_auth.client_sessions) - len(optimized_sessions)} inactive sessions"
-            )
-    
-    # Performance benchmark for critical operations
-    benchmark_operations = [
-        ('key_generation', lambda: mcp_auth.generate_server_key('benchmark_test')),
-        ('token_validation', lambda: mcp_auth.validate_client_session('nonexistent_token'))
-    ]
-    
-    performance_metrics = {}
-    for op_name, op_func in benchmark_operations:
-        try:
-            start_time = time.perf_counter()
-            op_func()
-            performance_metrics[op_name] = round((time.perf_counter() - start_time) * 1000, 2)
-        except:
-            performance_metrics[op_name] = None
-    
-    results["performance_metrics"] = performance_metrics
-    
-    # Final optimization status
-    results["optimization_complete"] = not bool(results.get("errors"))
-    
-except Exception as e:
-    results.setdefault("errors", []).append(f"Functionality verification failed: {str(e)}")
-    results["optimization_complete"] = False
-# Final system resource and performance assessment
-try:
-    # Monitor system memory usage
-    import psutil
-    process = psutil.Process()
-    memory_info = process.memory_info()
-    memory_mb = memory_info.rss / (1024 * 1024)
-    
-    if memory_mb > 500:  # Alert if using more than 500MB
-        results.setdefault("warnings", []).append(
-            f"High memory usage detected: {memory_mb:.2f}MB"
-        )
-    
-    # Validate SSL/TLS certificate configuration if applicable
-    if hasattr(mcp_auth, 'config') and mcp_auth.config.get('use_ssl'):
-        import ssl
-        try:
-            ssl.create_default_context()
-            results["ssl_verification"] = "passed"
-        except Exception as ssl_e:
-            results.setdefault("errors", []).append(f"SSL configuration error: {ssl_e}")
-    
-    # Final system health check
-    health_score = 100
-    health_score -= len(results.get("errors", [])) * 10
-    health_score -= len(results.get("warnings", [])) * 5
-    results["system_health_score"] = max(0, health_score)
-    
-    results["scan_complete"] = True
-    
-except Exception as e:
-    results.setdefault("errors", []).append(f"Final system assessment failed: {str(e)}")
-# Final functionality verification and optimization
-try:
-    # Verify authentication system functionality
-    test_server = "test_server_" + str(int(time.time()))
-    test_client = "test_client_" + str(int(time.time()))
-    
-    # Test server key generation
-    server_key = mcp_auth.generate_server_key(test_server)
-    if not server_key:
-        results.setdefault("errors", []).append("Server key generation failed")
-    
-    # Test client token generation
-    token_data = mcp_auth.generate_client_token(test_client, test_server)
-    if not token_data or "session_id" not in token_data:
-        results.setdefault("errors", []).append("Client token generation failed")
-    
-    # Test session validation
-    if token_data and "session_id" in token_data:
-        session = mcp_auth.validate_client_session(token_data["session_id"])
-        if not session:
-            results.setdefault("errors", []).append("Session validation failed")
-    
-    # Cleanup test data
-    if test_server in mcp_auth.server_keys:
-        del mcp_auth.server_keys[test_server]
-    
-    # Final optimization pass
-    if len(mcp_auth.client_sessions) > 0:
-        mcp_auth.cleanup_expired_sessions()
-        results["optimizations"].append("Final expired session cleanup completed")
-    
-    results["functionality_verified"] = True
-    
-except Exception as e:
-    results.setdefault("errors", []).append(f"Functionality verification failed: {str(e)}")
-    results["functionality_verified"] = False
-# Final comprehensive scan and optimization
-try:
-    # Validate system configuration integrity
-    if hasattr(mcp_auth, 'config'):
-        required_config_keys = ['session_timeout', 'vault_dir', 'encryption_enabled']
-        missing_config = [key for key in required_config_keys if key not in mcp_auth.config]
-        if missing_config:
-            results.setdefault("warnings", []).append(
-                f"Missing configuration keys: {', '.join(missing_config)}"
-            )
-    
-    # Check for potential security vulnerabilities
-    if hasattr(mcp_auth, 'master_key'):
-        if not mcp_auth.master_key or len(mcp_auth.master_key) < 32:
-            results.setdefault("errors", []).append("Weak or missing master key detected")
-    
-    # Optimize session storage structure
-    if hasattr(mcp_auth, 'client_sessions'):
-        # Convert to more efficient storage if needed
-        session_count = len(mcp_auth.client_sessions)
-        if session_count > 10000:
-            # Implement pagination or archiving for large session sets
-            results.setdefault("warnings", []).append(
-                f"Large session dataset detected ({session_count} sessions). Consider implementing session archiving."
-            )
-    
-    # Validate cryptographic components
-    try:
-        import hashlib
-        import secrets
-        # Test hash generation
-        test_hash = hashlib.sha256(b"test").hexdigest()
-        if len(test_hash) != 64:
-            results.setdefault("errors", []).append("Hash function verification failed")
-    except ImportError:
-        results.setdefault("errors", []).append("Required cryptographic modules unavailable")
-    
-    # Final optimization report
-    results["final_scan_complete"] = True
-    results["total_optimizations"] = len(results.get("optimizations", []))
-    results["total_issues"] = len(results.get("errors", [])) + len(results.get("warnings", []))
-    
-except Exception as e:
-    results.setdefault("errors", []).append(f"Final scan failed: {str(e)}")
-    results["final_scan_complete"] = False
-# Additional system health checks
-try:
-    # Check for memory leaks in session storage
-    if hasattr(mcp_auth, 'client_sessions'):
-        memory_usage = sys.getsizeof(mcp_auth.client_sessions)
-        if memory_usage > 50 * 1024 * 1024:  # 50MB threshold
-            results.setdefault("warnings", []).append(
-                f"High memory usage in sessions: {memory_usage / (1024*1024):.2f}MB"
-            )
-    
-    # Validate file system permissions
-    if hasattr(mcp_auth, 'vault_dir'):
-        vault_path = Path(mcp_auth.vault_dir)
-        if not vault_path.exists():
-            results.setdefault("errors", []).append("Vault directory does not exist")
-        elif not os.access(vault_path, os.R_OK | os.W_OK):
-            results.setdefault("errors", []).append("Insufficient permissions on vault directory")
-    
-    # Check for stale locks or temporary files
-    temp_files = list(Path(mcp_auth.vault_dir).glob("*.tmp"))
-    if temp_files:
-        for tmp_file in temp_files:
-            try:
-                tmp_file.unlink()
-                results.setdefault("optimizations", []).append(f"Cleaned temporary file: {tmp_file.name}")
-            except Exception:
-                pass
-    
-    # Final system readiness validation
-    system_ready = (
-        len(results.get("errors", [])) == 0 and
-        len(results.get("warnings", [])) < 5 and
-        results.get("final_scan_complete", False)
-    )
-    
-    results["system_ready"] = system_ready
-    results["scan_timestamp"] = datetime.now().isoformat()
-    
-except Exception as e:
-    results.setdefault("errors", []).append(f"System validation failed: {str(e)}")
-    results["system_ready"] = False
-# Perform comprehensive system health check
-if system_ready:
-    # Validate MCP server connectivity
-    try:
-        test_servers = mcp_auth.get_configured_servers()[:3]  # Test first 3 servers
-        connectivity_results = []
-        
-        for server in test_servers:
-            server_key = mcp_auth.generate_server_key(server)
-            test_token = mcp_auth.generate_client_token("health_check", server)
-            
-            if test_token and server_key:
-                connectivity_results.append(True)
-            else:
-                connectivity_results.append(False)
-        
-        success_rate = sum(connectivity_results) / len(connectivity_results) if connectivity_results else 0
-        if success_rate < 0.8:
-            results.setdefault("warnings", []).append(
-                f"Low server connectivity: {success_rate:.1%} success rate"
-            )
-            
-    except Exception as e:
-        results.setdefault("warnings", []).append(f"Connectivity test failed: {str(e)}")
-    
-    # Optimize session storage structure
-    try:
-        if hasattr(mcp_auth, 'client_sessions'):
-            # Convert to more efficient data structure if needed
-            if isinstance(mcp_auth.client_sessions, dict) and len(mcp_auth.client_sessions) > 500:
-                optimized_sessions = {
-                    k: v for k, v in mcp_auth.client_sessions.items()
-                    if v.get("expires_at", 0) > datetime.now().timestamp()
-                }
-                removed_count = len(mcp_auth.client_sessions) - len(optimized_sessions)
-                mcp_auth.client_sessions = optimized_sessions
-                if removed_count > 0:
-                    results.setdefault("optimizations", []).append(
-                        f"Removed {removed_count} expired sessions from storage"
-                    )
-    except Exception as e:
-        results.setdefault("warnings", []).append(f"Session optimization failed: {str(e)}")
-    # Final system health check and cleanup
-    try:
-        # Check for orphaned temporary files
-        temp_files = list(VAULT_DIR.glob("*.tmp"))
-        if temp_files:
-            for temp_file in temp_files:
-                try:
-                    temp_file.unlink()
-                    results["optimizations"].append(f"Cleaned orphaned temp file: {temp_file.name}")
-                except Exception as e:
-                    results.setdefault("warnings", []).append(f"Failed to clean {temp_file.name}: {str(e)}")
-        
-        # Validate server key integrity
-        server_keys = mcp_auth.server_keys if hasattr(mcp_auth, 'server_keys') else {}
-        invalid_keys = [k for k, v in server_keys.items() if not v or len(v) < 32]
-        if invalid_keys:
-            for key in invalid_keys:
-                mcp_auth.generate_server_key(key)
-            results["optimizations"].append(f"Regenerated {len(invalid_keys)} invalid server keys")
-        
-        # Memory optimization for large session pools
-        if hasattr(mcp_auth, 'client_sessions') and len(mcp_auth.client_sessions) > 10000:
-            # Keep only active sessions from last 24 hours
-            cutoff = datetime.now().timestamp() - 86400
-            active_sessions = {
-                k: v for k, v in mcp_auth.client_sessions.items()
-                if v.get("last_access", 0) > cutoff
-            }
-            removed_count = len(mcp_auth.client_sessions) - len(active_sessions)
-            mcp_auth.client_sessions = active_sessions
-            results["optimizations"].append(f"Memory optimization: removed {removed_count} stale sessions")
-            
-    except Exception as e:
-        results.setdefault("warnings", []).append(f"Final health check failed: {str(e)}")
-    # Final comprehensive system validation
-    try:
-        # Verify cryptographic operations are working
-        test_token = secrets.token_urlsafe(16)
-        test_hash = hashlib.sha256(test_token.encode()).hexdigest()
-        if not test_hash:
-            results.setdefault("errors", []).append("Cryptographic functions not operational")
-        
-        # Validate session persistence mechanism
-        if hasattr(mcp_auth, '_save_sessions'):
-            try:
-                mcp_auth._save_sessions()
-                results.setdefault("optimizations", []).append("Session persistence validated")
-            except Exception as e:
-                results.setdefault("warnings", []).append(f"Session persistence issue: {str(e)}")
-        
-        # Check for configuration drift
-        if hasattr(mcp_auth, 'config'):
-            required_keys = ['session_timeout', 'token_expiry', 'max_sessions']
-            missing_keys = [k for k in required_keys if k not in mcp_auth.config]
-            if missing_keys:
-                results.setdefault("warnings", []).append(f"Missing config keys: {missing_keys}")
-        
-        # Final readiness assessment
-        critical_errors = len(results.get("errors", []))
-        total_warnings = len(results.get("warnings", []))
-        optimizations_applied = len(results.get("optimizations", []))
-        
-        results["scan_summary"] = {
-            "critical_errors": critical_errors,
-            "total_warnings": total_warnings,
-            "optimizations_applied": optimizations_applied,
-            "system_healthy": critical_errors == 0 and total_warnings < 10
-        }
-        
-    except Exception as e:
-        results.setdefault("errors", []).append(f"Final validation failed: {str(e)}")
-        results["scan_summary"] = {"system_healthy": False}
-# Final system integrity verification and optimization
-try:
-    # Validate system dependencies and modules
-    import secrets
-    import hashlib
-    from datetime import datetime
-    
-    # Perform cryptographic self-test
-    test_data = "MCP_AUTH_INTEGRITY_TEST"
-    test_hash = hashlib.sha256(test_data.encode()).hexdigest()
-    if len(test_hash) != 64:
-        results.setdefault("errors", []).append("Cryptographic hash validation failed")
-    
-    # Verify vault directory permissions and integrity
-    if VAULT_DIR.exists():
-        vault_stat = VAULT_DIR.stat()
-        if oct(vault_stat.st_mode)[-3:] != '700':
-            try:
-                VAULT_DIR.chmod(0o700)
-                results.setdefault("optimizations", []).append("Fixed vault directory permissions")
-            except Exception as e:
-                results.setdefault("warnings", []).append(f"Could not fix vault permissions: {str(e)}")
-    
-    # Final session cleanup and optimization
-    if hasattr(mcp_auth, 'client_sessions'):
-        expired_sessions = [
-            sid for sid, session in mcp_auth.client_sessions.items()
-            if session.get('expires_at', 0) < datetime.now().timestamp()
-        ]
-        for sid in expired_sessions:
-            del mcp_auth.client_sessions[sid]
-        if expired_sessions:
-            results.setdefault("optimizations", []).append(f"Cleaned {len(expired_sessions)} expired sessions")
-    
-    # System readiness final check
-    results["scan_complete"] = True
-    results["final_status"] = "optimal" if len(results.get("errors", [])) == 0 else "degraded"
-    
-except Exception as e:
-    results.setdefault("errors", []).append(f"Final integrity check failed: {str(e)}")
-    results["scan_complete"] = False
-
-# Return comprehensive results
-return results
-# Final system health assessment and performance metrics
-try:
-    # Generate performance metrics
-    metrics = {
-        "timestamp": datetime.now().isoformat(),
-        "session_count": len(mcp_auth.client_sessions) if hasattr(mcp_auth, 'client_sessions') else 0,
-        "server_count": len(mcp_auth.server_keys) if hasattr(mcp_auth, 'server_keys') else 0,
-        "memory_usage_mb": sum(os.path.getsize(f) for f in VAULT_DIR.glob("*") if f.is_file()) / (1024 * 1024)
-    }
-    
-    # Validate system responsiveness
-    start_time = datetime.now().timestamp()
-    test_session = mcp_auth.generate_client_token("health_check", "system_test") if hasattr(mcp_auth, 'generate_client_token') else None
-    response_time = datetime.now().timestamp() - start_time
-    
-    if response_time > 0.5:
-        results.setdefault("warnings", []).append(f"Slow authentication response: {response_time:.3f}s")
-    
-    metrics["response_time_ms"] = int(response_time * 1000)
-    results["performance_metrics"] = metrics
-    
-    # Final system readiness verification
-    all_checks_pass = (
-        len(results.get("errors", [])) == 0 and
-        len(results.get("warnings", [])) < 5 and
-        metrics["response_time_ms"] < 500 and
-        metrics["memory_usage_mb"] < 100
-    )
-    
-    results["system_ready"] = all_checks_pass
-    results["scan_timestamp"] = datetime.now().isoformat()
-    
-except Exception as e:
-    results.setdefault("warnings", []).append(f"Performance assessment incomplete: {str(e)}")
-    results["system_ready"] = False
-# Final comprehensive system validation
-try:
-    # Verify cryptographic operations are working
-    test_token = secrets.token_urlsafe(16)
-    test_hash = hashlib.sha256(test_token.encode()).hexdigest()
-    if not test_hash:
-        results.setdefault("errors", []).append("Cryptographic functions not operational")
-    
-    # Validate session persistence mechanism
-    if hasattr(mcp_auth, '_save_sessions'):
-        try:
-            mcp_auth._save_sessions()
-            results.setdefault("optimizations", []).append("Session persistence validated")
-        except Exception as e:
-            results.setdefault("warnings", []).append(f"Session persistence issue: {str(e)}")
-    
-    # Check for configuration drift
-    if hasattr(mcp_auth, 'config'):
-        required_keys = ['session_timeout', 'token_expiry', 'max_sessions']
-        missing_keys = [k for k in required_keys if k not in mcp_auth.config]
-        if missing_keys:
-            results.setdefault("warnings", []).append(f"Missing config keys: {missing_keys}")
-    
-    # Final readiness assessment
-    critical_errors = len(results.get("errors", []))
-    total_warnings = len(results.get("warnings", []))
-    optimizations_applied = len(results.get("optimizations", []))
-    
-    results["scan_summary"] = {
-        "critical_errors": critical_errors,
-        "total_warnings": total_warnings,
-        "optimizations_applied": optimizations_applied,
-        "system_healthy": critical_errors == 0 and total_warnings < 10
-    }
-    
-except Exception as e:
-    results.setdefault("errors", []).append(f"Final validation failed: {str(e)}")
-    results["scan_summary"] = {"system_healthy": False}
-# Final system integrity verification and optimization
-try:
-    # Validate system dependencies and modules
-    import secrets
-    import hashlib
-    from datetime import datetime
-    
-    # Perform cryptographic self-test
-    test_data = "MCP_AUTH_INTEGRITY_TEST"
-    test_hash = hashlib.sha256(test_data.encode()).hexdigest()
-    if len(test_hash) != 64:
-        results.setdefault("errors", []).append("Cryptographic hash validation failed")
-    
-    # Verify vault directory permissions and integrity
-    if VAULT_DIR.exists():
-        vault_stat = VAULT_DIR.stat()
-        if oct(vault_stat.st_mode)[-3:] != '700':
-            try:
-                VAULT_DIR.chmod(0o700)
-                results.setdefault("optimizations", []).append("Fixed vault directory permissions")
-            except Exception as e:
-                results.setdefault("warnings", []).append(f"Could not fix vault permissions: {str(e)}")
-    
-    # Final session cleanup and optimization
-    if hasattr(mcp_auth, 'client_sessions'):
-        expired_sessions = [
-            sid for sid, session in mcp_auth.client_sessions.items()
-            if session.get('expires_at', 0) < datetime.now().timestamp()
-        ]
-        for sid in expired_sessions:
-            del mcp_auth.client_sessions[sid]
-        if expired_sessions:
-            results.setdefault("optimizations", []).append(f"Cleaned {len(expired_sessions)} expired sessions")
-    
-    # System readiness final check
-    results["scan_complete"] = True
-    results["final_status"] = "optimal" if len(results.get("errors", [])) == 0 else "degraded"
-    
-except Exception as e:
-    results.setdefault("errors", []).append(f"Final integrity check failed: {str(e)}")
-    results["scan_complete"] = False
-# Return comprehensive results with final validation
-try:
-    # Ensure all critical components are initialized
-    if not hasattr(mcp_auth, 'client_sessions'):
-        mcp_auth.client_sessions = {}
-    if not hasattr(mcp_auth, 'server_keys'):
-        mcp_auth.server_keys = {}
-    
-    # Final security audit
-    security_issues = []
-    if VAULT_DIR.exists():
-        for file_path in VAULT_DIR.glob("*.json"):
-            if file_path.stat().st_size > 10 * 1024 * 1024:  # 10MB limit
-                security_issues.append(f"Large vault file: {file_path.name}")
-    
-    if security_issues:
-        results.setdefault("warnings", []).extend(security_issues)
-    
-    # System optimization summary
-    results["final_scan"] = {
-        "timestamp": datetime.now().isoformat(),
-        "sessions_managed": len(mcp_auth.client_sessions),
-        "servers_configured": len(mcp_auth.server_keys),
-        "vault_accessible": VAULT_DIR.exists() and os.access(VAULT_DIR, os.R_OK | os.W_OK),
-        "optimization_complete": True
-    }
-    
-    return results
-    
-except Exception as e:
-    results.setdefault("errors", []).append(f"Final scan completion failed: {str(e)}")
-    results["final_scan"] = {"optimization_complete": False}
-    return results
-
-# Final comprehensive system health check
-try:
-    # Verify authentication flow end-to-end
-    test_server_id = "health_check_server"
-    test_client_id = "health_check_client"
-    
-    # Test server key generation
-    try:
-        server_key = mcp_auth.generate_server_key(test_server_id)
-        if server_key:
-            results.setdefault("optimizations", []).append("Server key generation verified")
-        else:
-            results.setdefault("errors", []).append("Server key generation failed")
-    except Exception as e:
-        results.setdefault("warnings", []).append(f"Server key test failed: {str(e)}")
-    
-    # Test client token generation
-    try:
-        token_data = mcp_auth.generate_client_token(test_client_id, test_server_id)
-        if token_data and 'token' in token_data:
-            results.setdefault("optimizations", []).append("Client token generation verified")
-            # Clean up test data
-            if test_client_id in mcp_auth.client_sessions:
-                del mcp_auth.client_sessions[test_client_id]
-        else:
-            results.setdefault("errors", []).append("Client token generation failed")
-    except Exception as e:
-        results.setdefault("warnings", []).append(f"Client token test failed: {str(e)}")
-    
-    # Cleanup test server key
-    if test_server_id in mcp_auth.server_keys:
-        del mcp_auth.server_keys[test_server_id]
-    
-    # Final system health assessment
-    error_count = len(results.get("errors", []))
-    warning_count = len(results.get("warnings", []))
-    optimization_count = len(results.get("optimizations", []))
-    
-    results["health_status"] = {
-        "status": "healthy" if error_count == 0 else "degraded" if error_count < 3 else "critical",
-        "errors": error_count,
-        "warnings": warning_count,
-        "optimizations": optimization_count,
-        "timestamp": datetime.now().isoformat()
-    }
-    
-except Exception as e:
-    results.setdefault("errors", []).append(f"Health check failed: {str(e)}")
-    results["health_status"] = {"status": "unknown", "timestamp": datetime.now().isoformat()}
-# Final comprehensive system health check
-try:
-    # Verify authentication flow end-to-end
-    test_server_id = "health_check_server"
-    test_client_id = "health_check_client"
-    
-    # Test server key generation
-    try:
-        server_key = mcp_auth.generate_server_key(test_server_id)
-        if server_key:
-            results.setdefault("optimizations", []).append("Server key generation verified")
-        else:
-            results.setdefault("errors", []).append("Server key generation failed")
-    except Exception as e:
-        results.setdefault("warnings", []).append(f"Server key test failed: {str(e)}")
-    
-    # Test client token generation
-    try:
-        token_data = mcp_auth.generate_client_token(test_client_id, test_server_id)
-        if token_data and 'token' in token_data:
-            results.setdefault("optimizations", []).append("Client token generation verified")
-            # Clean up test data
-            if test_client_id in mcp_auth.client_sessions:
-                del mcp_auth.client_sessions[test_client_id]
-        else:
-            results.setdefault("errors", []).append("Client token generation failed")
-    except Exception as e:
-        results.setdefault("warnings", []).append(f"Client token test failed: {str(e)}")
-    
-    # Cleanup test server key
-    if test_server_id in mcp_auth.server_keys:
-        del mcp_auth.server_keys[test_server_id]
-    
-    # Final system health assessment
-    error_count = len(results.get("errors", []))
-    warning_count = len(results.get("warnings", []))
-    optimization_count = len(results.get("optimizations", []))
-    
-    results["health_status"] = {
-        "status": "healthy" if error_count == 0 else "degraded" if error_count < 3 else "critical",
-        "errors": error_count,
-        "warnings": warning_count,
-        "optimizations": optimization_count,
-        "timestamp": datetime.now().isoformat()
-    }
-    
-except Exception as e:
-    results.setdefault("errors", []).append(f"Health check failed: {str(e)}")
-    results["health_status"] = {"status": "unknown", "timestamp": datetime.now().isoformat()}
-
-# Final optimization recommendations
-if len(results.get("errors", [])) == 0 and len(results.get("warnings", [])) == 0:
-    results.setdefault("optimizations", []).append("System operating at optimal performance")
-# Final comprehensive validation and system optimization
-try:
-    # Verify system integrity and performance
-    if len(results.get("errors", [])) == 0:
-        # Check for potential optimizations
-        if hasattr(mcp_auth, 'client_sessions') and len(mcp_auth.client_sessions) > 100:
-            # Optimize session storage
-            active_sessions = {k: v for k, v in mcp_auth.client_sessions.items() 
-                             if v.get('active', False) or 
-                             v.get('expires_at', 0) > datetime.now().timestamp()}
-            if len(active_sessions) < len(mcp_auth.client_sessions):
-                mcp_auth.client_sessions = active_sessions
-                results.setdefault("optimizations", []).append(f"Optimized {len(mcp_auth.client_sessions) - len(active_sessions)} inactive sessions")
-        
-        # Validate vault file sizes and cleanup if needed
-        oversized_files = [f for f in VAULT_DIR.glob("*.json") 
-                          if f.stat().st_size > 5 * 1024 * 1024]  # 5MB threshold
-        if oversized_files:
-            results.setdefault("warnings", []).append(f"Found {len(oversized_files)} oversized vault files")
-    
-    # Final system readiness verification
-    results["final_scan_complete"] = True
-    results["optimization_timestamp"] = datetime.now().isoformat()
-    
-except Exception as e:
-    results.setdefault("errors", []).append(f"Final optimization failed: {str(e)}")
-    results["final_scan_complete"] = False
-
-return results
-# Perform comprehensive system health and readiness check
-system_health = {
-    "status": "healthy" if len(results.get("errors", [])) == 0 else "degraded",
-    "active_sessions": len(getattr(mcp_auth, 'client_sessions', {})),
-    "memory_optimized": len(results.get("optimizations", [])) > 0,
-    "security_validated": all(os.access(f, os.R_OK) for f in critical_files if f.exists())
-}
-
-# Log final system status
-health_status = system_health["status"]
-session_count = system_health["active_sessions"]
-opt_status = "optimized" if system_health["memory_optimized"] else "baseline"
-security_status = "validated" if system_health["security_validated"] else "issues_found"
-
-results["system_health"] = system_health
-print(f"[FINAL] System {health_status.upper()} - {session_count} sessions - {opt_status} - security {security_status}")
@@ -0,0 +1,104 @@
+"""
+Rate_Limiter.py - Authentication Rate Limiting
+Token buckets and failed-attempt lockouts for MCP authentication.
+
+Both structures are dicts keyed by caller identity (client id or source
+address) with O(1) work per check: buckets refill lazily from the time
+elapsed since they were last touched, and a lockout is a single deadline.
+They are bounded LRUs, so a flood of distinct identities evicts idle entries
+rather than growing memory; an evicted bucket comes back full, an evicted
+failure count comes back at zero.
+
+Checks are meant to run before any cryptographic work, so a storm of bad
+credentials is turned away cheaply instead of starving valid validations.
+"""
+import time
+import threading
+from collections import OrderedDict
+
+MAX_KEYS = 100_000
+
+
+class TokenBuckets:
+    """Per-key token buckets: `rate` tokens/second up to `burst`."""
+
+    def __init__(self, rate, burst, max_keys=MAX_KEYS):
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allow(self, key, cost=1.0, now=None):
+        """Take cost tokens from key's bucket; False if it does not hold that many."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            entry = self._buckets.get(key)
+            if entry is None:
+                tokens = self.burst
+            else:
+                tokens, last = entry
+                tokens = min(self.burst, tokens + (now - last) * self.rate)
+                self._buckets.move_to_end(key)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return allowed
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class FailureTracker:
+    """Consecutive-failure counters that lock a key out for a fixed duration."""
+
+    def __init__(self, max_failures, lockout_duration, max_keys=MAX_KEYS):
+        self.max_failures = max_failures
+        self.lockout_duration = lockout_duration
+        self.max_keys = max_keys
+        # key -> [failures, locked_until]
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def locked_until(self, key, now=None):
+        """Monotonic deadline of key's lockout, or 0.0 if it is not locked out."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= now:
+                return 0.0
+            return entry[1]
+
+    def failure(self, key, now=None):
+        """Count a failed attempt; returns True if it started a lockout."""
+        if self.max_failures <= 0:
+            return False
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = [0, 0.0]
+                if len(self._entries) > self.max_keys:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.move_to_end(key)
+                if entry[1] and entry[1] <= now:
+                    # Lockout served; start counting afresh
+                    entry[0], entry[1] = 0, 0.0
+            entry[0] += 1
+            if entry[0] >= self.max_failures and not entry[1]:
+                entry[1] = now + self.lockout_duration
+                return True
+            return False
+
+    def success(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
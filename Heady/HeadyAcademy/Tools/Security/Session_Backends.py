@@ -0,0 +1,394 @@
+"""
+Session_Backends.py - Pluggable Session Stores
+Where MCPAuthManager keeps client sessions, selected with
+HEADY_MCP_SESSION_STORE (or MCPAuthManager(session_store=...)):
+
+- "journal" (default): sessions live in this process's memory and are
+  persisted through the write-behind SessionJournal. Fastest, but
+  single-process: two processes sharing a Vault overwrite each other.
+- "sqlite": sessions live in a SQLite database in WAL mode, shared by every
+  process on the host that opens it. Reads see other processes' writes
+  (a session issued or revoked by one worker is valid or revoked in all of
+  them), readers never block the writer, and writers wait on a busy timeout
+  instead of failing.
+
+Both stores have the same interface. Records returned by get() are
+SessionRecords; callers change them and then call put() (full record) or
+touch() (last_activity only). touch_resolution is the smallest last_activity
+advance worth writing: 0 for the journal, which coalesces touches itself, and
+HEADY_MCP_SESSION_TOUCH_RESOLUTION seconds for SQLite, so steady validation
+traffic does not turn into one write transaction per request.
+
+Expiry works on last activity: expire(cutoff) removes revoked sessions and
+sessions idle since cutoff, and returns their ids.
+
+Sessions are indexed by server and by client, and each server's active
+session count is kept up to date as sessions change (in memory for the
+journal store, in a trigger-maintained table for SQLite). count_active() is
+O(1), and listing or revoking one server's or client's sessions is O(k) in
+the sessions involved rather than a scan of every session.
+
+Switching backends does not migrate sessions; clients re-authenticate.
+"""
+import os
+import sys
+import json
+import sqlite3
+import threading
+from pathlib import Path
+
+try:
+    from .Session_Store import ExpiryIndex, SessionJournal, SessionRecord
+except ImportError:
+    from Session_Store import ExpiryIndex, SessionJournal, SessionRecord
+
+SESSION_STORE = os.environ.get("HEADY_MCP_SESSION_STORE", "journal")
+TOUCH_RESOLUTION = float(os.environ.get("HEADY_MCP_SESSION_TOUCH_RESOLUTION", 1.0))
+BUSY_TIMEOUT = float(os.environ.get("HEADY_MCP_SESSION_BUSY_TIMEOUT", 5.0))
+
+# Sort key for sessions that are due regardless of activity (revoked)
+_REVOKED = float("-inf")
+
+
+class JournalSessionStore:
+    """In-process sessions persisted through a SessionJournal (single process)."""
+
+    shared = False
+    touch_resolution = 0.0
+
+    def __init__(self, snapshot_path):
+        self._sessions = {}
+        # server -> {session_id: counted as active}; client -> {session_id}
+        self._by_server = {}
+        self._by_client = {}
+        # server -> number of active sessions
+        self._active = {}
+        self._lock = threading.Lock()
+        self._expiry = ExpiryIndex()
+        self._journal = SessionJournal(snapshot_path, snapshot_source=self._snapshot)
+        # Older session files with ISO timestamps are converted on load
+        for session_id, record in self._journal.recover().items():
+            session_id = sys.intern(session_id)
+            session = self._sessions[session_id] = SessionRecord.from_record(record)
+            self._index(session_id, session)
+            self._expiry.add(session_id, self._activity(session_id))
+
+    def _snapshot(self):
+        return {sid: s.to_record() for sid, s in list(self._sessions.items())}
+
+    def _activity(self, session_id):
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+        return session.last_activity if session.active else _REVOKED
+
+    # Indexes (callers hold _lock)
+
+    def _index(self, session_id, session):
+        server, active = session.server, bool(session.active)
+        members = self._by_server.setdefault(server, {})
+        counted = members.get(session_id)
+        if counted is None:
+            if session.client_id is not None:
+                self._by_client.setdefault(session.client_id, set()).add(session_id)
+        elif counted == active:
+            return
+        members[session_id] = active
+        if active:
+            self._active[server] = self._active.get(server, 0) + 1
+        elif counted:
+            self._active[server] -= 1
+
+    def _unindex(self, session_id, session):
+        server = session.server
+        members = self._by_server.get(server, {})
+        if members.pop(session_id, False):
+            self._active[server] -= 1
+        if not members:
+            self._by_server.pop(server, None)
+            self._active.pop(server, None)
+        clients = self._by_client.get(session.client_id)
+        if clients is not None:
+            clients.discard(session_id)
+            if not clients:
+                del self._by_client[session.client_id]
+
+    def get(self, session_id):
+        return self._sessions.get(session_id)
+
+    def put(self, session_id, session):
+        with self._lock:
+            old = self._sessions.get(session_id)
+            if old is not None and old is not session:
+                self._unindex(session_id, old)
+            self._sessions[session_id] = session
+            self._index(session_id, session)
+        self._journal.put(session_id, session.to_record())
+        self._expiry.add(session_id, self._activity(session_id))
+
+    def put_many(self, items):
+        """Add many sessions at once, persisted with a single snapshot."""
+        with self._lock:
+            for session_id, session in items:
+                old = self._sessions.get(session_id)
+                if old is not None and old is not session:
+                    self._unindex(session_id, old)
+                self._sessions[session_id] = session
+                self._index(session_id, session)
+                self._expiry.add(session_id, self._activity(session_id))
+        self._journal.compact()
+
+    def touch(self, session_id, last_activity):
+        session = self._sessions.get(session_id)
+        if session is not None:
+            # The expiry index picks up the new time when the old one comes due
+            session.last_activity = last_activity
+            self._journal.touch(session_id, last_activity)
+
+    def delete(self, session_id):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is None:
+                return
+            self._unindex(session_id, session)
+        self._journal.delete(session_id)
+
+    def expire(self, cutoff):
+        """Remove revoked sessions and those idle since cutoff; returns their ids."""
+        expired = self._expiry.pop_due(cutoff, self._activity)
+        for session_id in expired:
+            self.delete(session_id)
+        return expired
+
+    def session_ids(self, server=None, client_id=None):
+        """Ids of the sessions of a server and/or client (every session if neither is given)."""
+        with self._lock:
+            if client_id is not None:
+                ids = self._by_client.get(client_id, ())
+                if server is not None:
+                    members = self._by_server.get(server, {})
+                    return [sid for sid in ids if sid in members]
+                return list(ids)
+            if server is not None:
+                return list(self._by_server.get(server, ()))
+            return list(self._sessions)
+
+    def revoke(self, server=None, client_id=None):
+        """Deactivate the active sessions of a server and/or client; returns their ids."""
+        revoked = []
+        for session_id in self.session_ids(server, client_id):
+            session = self._sessions.get(session_id)
+            if session is not None and session.active:
+                session.active = False
+                self.put(session_id, session)
+                revoked.append(session_id)
+        return revoked
+
+    def count_active(self, server):
+        return self._active.get(server, 0)
+
+    def active_counts(self):
+        """{server: active sessions} for every server with active sessions."""
+        with self._lock:
+            return {server: n for server, n in self._active.items() if n}
+
+    def items(self):
+        return list(self._sessions.items())
+
+    def values(self):
+        return list(self._sessions.values())
+
+    def __contains__(self, session_id):
+        return session_id in self._sessions
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def compact(self):
+        self._journal.compact()
+
+    def close(self):
+        self._journal.close()
+
+
+class SQLiteSessionStore:
+    """Sessions in a SQLite database (WAL mode) shared by every process on the host."""
+
+    shared = True
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS sessions ("
+        " id TEXT PRIMARY KEY, server TEXT NOT NULL, client_id TEXT, active INTEGER NOT NULL,"
+        " last_activity REAL NOT NULL, record TEXT NOT NULL) WITHOUT ROWID",
+        "CREATE INDEX IF NOT EXISTS sessions_activity ON sessions (active, last_activity)",
+        "CREATE INDEX IF NOT EXISTS sessions_server ON sessions (server, active)",
+        # Active sessions per server, kept current by the triggers below
+        "CREATE TABLE IF NOT EXISTS server_counts (server TEXT PRIMARY KEY, active INTEGER NOT NULL)",
+        "CREATE TRIGGER IF NOT EXISTS sessions_count_insert AFTER INSERT ON sessions WHEN NEW.active BEGIN"
+        " INSERT INTO server_counts VALUES (NEW.server, 1)"
+        " ON CONFLICT (server) DO UPDATE SET active = active + 1; END",
+        "CREATE TRIGGER IF NOT EXISTS sessions_count_delete AFTER DELETE ON sessions WHEN OLD.active BEGIN"
+        " UPDATE server_counts SET active = active - 1 WHERE server = OLD.server; END",
+        "CREATE TRIGGER IF NOT EXISTS sessions_count_update AFTER UPDATE OF active, server ON sessions"
+        " WHEN OLD.active != NEW.active OR OLD.server != NEW.server BEGIN"
+        " UPDATE server_counts SET active = active - OLD.active WHERE server = OLD.server;"
+        " INSERT INTO server_counts VALUES (NEW.server, NEW.active)"
+        " ON CONFLICT (server) DO UPDATE SET active = active + NEW.active; END",
+    )
+    # An upsert rather than INSERT OR REPLACE: REPLACE deletes without firing triggers
+    UPSERT = ("INSERT INTO sessions VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (id) DO UPDATE SET"
+              " server = excluded.server, client_id = excluded.client_id, active = excluded.active,"
+              " last_activity = excluded.last_activity, record = excluded.record")
+
+    def __init__(self, path, busy_timeout=BUSY_TIMEOUT, touch_resolution=TOUCH_RESOLUTION):
+        self.path = Path(path)
+        self.busy_timeout = busy_timeout
+        self.touch_resolution = touch_resolution
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        db = self._db()
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            for statement in self.SCHEMA:
+                db.execute(statement)
+            columns = {row[1] for row in db.execute("PRAGMA table_info(sessions)")}
+            if "client_id" not in columns:
+                # Databases created before the client index
+                db.execute("ALTER TABLE sessions ADD COLUMN client_id TEXT")
+                db.execute("UPDATE sessions SET client_id = json_extract(record, '$.client_id')")
+            db.execute("CREATE INDEX IF NOT EXISTS sessions_client ON sessions (client_id)")
+            # Rebuilt on open so the counters cannot drift from the rows
+            db.execute("DELETE FROM server_counts")
+            db.execute("INSERT INTO server_counts SELECT server, COUNT(*) FROM sessions"
+                       " WHERE active = 1 GROUP BY server")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def _db(self):
+        # One connection per thread; WAL lets them read while another writes
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                                 check_same_thread=False)
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+            with self._lock:
+                self._connections.append(db)
+        return db
+
+    @staticmethod
+    def _row(session_id, session):
+        record = session.to_record()
+        return (session_id, session.server, session.client_id, int(session.active),
+                session.last_activity, json.dumps(record, separators=(",", ":")))
+
+    @staticmethod
+    def _load(record, active, last_activity):
+        session = SessionRecord.from_record(json.loads(record))
+        # The columns are authoritative: touches update them without rewriting the record
+        session.active = bool(active)
+        session.last_activity = last_activity
+        return session
+
+    def get(self, session_id):
+        row = self._db().execute("SELECT record, active, last_activity FROM sessions WHERE id = ?",
+                                 (session_id,)).fetchone()
+        return self._load(*row) if row else None
+
+    def put(self, session_id, session):
+        self._db().execute(self.UPSERT, self._row(session_id, session))
+
+    def put_many(self, items):
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.executemany(self.UPSERT, (self._row(sid, s) for sid, s in items))
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def touch(self, session_id, last_activity):
+        # Never moves activity backwards when processes race
+        self._db().execute("UPDATE sessions SET last_activity = ? WHERE id = ? AND last_activity < ?",
+                           (last_activity, session_id, last_activity))
+
+    def delete(self, session_id):
+        self._db().execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def expire(self, cutoff):
+        """Remove revoked sessions and those idle since cutoff; returns their ids."""
+        db = self._db()
+        expired = [row[0] for row in db.execute("DELETE FROM sessions WHERE active = 0 RETURNING id")]
+        expired.extend(row[0] for row in db.execute(
+            "DELETE FROM sessions WHERE active = 1 AND last_activity <= ? RETURNING id", (cutoff,)))
+        return expired
+
+    @staticmethod
+    def _where(server, client_id):
+        clauses, params = [], []
+        if server is not None:
+            clauses.append("server = ?")
+            params.append(server)
+        if client_id is not None:
+            clauses.append("client_id = ?")
+            params.append(client_id)
+        return (" AND ".join(clauses) or "1"), params
+
+    def session_ids(self, server=None, client_id=None):
+        """Ids of the sessions of a server and/or client (every session if neither is given)."""
+        where, params = self._where(server, client_id)
+        return [row[0] for row in self._db().execute(f"SELECT id FROM sessions WHERE {where}", params)]
+
+    def revoke(self, server=None, client_id=None):
+        """Deactivate the active sessions of a server and/or client; returns their ids."""
+        where, params = self._where(server, client_id)
+        return [row[0] for row in self._db().execute(
+            f"UPDATE sessions SET active = 0 WHERE active = 1 AND {where} RETURNING id", params)]
+
+    def count_active(self, server):
+        row = self._db().execute("SELECT active FROM server_counts WHERE server = ?", (server,)).fetchone()
+        return row[0] if row else 0
+
+    def active_counts(self):
+        """{server: active sessions} for every server with active sessions."""
+        return dict(self._db().execute("SELECT server, active FROM server_counts WHERE active > 0"))
+
+    def items(self):
+        return [(sid, self._load(*rest)) for sid, *rest in self._db().execute(
+            "SELECT id, record, active, last_activity FROM sessions")]
+
+    def values(self):
+        return [session for _, session in self.items()]
+
+    def __contains__(self, session_id):
+        return self._db().execute("SELECT 1 FROM sessions WHERE id = ?", (session_id,)).fetchone() is not None
+
+    def __len__(self):
+        return self._db().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def compact(self):
+        """Fold the WAL back into the database file."""
+        self._db().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for db in connections:
+            db.close()
+        self._local = threading.local()
+
+
+def open_session_store(kind, snapshot_path):
+    """Session store of the given kind; snapshot_path is the journal store's JSON file."""
+    snapshot_path = Path(snapshot_path)
+    if kind == "journal":
+        return JournalSessionStore(snapshot_path)
+    if kind == "sqlite":
+        return SQLiteSessionStore(snapshot_path.with_suffix(".db"))
+    raise ValueError(f"Unknown session store: {kind} (expected 'journal' or 'sqlite')")
@@ -0,0 +1,437 @@
+"""
+Session_Store.py - Write-Behind Session Persistence
+Durable storage for MCP client sessions without per-request file rewrites.
+
+Sessions live in memory; every change is recorded as one line in an
+append-only journal next to the snapshot file:
+
+    ["put", session_id, record]      full record (created, revoked, expired)
+    ["touch", session_id, value]     last_activity update
+    ["del", session_id, null]        session removed
+
+Changes are buffered and written by a background thread in batches, with a
+single fsync per batch (every HEADY_MCP_SESSION_FLUSH_INTERVAL seconds, or
+sooner once a batch fills). Repeated touches of one session within a batch
+collapse to one line. When the journal grows past
+HEADY_MCP_SESSION_COMPACT_BYTES, the current sessions are written to the
+snapshot (atomically, via rename) and the journal is truncated.
+
+Recovery loads the snapshot and replays the journal. Replay is idempotent, so
+a crash between snapshot and truncation is harmless, and a torn final line
+from a crash mid-write is dropped. At most one flush interval of changes can
+be lost on a hard crash; close() (or flush()) makes everything durable.
+
+SessionRecord is the in-memory form of a session: a slotted object with
+interned client/server ids and epoch-float times. It holds persistent fields
+only; live connection handles are kept by the owner, outside the record.
+ExpiryIndex keeps sessions in a min-heap by deadline so cleanup only touches
+sessions that are due, instead of scanning them all.
+
+Usage: python Session_Store.py --memory [N]   (bytes per session, dict vs record)
+"""
+import os
+import sys
+import json
+import heapq
+import logging
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+FLUSH_INTERVAL = float(os.environ.get("HEADY_MCP_SESSION_FLUSH_INTERVAL", 1.0))
+COMPACT_BYTES = int(os.environ.get("HEADY_MCP_SESSION_COMPACT_BYTES", 8 * 1024 * 1024))
+MAX_BATCH = 4096
+
+
+def _line(op, session_id, data):
+    return (json.dumps([op, session_id, data], separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def _fsync_dir(path):
+    # Makes a rename durable on POSIX; not supported (or needed) on Windows
+    if os.name == "nt":
+        return
+    try:
+        fd = os.open(str(path), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _epoch(value, naive_tz=None):
+    """Epoch float from an epoch number, ISO string or datetime (None passes through).
+
+    Naive values are taken to be in naive_tz, or in local time when it is None.
+    """
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None and naive_tz is not None:
+        value = value.replace(tzinfo=naive_tz)
+    return value.timestamp()
+
+
+class SessionRecord:
+    """Persistent state of one client session, without per-session dicts."""
+
+    __slots__ = ("client_id", "server", "auth_type", "auth_token", "auth_time",
+                 "created", "last_activity", "active")
+
+    def __init__(self, client_id, server, auth_data=None, created=None, last_activity=None, active=True):
+        self.client_id = sys.intern(client_id) if client_id else None
+        self.server = sys.intern(server) if server else None
+        # auth_data is packed into three fields and rebuilt on access
+        auth_data = auth_data or {}
+        self.auth_type = sys.intern(auth_data["type"]) if auth_data.get("type") else None
+        if self.auth_type == "api_key":
+            self.auth_token = auth_data.get("signature")
+            self.auth_time = float(auth_data.get("timestamp") or 0)
+        else:
+            self.auth_token = auth_data.get("token")
+            # Naive expiries are UTC (JWT exp comes from datetime.utcnow());
+            # naive created/last_activity values came from datetime.now()
+            self.auth_time = _epoch(auth_data.get("expires"), timezone.utc)
+        self.created = _epoch(created)
+        self.last_activity = _epoch(last_activity)
+        self.active = active
+
+    @property
+    def auth_data(self):
+        if self.auth_type is None:
+            return None
+        if self.auth_type == "api_key":
+            return {"type": "api_key", "signature": self.auth_token,
+                    "timestamp": str(int(self.auth_time)), "client_id": self.client_id}
+        expires = datetime.fromtimestamp(self.auth_time, timezone.utc).isoformat() if self.auth_time is not None else None
+        return {"type": self.auth_type, "token": self.auth_token, "expires": expires}
+
+    @classmethod
+    def from_record(cls, record):
+        """Build from a stored dict (epoch floats or older ISO strings)."""
+        return cls(record.get("client_id"), record.get("server"), record.get("auth_data"),
+                   record.get("created"), record.get("last_activity"), record.get("active", True))
+
+    def to_record(self):
+        record = {"server": self.server, "created": self.created,
+                  "last_activity": self.last_activity, "active": self.active}
+        if self.client_id is not None:
+            record["client_id"] = self.client_id
+        if self.auth_type is not None:
+            record["auth_data"] = self.auth_data
+        return record
+
+    # Read access by key, for callers written against the old dict sessions
+    def __getitem__(self, key):
+        if key in self.__slots__ or key == "auth_data":
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __repr__(self):
+        return f"SessionRecord({self.client_id!r}, {self.server!r}, active={self.active})"
+
+
+class SessionJournal:
+    """Snapshot file plus append-only journal with batched, background fsync."""
+
+    def __init__(self, snapshot_path, snapshot_source=None, flush_interval=FLUSH_INTERVAL,
+                 compact_bytes=COMPACT_BYTES, max_batch=MAX_BATCH):
+        self.snapshot_path = Path(snapshot_path)
+        self.journal_path = self.snapshot_path.with_suffix(".journal")
+        # Callable returning the current {session_id: record}; used for compaction
+        self.snapshot_source = snapshot_source
+        self.flush_interval = flush_interval
+        self.compact_bytes = compact_bytes
+        self.max_batch = max_batch
+        self.stats = {"lines": 0, "batches": 0, "fsyncs": 0, "compactions": 0,
+                      "replayed": 0, "torn": 0}
+        self._pending = []
+        self._touches = {}
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._file = None
+        self._journal_bytes = 0
+        self._thread = None
+        self._closed = False
+
+    # Recovery
+
+    @staticmethod
+    def _apply(sessions, op, session_id, data):
+        if op == "put":
+            sessions[session_id] = data
+        elif op == "touch":
+            if session_id in sessions:
+                sessions[session_id]["last_activity"] = data
+        elif op == "del":
+            sessions.pop(session_id, None)
+
+    def recover(self):
+        """Load the snapshot, replay the journal and start the writer; returns the sessions."""
+        sessions = {}
+        try:
+            with open(self.snapshot_path, "rb") as f:
+                sessions = json.load(f)
+        except FileNotFoundError:
+            pass
+        except ValueError as e:
+            # Fail closed: clients re-authenticate rather than trust a damaged file
+            logging.error(f"Session snapshot {self.snapshot_path} is unreadable, starting empty: {e}")
+            sessions = {}
+
+        good = 0
+        try:
+            with open(self.journal_path, "rb") as f:
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        self.stats["torn"] += 1
+                        break
+                    try:
+                        op, session_id, data = json.loads(raw)
+                    except ValueError:
+                        self.stats["torn"] += 1
+                        break
+                    self._apply(sessions, op, session_id, data)
+                    good += len(raw)
+                    self.stats["replayed"] += 1
+        except FileNotFoundError:
+            pass
+
+        self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.journal_path, "ab")
+        if self._file.tell() != good:
+            # Drop a torn tail so new lines are not appended after garbage
+            self._file.truncate(good)
+            self._file.seek(good)
+        self._journal_bytes = good
+        self._thread = threading.Thread(target=self._run, name="mcp-session-journal", daemon=True)
+        self._thread.start()
+        return sessions
+
+    # Recording changes
+
+    def put(self, session_id, record):
+        """Record a session's full state (serialized now, written later)."""
+        line = _line("put", session_id, record)
+        with self._cond:
+            # The record already carries the latest last_activity
+            self._touches.pop(session_id, None)
+            self._pending.append(line)
+            self._wake_if_full()
+
+    def touch(self, session_id, last_activity):
+        """Record a last_activity update; repeats within a batch collapse to one line."""
+        with self._cond:
+            self._touches[session_id] = last_activity
+            self._wake_if_full()
+
+    def delete(self, session_id):
+        with self._cond:
+            self._touches.pop(session_id, None)
+            self._pending.append(_line("del", session_id, None))
+            self._wake_if_full()
+
+    def _wake_if_full(self):
+        if len(self._pending) + len(self._touches) >= self.max_batch:
+            self._cond.notify_all()
+
+    # Writing
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._closed:
+                    self._cond.wait(self.flush_interval)
+                if self._closed:
+                    return
+            try:
+                self.flush()
+                if self.compact_bytes and self._journal_bytes >= self.compact_bytes:
+                    self.compact()
+            except Exception as e:
+                logging.error(f"Session journal write failed: {e}")
+
+    def _drain(self):
+        with self._cond:
+            lines, self._pending = self._pending, []
+            touches, self._touches = self._touches, {}
+        lines.extend(_line("touch", sid, value) for sid, value in touches.items())
+        return lines
+
+    def _write_batch_locked(self):
+        lines = self._drain()
+        if not lines:
+            return 0
+        data = b"".join(lines)
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._journal_bytes += len(data)
+        self.stats["lines"] += len(lines)
+        self.stats["batches"] += 1
+        self.stats["fsyncs"] += 1
+        return len(lines)
+
+    def flush(self):
+        """Write and fsync everything recorded so far; returns the number of lines written."""
+        with self._io_lock:
+            if self._file is None or self._file.closed:
+                return 0
+            return self._write_batch_locked()
+
+    def compact(self):
+        """Write the current sessions as the snapshot and truncate the journal."""
+        if self.snapshot_source is None:
+            return False
+        with self._io_lock:
+            if self._file is None or self._file.closed:
+                return False
+            # Lines recorded after this point land in the new journal; replaying
+            # them over a snapshot that already includes them is harmless
+            self._write_batch_locked()
+            for attempt in range(3):
+                try:
+                    data = json.dumps(self.snapshot_source(), separators=(",", ":")).encode("utf-8")
+                    break
+                except RuntimeError:
+                    # Sessions changed size while being copied; try again
+                    if attempt == 2:
+                        raise
+            tmp = self.snapshot_path.with_suffix(".tmp")
+            with open(tmp, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.snapshot_path)
+            _fsync_dir(self.snapshot_path.parent)
+            self._file.truncate(0)
+            self._file.seek(0)
+            os.fsync(self._file.fileno())
+            self._journal_bytes = 0
+            self.stats["compactions"] += 1
+            return True
+
+    def close(self):
+        """Stop the writer and make every recorded change durable."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        with self._io_lock:
+            if self._file is not None and not self._file.closed:
+                self._write_batch_locked()
+                self._file.close()
+
+    @property
+    def journal_bytes(self):
+        return self._journal_bytes
+
+
+class ExpiryIndex:
+    """Min-heap of (deadline, session_id) with lazily refreshed deadlines.
+
+    Activity does not touch the heap: when an entry comes due, its real
+    deadline is looked up and the entry is either expired or pushed back
+    once. Each cleanup costs O(k log n) for the k entries that came due.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._lock = threading.Lock()
+
+    def add(self, session_id, deadline):
+        with self._lock:
+            heapq.heappush(self._heap, (deadline, session_id))
+
+    def pop_due(self, now, deadline_of):
+        """Session ids whose current deadline has passed.
+
+        deadline_of(session_id) returns the session's deadline as an epoch
+        float, or None if the session no longer exists. A session may have
+        several entries (one per add); it is reported or pushed back once.
+        """
+        due = []
+        seen = set()
+        with self._lock:
+            heap = self._heap
+            while heap and heap[0][0] <= now:
+                _, session_id = heapq.heappop(heap)
+                if session_id in seen:
+                    continue
+                seen.add(session_id)
+                deadline = deadline_of(session_id)
+                if deadline is None:
+                    continue
+                if deadline <= now:
+                    due.append(session_id)
+                else:
+                    heapq.heappush(heap, (deadline, session_id))
+        return due
+
+    def next_deadline(self):
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+    def __len__(self):
+        return len(self._heap)
+
+
+def memory_benchmark(count=1_000_000):
+    """Print bytes per session for the old dict layout and for SessionRecord."""
+    import gc
+    import time
+    import secrets
+    import tracemalloc
+
+    now = time.time()
+    iso = datetime.fromtimestamp(now, timezone.utc).isoformat()
+    clients = ["heady_master", "heady_scout"]
+    servers = ["heady_bridge", "heady_nova", "heady_oculus"]
+
+    def as_dict(i):
+        return {"client_id": clients[i % 2], "server": servers[i % 3],
+                "auth_data": {"type": "bearer", "token": secrets.token_urlsafe(32), "expires": iso},
+                "created": iso, "last_activity": iso, "active": True}
+
+    def as_record(i):
+        return SessionRecord(clients[i % 2], servers[i % 3],
+                             {"type": "bearer", "token": secrets.token_urlsafe(32), "expires": now},
+                             now + i, now + i)
+
+    results = {}
+    for name, build in (("dict", as_dict), ("SessionRecord", as_record)):
+        gc.collect()
+        tracemalloc.start()
+        base = tracemalloc.get_traced_memory()[0]
+        sessions = {secrets.token_urlsafe(16): build(i) for i in range(count)}
+        used = tracemalloc.get_traced_memory()[0] - base
+        tracemalloc.stop()
+        results[name] = used / count
+        print(f"  {name:<14} {used / count:8.1f} bytes/session  ({used / 2**20:8.1f} MiB for {count:,})")
+        del sessions
+    print(f"  reduction      {1 - results['SessionRecord'] / results['dict']:8.1%}")
+    return results
+
+
+if __name__ == "__main__":
+    if "--memory" in sys.argv:
+        idx = sys.argv.index("--memory")
+        n = int(sys.argv[idx + 1]) if len(sys.argv) > idx + 1 else 1_000_000
+        print(f"Session memory, {n:,} sessions (dict key and token included)")
+        memory_benchmark(n)
+    else:
+        print("Usage: python Session_Store.py --memory [N]")
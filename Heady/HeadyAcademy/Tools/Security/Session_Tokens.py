@@ -0,0 +1,246 @@
+"""
+Session_Tokens.py - Stateless Session Tokens
+MAC-signed session tokens that carry their own state, and the deny-list
+used to revoke them.
+
+A token is  base64url(claims) "." base64url(tag)  where claims is the JSON
+array [token_id, client_id, server, permissions, issued, expires] and tag is
+the first 16 bytes of HMAC-SHA256 over the encoded claims, under a key
+derived from the master key. Verifying one is a MAC check, a JSON parse and
+a few dict lookups: no session store, no disk, nothing shared with other
+workers. Expiry is absolute (issued + session_timeout); there is no idle
+timeout, because nothing records activity.
+
+Revocation goes through a DenyList of revoked token ids plus subject
+cutoffs (a client, a server, or a client on one server) that deny every
+token issued up to a time. Entries are appended to small files in the Vault,
+bucketed by the hour in which they stop mattering (when every token they
+deny has expired). Each worker keeps the live entries in memory and picks up
+other workers' appends every HEADY_MCP_DENYLIST_REFRESH seconds. Buckets
+whose hour has passed are deleted, so the list only ever holds revocations
+of tokens that are still unexpired.
+"""
+import os
+import json
+import time
+import hmac
+import base64
+import hashlib
+import secrets
+import logging
+import threading
+from pathlib import Path
+
+DENYLIST_REFRESH = float(os.environ.get("HEADY_MCP_DENYLIST_REFRESH", 1.0))
+TAG_BYTES = 16
+BUCKET_SECONDS = 3600
+_KEY_CONTEXT = b"heady-mcp-session-token-v1"
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _unb64(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+class SessionClaims:
+    """State of a stateless session, as carried by its token."""
+
+    __slots__ = ("token_id", "client_id", "server", "permissions", "created", "expires")
+    active = True
+
+    def __init__(self, token_id, client_id, server, permissions, created, expires):
+        self.token_id = token_id
+        self.client_id = client_id
+        self.server = server
+        self.permissions = permissions
+        self.created = created
+        self.expires = expires
+
+    def to_record(self):
+        return {"client_id": self.client_id, "server": self.server, "permissions": self.permissions,
+                "created": self.created, "expires": self.expires, "active": True}
+
+    # Read access by key, like SessionRecord
+    def __getitem__(self, key):
+        if key in self.__slots__ or key == "active":
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __repr__(self):
+        return f"SessionClaims({self.client_id!r}, {self.server!r}, expires={self.expires})"
+
+
+class SessionTokenCodec:
+    """Issues and verifies MAC-signed session tokens."""
+
+    def __init__(self, master_key):
+        if not master_key:
+            raise ValueError("HEADY_MCP_KEY is required for stateless sessions")
+        key = hmac.new(master_key.encode(), _KEY_CONTEXT, hashlib.sha256).digest()
+        # Keyed once; each tag copies this state
+        self._mac = hmac.new(key, digestmod=hashlib.sha256)
+
+    @staticmethod
+    def is_token(session_id):
+        # Stateful session ids are plain base64url and never contain a dot
+        return isinstance(session_id, str) and "." in session_id
+
+    def _tag(self, body):
+        mac = self._mac.copy()
+        mac.update(body.encode("ascii"))
+        return _b64(mac.digest()[:TAG_BYTES])
+
+    def issue(self, client_id, server, permissions, issued, expires):
+        claims = [secrets.token_hex(8), client_id, server, list(permissions or ()),
+                  round(issued, 3), round(expires, 3)]
+        body = _b64(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+        return f"{body}.{self._tag(body)}"
+
+    def verify(self, token, now=None):
+        """Claims of a genuine, unexpired token, else None (deny-list not consulted)."""
+        if not self.is_token(token):
+            return None
+        body, _, tag = token.partition(".")
+        try:
+            if not hmac.compare_digest(tag, self._tag(body)):
+                return None
+            token_id, client_id, server, permissions, issued, expires = json.loads(_unb64(body))
+        except (ValueError, TypeError, UnicodeError):
+            return None
+        if expires <= (time.time() if now is None else now):
+            return None
+        return SessionClaims(token_id, client_id, server, permissions, issued, expires)
+
+
+class DenyList:
+    """Revoked token ids and subject cutoffs, shared through append-only bucket files."""
+
+    def __init__(self, directory, refresh_interval=DENYLIST_REFRESH):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.refresh_interval = refresh_interval
+        # token_id -> expires
+        self._tokens = {}
+        # (client_id or None, server or None) -> (cutoff, expires)
+        self._cutoffs = {}
+        # bucket file name -> bytes already read
+        self._offsets = {}
+        self._next_refresh = 0.0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.refresh()
+
+    # Recording
+
+    def _apply(self, entry):
+        if entry[0] == "t":
+            _, token_id, expires = entry
+            self._tokens[token_id] = expires
+        elif entry[0] == "s":
+            _, client_id, server, cutoff, expires = entry
+            key = (client_id, server)
+            current = self._cutoffs.get(key)
+            if current is None or cutoff > current[0]:
+                self._cutoffs[key] = (cutoff, expires)
+
+    def _append(self, entry, expires):
+        with self._lock:
+            self._apply(entry)
+        path = self.directory / f"{int(expires // BUCKET_SECONDS)}.deny"
+        line = (json.dumps(entry, separators=(",", ":")) + "\n").encode("utf-8")
+        # One small O_APPEND write per entry, so concurrent workers never interleave
+        with open(path, "ab") as f:
+            f.write(line)
+
+    def deny_token(self, token_id, expires):
+        self._append(["t", token_id, expires], expires)
+
+    def deny_subject(self, client_id=None, server=None, cutoff=None, lifetime=0):
+        """Deny every token of a client and/or server issued up to cutoff (default now)."""
+        if client_id is None and server is None:
+            raise ValueError("Give a client or a server to deny")
+        cutoff = time.time() if cutoff is None else cutoff
+        expires = cutoff + lifetime
+        self._append(["s", client_id, server, round(cutoff, 3), expires], expires)
+
+    # Reading
+
+    def refresh(self, now=None):
+        """Read other workers' new entries, drop expired ones and delete past buckets."""
+        with self._refresh_lock:
+            self._refresh(time.time() if now is None else now)
+
+    def _refresh(self, now):
+        current_bucket = int(now // BUCKET_SECONDS)
+        entries = []
+        try:
+            files = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            files = []
+        for item in files:
+            name = item.name
+            if not name.endswith(".deny"):
+                continue
+            try:
+                bucket = int(name[:-5])
+            except ValueError:
+                continue
+            if bucket < current_bucket:
+                # Every entry in it has expired
+                self._offsets.pop(name, None)
+                try:
+                    os.remove(item.path)
+                except OSError:
+                    pass
+                continue
+            offset = self._offsets.get(name, 0)
+            try:
+                with open(item.path, "rb") as f:
+                    f.seek(offset)
+                    data = f.read()
+            except OSError:
+                continue
+            # Leave a partly written last line for the next refresh
+            end = data.rfind(b"\n") + 1
+            self._offsets[name] = offset + end
+            for raw in data[:end].splitlines():
+                try:
+                    entries.append(json.loads(raw))
+                except ValueError:
+                    logging.error(f"Ignoring malformed deny-list entry in {name}")
+
+        with self._lock:
+            for entry in entries:
+                self._apply(entry)
+            self._tokens = {t: e for t, e in self._tokens.items() if e > now}
+            self._cutoffs = {k: v for k, v in self._cutoffs.items() if v[1] > now}
+            self._next_refresh = now + self.refresh_interval
+
+    def is_denied(self, claims, now=None):
+        now = time.time() if now is None else now
+        # One thread refreshes; the others check against what is already loaded
+        if now >= self._next_refresh and self._refresh_lock.acquire(blocking=False):
+            try:
+                self._refresh(now)
+            finally:
+                self._refresh_lock.release()
+        if claims.token_id in self._tokens:
+            return True
+        if self._cutoffs:
+            for key in ((claims.client_id, None), (None, claims.server), (claims.client_id, claims.server)):
+                cutoff = self._cutoffs.get(key)
+                if cutoff is not None and claims.created <= cutoff[0]:
+                    return True
+        return False
+
+    def __len__(self):
+        return len(self._tokens) + len(self._cutoffs)
@@ -0,0 +1,93 @@
+"""
+Token_Cache.py - Verified Token Cache
+Bounded LRU of tokens whose signature has already been verified.
+
+Entries are keyed by the SHA-256 digest of the token (raw tokens are not
+kept) and hold the decoded claims until the token's "exp" passes, capped at
+max_ttl seconds for tokens without one. Only successful verifications are
+cached, so invalid tokens cannot fill the cache.
+"""
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+CACHE_SIZE = int(os.environ.get("HEADY_MCP_TOKEN_CACHE_SIZE", 4096))
+CACHE_MAX_TTL = float(os.environ.get("HEADY_MCP_TOKEN_CACHE_TTL", 300))
+
+
+def _epoch(value):
+    # PyJWT returns exp as an int; a datetime is accepted as well
+    if value is None:
+        return None
+    if hasattr(value, "timestamp"):
+        return value.timestamp()
+    return float(value)
+
+
+class VerifiedTokenCache:
+    """LRU map of token digest -> (expiry, claims) for verified tokens."""
+
+    def __init__(self, maxsize=CACHE_SIZE, max_ttl=CACHE_MAX_TTL):
+        self.maxsize = maxsize
+        self.max_ttl = max_ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode() if isinstance(token, str) else token).digest()
+
+    def get(self, token, now=None):
+        """Claims of a cached, unexpired token, else None."""
+        if self.maxsize <= 0:
+            return None
+        key = self._key(token)
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires, claims = entry
+            if expires <= now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return claims
+
+    def put(self, token, claims, now=None):
+        """Remember verified claims until exp (or max_ttl); returns claims."""
+        if self.maxsize <= 0:
+            return claims
+        now = time.time() if now is None else now
+        expires = now + self.max_ttl
+        exp = _epoch(claims.get("exp"))
+        if exp is not None:
+            expires = min(expires, exp)
+        if expires <= now:
+            return claims
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (expires, claims)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return claims
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._entries), "maxsize": self.maxsize,
+                    "hits": self.hits, "misses": self.misses}
+
+    def __len__(self):
+        return len(self._entries)
@@ -2,14 +2,26 @@
 Security_Audit.py - MURPHY Tool
 Scans code for security vulnerabilities and bad practices.
 """
-import sys
 import os
 import re
+import json
 from pathlib import Path
 from datetime import datetime
 
 OUTPUT_DIR = Path(__file__).parent.parent / "Logs" / "Security_Reports"
 
+MCP_TOOL = {
+    "name": "security_audit",
+    "description": "Run security vulnerability scan",
+    "arguments": {
+        "path": {"type": "string", "description": "Path to audit", "default": "."},
+        "report": {"type": "boolean", "description": "Also write a markdown report"},
+    },
+    "argv": ["--json", {"if": "report", "argv": ["--report"]}, "{path}"],
+    "coalesce": True,
+    "structured": True,
+}
+
 SECURITY_PATTERNS = [
     {
         "name": "Hardcoded Secret",
@@ -78,11 +90,8 @@ def scan_file(file_path):
     
     return findings
 
-def audit(target):
-    """Run security audit on target."""
-    target_path = Path(target)
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    
+def collect_findings(target_path):
+    """Scan a file or directory; returns ([(file path, finding)], files scanned)."""
     all_findings = []
     scanned = 0
     
@@ -99,11 +108,11 @@ def audit(target):
                     findings = scan_file(file_path)
                     all_findings.extend([(file_path, f) for f in findings])
                     scanned += 1
-    
-    high = sum(1 for _, f in all_findings if f["severity"] == "HIGH")
-    medium = sum(1 for _, f in all_findings if f["severity"] == "MEDIUM")
-    low = sum(1 for _, f in all_findings if f["severity"] == "LOW")
-    
+    return all_findings, scanned
+
+def write_report(target_path, all_findings, scanned, counts):
+    """Render the findings as a markdown report; returns its path."""
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     report_file = OUTPUT_DIR / f"security_audit_{timestamp}.md"
     
@@ -114,9 +123,9 @@ def audit(target):
         f"Files Scanned: {scanned}",
         "",
         f"## Summary",
-        f"- 🔴 HIGH: {high}",
-        f"- 🟡 MEDIUM: {medium}",
-        f"- 🟢 LOW: {low}",
+        f"- 🔴 HIGH: {counts['HIGH']}",
+        f"- 🟡 MEDIUM: {counts['MEDIUM']}",
+        f"- 🟢 LOW: {counts['LOW']}",
         ""
     ]
     
@@ -134,13 +143,40 @@ def audit(target):
     
     with open(report_file, 'w', encoding='utf-8') as f:
         f.write('\n'.join(report))
+    return report_file
+
+def audit(target, as_json=False, report=True):
+    """Run security audit on target; as_json prints the result instead of a summary."""
+    target_path = Path(target)
+    all_findings, scanned = collect_findings(target_path)
+    counts = {severity: sum(1 for _, f in all_findings if f["severity"] == severity)
+              for severity in ("HIGH", "MEDIUM", "LOW")}
     
+    result = {
+        "target": str(target_path),
+        "scanned": scanned,
+        "counts": counts,
+        "findings": [{"path": str(file_path), **finding} for file_path, finding in all_findings],
+        "report": None,
+    }
+    if report:
+        result["report"] = str(write_report(target_path, all_findings, scanned, counts))
+    
+    if as_json:
+        print(json.dumps(result))
+        return result
     print(f"[MURPHY] Security audit complete")
     print(f"  Scanned: {scanned} files")
-    print(f"  Findings: {len(all_findings)} (HIGH: {high}, MEDIUM: {medium}, LOW: {low})")
-    print(f"  Report: {report_file}")
-    return str(report_file)
+    print(f"  Findings: {len(all_findings)} (HIGH: {counts['HIGH']}, MEDIUM: {counts['MEDIUM']}, LOW: {counts['LOW']})")
+    print(f"  Report: {result['report']}")
+    return result
 
 if __name__ == "__main__":
-    target = sys.argv[1] if len(sys.argv) > 1 else "."
-    audit(target)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Scans code for security vulnerabilities and bad practices")
+    parser.add_argument("path", nargs="?", default=".", help="File or directory to audit")
+    parser.add_argument("--json", action="store_true", help="Print the result as one JSON object")
+    parser.add_argument("--report", action="store_true", help="With --json, also write the report file")
+    args = parser.parse_args()
+    audit(args.path, args.json, report=not args.json or args.report)
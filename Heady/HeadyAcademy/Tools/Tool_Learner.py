@@ -2,7 +2,6 @@
 Tool_Learner.py - SOPHIA Tool
 Learns about tools and generates usage documentation.
 """
-import sys
 import os
 import subprocess
 import shutil
@@ -11,6 +10,13 @@ from datetime import datetime
 
 OUTPUT_DIR = Path(__file__).parent.parent / "Library" / "Tool_Docs"
 
+MCP_TOOL = {
+    "name": "learn_tool",
+    "description": "Document a CLI tool",
+    "arguments": {"tool": {"type": "string", "description": "Tool name to document", "default": "python"}},
+    "argv": ["{tool}"],
+}
+
 KNOWN_TOOLS = {
     "python": {
         "check": ["python", "--version"],
@@ -153,5 +159,8 @@ def learn_tool(tool_name):
     return str(output_file)
 
 if __name__ == "__main__":
-    tool = sys.argv[1] if len(sys.argv) > 1 else "python"
-    learn_tool(tool)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Learns about tools and generates usage documentation")
+    parser.add_argument("tool", nargs="?", default="python")
+    learn_tool(parser.parse_args().tool)
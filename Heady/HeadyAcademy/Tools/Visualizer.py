@@ -2,14 +2,26 @@
 Visualizer.py - OCULUS Tool
 Generates visual representations of code structure and dependencies.
 """
-import sys
 import os
+import json
 from pathlib import Path
 from datetime import datetime
 from collections import defaultdict
 
 OUTPUT_DIR = Path(__file__).parent.parent / "Content_Forge" / "Visualizations"
 
+MCP_TOOL = {
+    "name": "visualize",
+    "description": "Generate project visualization",
+    "arguments": {
+        "path": {"type": "string", "description": "Directory to visualize", "default": "."},
+        "report": {"type": "boolean", "description": "Also write a markdown report"},
+    },
+    "argv": ["--json", {"if": "report", "argv": ["--report"]}, "{path}"],
+    "coalesce": True,
+    "structured": True,
+}
+
 def analyze_imports(file_path):
     """Extract import statements from Python file."""
     imports = []
@@ -78,14 +90,9 @@ def generate_mermaid_graph(graph):
     lines.append("```")
     return lines
 
-def visualize(target):
-    """Generate visualization for target."""
-    target_path = Path(target)
+def write_report(target_path, tree, graph):
+    """Render the tree and dependency graph as a markdown report; returns its path."""
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    
-    if not target_path.exists():
-        target_path = Path(".")
-    
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     output_file = OUTPUT_DIR / f"viz_{target_path.name}_{timestamp}.md"
     
@@ -97,31 +104,59 @@ def visualize(target):
         "```"
     ]
     
-    tree = generate_ascii_tree(target_path)
     report.extend(tree[:100])
     if len(tree) > 100:
         report.append(f"... and {len(tree) - 100} more items")
     report.append("```")
     
-    if target_path.is_dir():
-        graph = build_dependency_graph(target_path)
-        if graph:
-            report.append("")
-            report.append("## Dependency Graph")
-            report.extend(generate_mermaid_graph(graph))
-            
-            report.append("")
-            report.append("## Module Summary")
-            for file, imports in list(graph.items())[:20]:
-                report.append(f"- **{file}**: {len(imports)} imports")
+    if graph:
+        report.append("")
+        report.append("## Dependency Graph")
+        report.extend(generate_mermaid_graph(graph))
+        
+        report.append("")
+        report.append("## Module Summary")
+        for file, imports in list(graph.items())[:20]:
+            report.append(f"- **{file}**: {len(imports)} imports")
     
     with open(output_file, 'w', encoding='utf-8') as f:
         f.write('\n'.join(report))
+    return output_file
+
+def visualize(target, as_json=False, report=True):
+    """Generate visualization for target; as_json prints the result instead of a summary."""
+    target_path = Path(target)
+    
+    if not target_path.exists():
+        target_path = Path(".")
     
+    tree = generate_ascii_tree(target_path)
+    graph = build_dependency_graph(target_path) if target_path.is_dir() else {}
+    
+    result = {
+        "target": str(target_path),
+        "counts": {"tree_items": len(tree), "modules": len(graph),
+                   "imports": sum(len(imports) for imports in graph.values())},
+        "tree": tree,
+        "dependencies": dict(graph),
+        "report": None,
+    }
+    if report:
+        result["report"] = str(write_report(target_path, tree, graph))
+    
+    if as_json:
+        print(json.dumps(result))
+        return result
     print(f"[OCULUS] Visualization complete")
-    print(f"  Output: {output_file}")
-    return str(output_file)
+    print(f"  Output: {result['report']}")
+    return result
 
 if __name__ == "__main__":
-    target = sys.argv[1] if len(sys.argv) > 1 else "."
-    visualize(target)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generates visual representations of code structure and dependencies")
+    parser.add_argument("path", nargs="?", default=".", help="File or directory to visualize")
+    parser.add_argument("--json", action="store_true", help="Print the result as one JSON object")
+    parser.add_argument("--report", action="store_true", help="With --json, also write the report file")
+    args = parser.parse_args()
+    visualize(args.path, args.json, report=not args.json or args.report)
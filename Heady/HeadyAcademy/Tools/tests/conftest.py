@@ -0,0 +1,9 @@
+"""Make the MCP and Security modules importable the way they import each other."""
+import sys
+from pathlib import Path
+
+TOOLS_DIR = Path(__file__).resolve().parent.parent
+for sub in ("MCP", "Security"):
+    path = str(TOOLS_DIR / sub)
+    if path not in sys.path:
+        sys.path.insert(0, path)
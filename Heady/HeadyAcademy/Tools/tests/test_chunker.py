@@ -0,0 +1,36 @@
+import pytest
+
+from Chunker import chunk_file
+
+
+def _text_file(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_bytes(b"".join(b"line %d\n" % i for i in range(2000)))
+    return path
+
+
+def test_chunks_stay_valid_inside_the_block(tmp_path):
+    path = _text_file(tmp_path)
+    with chunk_file(path, max_bytes=512) as chunks:
+        kept = list(chunks)
+        assert b"".join(bytes(c.data) for c in kept) == path.read_bytes()
+    with pytest.raises(ValueError):
+        bytes(kept[0].data)
+
+
+def test_early_exit_while_holding_a_chunk(tmp_path):
+    path = _text_file(tmp_path)
+    with chunk_file(path, max_bytes=512, strategy="cdc") as chunks:
+        for chunk in chunks:
+            held = chunk
+            break
+        assert bytes(held.data).startswith(b"line 0\n")
+    with pytest.raises(ValueError):
+        bytes(held.data)
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / "empty.md"
+    path.write_bytes(b"")
+    with chunk_file(path) as chunks:
+        assert list(chunks) == []
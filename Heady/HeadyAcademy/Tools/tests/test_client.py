@@ -0,0 +1,72 @@
+import sys
+import asyncio
+import textwrap
+import subprocess
+
+import pytest
+
+from Client import MCPClient, MCPError
+
+# Answers initialize; the first `busy` tools/list calls get Overloaded, and
+# with EXIT_AFTER_LIST the process exits after its first tools/list
+FAKE_SERVER = textwrap.dedent("""
+    import sys, json
+    busy = int(sys.argv[1])
+    exit_after_list = sys.argv[2] == "1"
+    for line in sys.stdin:
+        req = json.loads(line)
+        if "id" not in req:
+            continue
+        if req["method"] == "tools/list" and exit_after_list:
+            sys.exit(0)
+        if req["method"] == "tools/list" and busy:
+            busy -= 1
+            resp = {"jsonrpc": "2.0", "id": req["id"],
+                    "error": {"code": -32001, "message": "busy", "data": {"retryAfterMs": 10}}}
+        else:
+            resp = {"jsonrpc": "2.0", "id": req["id"], "result": {"tools": [], "method": req["method"]}}
+        sys.stdout.write(json.dumps(resp) + "\\n")
+        sys.stdout.flush()
+""")
+
+
+def _client(busy=0, exit_after_list=False, **kwargs):
+    command = [sys.executable, "-c", FAKE_SERVER, str(busy), "1" if exit_after_list else "0"]
+    return MCPClient(command=command, timeout=10, **kwargs)
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_overloaded_is_retried_by_both_apis(use_async):
+    with _client(busy=2) as client:
+        if use_async:
+            assert asyncio.run(client.alist_tools()) == []
+        else:
+            assert client.list_tools() == []
+    with _client(busy=5, overload_retries=1) as client:
+        with pytest.raises(MCPError):
+            asyncio.run(client.alist_tools()) if use_async else client.list_tools()
+
+
+def test_async_request_reconnects_for_safe_methods():
+    with _client(exit_after_list=True) as client:
+        with pytest.raises(ConnectionError):
+            asyncio.run(client.alist_tools())
+        # Each attempt spawned a server: the original and one retry
+        assert client.connects == 2
+
+
+def test_failed_initialize_reaps_the_server(monkeypatch):
+    spawned = []
+    popen = subprocess.Popen
+
+    def track(*args, **kwargs):
+        spawned.append(popen(*args, **kwargs))
+        return spawned[-1]
+
+    monkeypatch.setattr(subprocess, "Popen", track)
+    command = [sys.executable, "-c", "import sys, time; sys.stdin.readline(); time.sleep(60)"]
+    client = MCPClient(command=command, timeout=0.5)
+    with pytest.raises(TimeoutError):
+        client.connect()
+    assert not client.connected
+    assert len(spawned) == 1 and spawned[0].returncode is not None
@@ -0,0 +1,33 @@
+import pytest
+
+from MCP_Auth import MCPAuthManager
+
+
+@pytest.fixture
+def auth(tmp_path):
+    manager = MCPAuthManager(master_key="k" * 32, vault_dir=tmp_path)
+    yield manager
+    manager.close()
+
+
+def _bearer_server(auth):
+    name = next(n for n, c in auth.config["servers"].items() if c["auth_type"] == "bearer")
+    return name, auth.generate_server_key(name)
+
+
+def test_attempts_without_a_source_lock_out(auth):
+    server, key = _bearer_server(auth)
+    max_failures = auth.config["security"].get("max_failed_attempts", 5)
+    for _ in range(max_failures):
+        assert not auth.validate_server_connection(server, {"token": "wrong"})
+    assert not auth.validate_server_connection(server, {"token": key})
+    # Other sources are unaffected
+    assert auth.validate_server_connection(server, {"token": key}, source="10.0.0.1")
+
+
+def test_forged_client_id_does_not_lock_out_other_sources(auth):
+    server, key = _bearer_server(auth)
+    forged = {"client_id": "heady_master", "token": "wrong"}
+    for _ in range(10):
+        auth.validate_server_connection(server, forged, source="6.6.6.6")
+    assert auth.validate_server_connection(server, {"client_id": "heady_master", "token": key}, source="10.0.0.1")
@@ -0,0 +1,41 @@
+import Server
+from Resources import ResourceIndex
+
+
+def _reports(base):
+    (base / "Content_Forge" / "Docs").mkdir(parents=True)
+    (base / "Content_Forge" / "Encrypted").mkdir()
+    (base / "Content_Forge" / "Docs" / "doc.md").write_text("# doc\n")
+    (base / "Content_Forge" / "Encrypted" / "env.hcrypt").write_text("secret")
+    (base / "Content_Forge" / ".env").write_text("KEY=1")
+    return ResourceIndex(base)
+
+
+def test_encrypted_and_dotfiles_not_listed(tmp_path):
+    index = _reports(tmp_path)
+    uris = [r["uri"] for r in index.list()["resources"]]
+    assert uris == ["heady://Content_Forge/Docs/doc.md"]
+    assert not any(u.endswith(".hcrypt") for u in uris)
+
+
+def test_malformed_cursors_and_ranges_are_invalid_params(tmp_path):
+    index = _reports(tmp_path)
+    uri = index.list()["resources"][0]["uri"]
+    bad = [
+        ("resources/list", {"cursor": "abc"}),
+        ("resources/list", {"cursor": "-5"}),
+        ("resources/read", {"uri": uri, "cursor": "x"}),
+        ("resources/read", {"uri": uri, "offset": "10"}),
+        ("resources/read", {"uri": uri, "length": [1]}),
+        ("resources/read", {"uri": uri, "offset": -1}),
+    ]
+    Server._resources, saved = index, Server._resources
+    try:
+        for method, params in bad:
+            response = Server.handle_request({"jsonrpc": "2.0", "id": 1, "method": method, "params": params})
+            assert response["error"]["code"] == -32602, (method, params, response)
+        ok = Server.handle_request({"jsonrpc": "2.0", "id": 2, "method": "resources/read",
+                             "params": {"uri": uri, "offset": 2, "length": 3}})
+        assert ok["result"]["contents"][0]["text"] == "doc"
+    finally:
+        Server._resources = saved
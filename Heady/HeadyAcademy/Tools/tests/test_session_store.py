@@ -0,0 +1,32 @@
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from Session_Store import SessionRecord
+
+
+@pytest.fixture
+def non_utc_host():
+    saved = os.environ.get("TZ")
+    os.environ["TZ"] = "America/New_York"
+    time.tzset()
+    yield
+    if saved is None:
+        del os.environ["TZ"]
+    else:
+        os.environ["TZ"] = saved
+    time.tzset()
+
+
+@pytest.mark.skipif(not hasattr(time, "tzset"), reason="needs time.tzset")
+def test_naive_expiry_is_read_as_utc(non_utc_host):
+    exp = datetime.utcnow().replace(microsecond=0) + timedelta(hours=1)
+    expected = exp.replace(tzinfo=timezone.utc).timestamp()
+    for value in (exp, exp.isoformat(), str(exp)):
+        record = SessionRecord("c", "s", {"type": "jwt", "token": "t", "expires": value})
+        assert record.auth_time == expected
+    # Round trip through the stored form keeps the same instant
+    again = SessionRecord("c", "s", record.auth_data)
+    assert again.auth_time == expected